@@ -0,0 +1,93 @@
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RouteClass:
+    """Admission state for one class of routes: a bounded in-flight limit plus an optional bounded wait queue."""
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int = 0, queue_timeout: float = 0.0):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.avg_service_time = 0.0  # exponentially weighted, seconds
+        self._cond = threading.Condition()
+
+    def acquire(self) -> bool:
+        """Take an in-flight slot, waiting in the queue up to queue_timeout; return False to shed the request."""
+        with self._cond:
+            if self.in_flight < self.max_in_flight and not self.waiting:
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                return False
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_flight >= self.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self, service_time: Optional[float] = None) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if service_time is not None:
+                self.avg_service_time += 0.1 * (service_time - self.avg_service_time)
+            self._cond.notify()
+
+    def retry_after(self) -> int:
+        """Estimate in whole seconds when a rejected client should retry."""
+        with self._cond:
+            backlog = self.in_flight + self.waiting
+            estimate = self.avg_service_time * backlog / max(1, self.max_in_flight)
+        return max(1, math.ceil(max(estimate, self.queue_timeout)))
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                'in_flight': self.in_flight,
+                'queue_depth': self.waiting,
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'queue_timeout': self.queue_timeout,
+                'admitted': self.admitted,
+                'rejected_queue_full': self.rejected_queue_full,
+                'rejected_timeout': self.rejected_timeout,
+                'avg_service_ms': round(self.avg_service_time * 1000, 3)
+            }
+
+
+class AdmissionController:
+    """Registry of route classes; requests either get a slot quickly or are shed so latency stays bounded."""
+
+    def __init__(self):
+        self.route_classes = {}
+
+    def add_route_class(self, name: str, max_in_flight: int, max_queue: int = 0,
+                        queue_timeout: float = 0.0) -> RouteClass:
+        route_class = RouteClass(name, max_in_flight, max_queue, queue_timeout)
+        self.route_classes[name] = route_class
+        return route_class
+
+    def __getitem__(self, name: str) -> RouteClass:
+        return self.route_classes[name]
+
+    def stats(self) -> Dict[str, Dict]:
+        return {name: route_class.stats() for name, route_class in self.route_classes.items()}
@@ -1,274 +1,268 @@
+import hashlib
 import json
-from typing import Dict, List, Optional, Union
-import random
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
+
+from records import (
+    ChallengeRecommendation, Message, MetricRecommendation, PracticeRecommendation, ToolRecommendation,
+    json_default
+)
+from scoring_weights import ScoringWeights, read_scoring_weights
+
+if TYPE_CHECKING:
+    from singleflight import SingleFlight
+
+# Environment variable naming a JSON file that caches compiled knowledge-base indexes
+INDEX_CACHE_ENV = "AGILE_KB_INDEX_CACHE"
+# Environment variable overriding where the knowledge base is read from
+KNOWLEDGE_BASE_ENV = "AGILE_KNOWLEDGE_BASE"
+# Environment variable naming a fitted scoring-weights file (see fit_weights.py); unset uses the built-in weights
+SCORING_WEIGHTS_ENV = "AGILE_SCORING_WEIGHTS"
+DEFAULT_KNOWLEDGE_BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base.json")
+KNOWLEDGE_BASE_SECTIONS = ("methodologies", "common_challenges", "metrics", "team_sizes")
+
+# Built-in methodology scoring weights, in tie-break order (the first of equally scored methodologies wins);
+# a fitted weights file (SCORING_WEIGHTS_ENV) replaces them
+METHODOLOGIES = ("scrum", "kanban", "xp", "lean")
+TEAM_SIZE_WEIGHTS = {
+    "1-5 members": {"kanban": 30, "xp": 20, "scrum": 10},
+    "6-12 members": {"scrum": 30, "xp": 20, "kanban": 10},
+}
+LARGE_TEAM_WEIGHTS = {"scrum": 20, "lean": 20, "xp": 10}  # 13+ members (any other team size)
+CHALLENGE_WEIGHT = 15  # Per methodology whose knowledge-base entry addresses the challenge
+GOAL_WEIGHTS = {
+    "Faster delivery": {"kanban": 15, "lean": 15, "xp": 10},
+    "Higher quality": {"xp": 20, "lean": 10},
+    "Better predictability": {"scrum": 15, "kanban": 10},
+    "Team satisfaction": {"xp": 15, "kanban": 10},
+    "Reduced costs": {"lean": 20},
+    "Better customer collaboration": {"scrum": 15, "xp": 10},
+    "More innovation": {"lean": 15, "xp": 10}
+}
+EXPERIENCE_WEIGHTS = {
+    "Beginner": {"kanban": 10, "xp": -5},  # Kanban is simpler to adopt; XP's practices are complex
+    "Advanced": {"xp": 10, "lean": 5},  # XP benefits from technical expertise
+}
+COMPLEXITY_WEIGHTS = {
+    "Complex": {"scrum": 10, "xp": 10},
+    "Simple": {"kanban": 10, "lean": 5},
+}
+DEFAULT_SCORING_WEIGHTS = ScoringWeights(
+    0, TEAM_SIZE_WEIGHTS, LARGE_TEAM_WEIGHTS, GOAL_WEIGHTS, EXPERIENCE_WEIGHTS, COMPLEXITY_WEIGHTS,
+    challenge_weight=CHALLENGE_WEIGHT
+)
+# By path: (file mtime and size, weights), so every consultant in a process shares one load per file version
+_loaded_scoring_weights: Dict[str, Tuple[Optional[Tuple[int, int]], ScoringWeights]] = {}
+_scoring_weights_lock = threading.Lock()
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_scoring_weights(path: Optional[str]) -> ScoringWeights:
+    """Return the fitted weights at path, or the built-in weights when path is empty.
+
+    The file is read again only when its mtime or size changes. If a changed file fails to
+    read or validate, the error is raised once and the previous weights are kept until the
+    file changes again; a file that vanishes also keeps the previous weights.
+    """
+    if not path:
+        return DEFAULT_SCORING_WEIGHTS
+    signature = _file_signature(path)
+    loaded = _loaded_scoring_weights.get(path)
+    if loaded is not None and (signature is None or loaded[0] == signature):
+        return loaded[1]
+    with _scoring_weights_lock:
+        loaded = _loaded_scoring_weights.get(path)
+        if loaded is not None and (signature is None or loaded[0] == signature):
+            return loaded[1]
+        try:
+            weights = read_scoring_weights(path, METHODOLOGIES)
+        except Exception:
+            if loaded is not None:
+                _loaded_scoring_weights[path] = (signature, loaded[1])
+            raise
+        _loaded_scoring_weights[path] = (signature, weights)
+        return weights
+
+
+def compile_knowledge_indexes(knowledge_base: Dict) -> Dict:
+    """Precompute the lookup tables used on the recommendation hot path."""
+    challenge_methodologies = {}
+    for methodology, info in knowledge_base["methodologies"].items():
+        for challenge in info.get("challenges_addressed", []):
+            challenge_methodologies.setdefault(challenge, []).append(methodology)
+    return {
+        "challenge_methodologies": challenge_methodologies,
+        "challenge_keys": sorted(knowledge_base["common_challenges"]),
+        "metric_keys": list(knowledge_base["metrics"]),
+    }
+
+
+def knowledge_base_fingerprint(knowledge_base: Dict) -> str:
+    """Return a stable hash of the knowledge base, used to invalidate cached indexes."""
+    encoded = json.dumps(knowledge_base, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def context_fingerprint(context: Dict) -> str:
+    """Return a canonical key for a project context; answer order inside lists is kept since it affects output."""
+    encoded = json.dumps(context, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def load_knowledge_indexes(knowledge_base: Dict, cache_path: Optional[str] = None) -> Dict:
+    """Load compiled indexes from cache_path if it matches the knowledge base, else compile (and cache) them."""
+    if not cache_path:
+        return compile_knowledge_indexes(knowledge_base)
+    fingerprint = knowledge_base_fingerprint(knowledge_base)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fingerprint:
+            return cached["indexes"]
+    except (OSError, ValueError, KeyError):
+        pass
+    indexes = compile_knowledge_indexes(knowledge_base)
+    try:
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"fingerprint": fingerprint, "indexes": indexes}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # A read-only cache location only costs a recompile next start
+    return indexes
+
+
+def flow_findings(flow: Dict) -> Dict[str, str]:
+    """Describe measured flow metrics (a flow_metrics.FlowMetricsIngestor summary), keyed by metric."""
+    findings = {}
+    cycle, lead, throughput = flow.get("cycle_time_days"), flow.get("lead_time_days"), flow.get("throughput_per_week")
+    if cycle:
+        findings["cycle_time"] = f"Your median Cycle Time is {cycle['p50']} days; 85% of items finish within {cycle['p85']} days."
+    if lead:
+        findings["lead_time"] = f"Your median Lead Time is {lead['p50']} days; 85% of items finish within {lead['p85']} days."
+    if throughput:
+        findings["throughput"] = (
+            f"Your Throughput averages {throughput['mean']} items per week ({throughput['last_week']} in the latest week)."
+        )
+    if flow.get("defect_rate") is not None:
+        findings["defect_rate"] = f"{flow['defect_rate'] * 100:.1f}% of your completed items were defects."
+    return findings
+
+
+class KnowledgeSnapshot:
+    """One immutable, versioned knowledge base together with its compiled indexes.
+
+    Consultants hold a reference to a snapshot; reloading builds a new snapshot and swaps the
+    reference, so readers never lock and a request pinned to a snapshot finishes on it.
+    """
+    __slots__ = ("version", "knowledge_base", "indexes", "fingerprint", "source")
+
+    def __init__(self, version: int, knowledge_base: Dict, indexes: Dict, fingerprint: str, source: Optional[str] = None):
+        self.version = version
+        self.knowledge_base = knowledge_base
+        self.indexes = indexes
+        self.fingerprint = fingerprint
+        self.source = source
+
+
+def read_knowledge_base(path: str) -> Dict:
+    """Read and sanity-check a knowledge-base JSON file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        knowledge_base = json.load(f)
+    if not isinstance(knowledge_base, dict):
+        raise ValueError(f"Knowledge base {path} must be a JSON object")
+    missing = [section for section in KNOWLEDGE_BASE_SECTIONS if not isinstance(knowledge_base.get(section), dict)]
+    if missing:
+        raise ValueError(f"Knowledge base {path} is missing sections: {', '.join(missing)}")
+    return knowledge_base
+
+
+def build_knowledge_snapshot(path: str, version: int, index_cache_path: Optional[str] = None) -> KnowledgeSnapshot:
+    """Load the knowledge-base file at path and compile it into a snapshot with the given version."""
+    knowledge_base = read_knowledge_base(path)
+    indexes = load_knowledge_indexes(knowledge_base, index_cache_path)
+    return KnowledgeSnapshot(version, knowledge_base, indexes, knowledge_base_fingerprint(knowledge_base), path)
+
 
 class AgileProjectConsultant:
     """
     Main class for the Agile Project Consultant AI agent, providing tailored agile recommendations.
     """
     
-    def __init__(self):
-        """Initialize the agent with expanded knowledge bases and conversation history."""
+    def __init__(self, index_cache_path: Optional[str] = None, knowledge_base_path: Optional[str] = None,
+                 scoring_weights_path: Optional[str] = None):
+        """Initialize the agent; the knowledge base, its indexes and the scoring weights are loaded on first use."""
         self.conversation_history = []
         self.project_context = {}
-        self.knowledge_base = self._load_knowledge_base()
-        
-    def _load_knowledge_base(self) -> Dict:
-        """Load an expanded knowledge base with detailed agile methodologies, practices, and metrics."""
-        return {
-            "methodologies": {
-                "scrum": {
-                    "description": "A framework for iterative development with fixed sprints and defined roles.",
-                    "best_for": ["teams of 3-9 members", "complex products", "dynamic requirements"],
-                    "ceremonies": ["Sprint Planning", "Daily Standup", "Sprint Review", "Sprint Retrospective"],
-                    "roles": ["Product Owner", "Scrum Master", "Development Team"],
-                    "artifacts": ["Product Backlog", "Sprint Backlog", "Increment"],
-                    "challenges_addressed": ["scope creep", "meeting deadlines", "poor communication"],
-                    "implementation_tips": [
-                        "Start with 2-week sprints for balance.",
-                        "Train the Scrum Master to facilitate effectively.",
-                        "Use a digital tool like Jira for backlog management."
-                    ]
-                },
-                "kanban": {
-                    "description": "A visual workflow method emphasizing continuous delivery and flow.",
-                    "best_for": ["small teams", "support/operations", "unpredictable workflows"],
-                    "principles": ["Visualize workflow", "Limit work in progress", "Manage flow", "Explicit policies"],
-                    "practices": ["Kanban board", "WIP limits", "Continuous delivery", "Feedback loops"],
-                    "challenges_addressed": ["poor communication", "lack of engagement", "inconsistent estimation"],
-                    "implementation_tips": [
-                        "Design a Kanban board with 3-5 columns reflecting your workflow.",
-                        "Set WIP limits to 2-3 tasks per column initially.",
-                        "Review flow weekly to optimize throughput."
-                    ]
-                },
-                "xp": {
-                    "description": "A methodology focused on engineering practices for high-quality software.",
-                    "best_for": ["medium teams", "complex code bases", "quality-driven projects"],
-                    "practices": ["Pair Programming", "Test-Driven Development", "Continuous Integration", "Simple Design", "Refactoring"],
-                    "challenges_addressed": ["quality issues", "resistance to change", "lack of engagement"],
-                    "implementation_tips": [
-                        "Start TDD with a single module to demonstrate value.",
-                        "Rotate pairs weekly to spread knowledge.",
-                        "Automate CI pipelines with tools like Jenkins."
-                    ]
-                },
-                "lean": {
-                    "description": "A method to maximize value by minimizing waste and optimizing processes.",
-                    "best_for": ["any team size", "efficiency-focused organizations", "process improvement"],
-                    "principles": ["Eliminate waste", "Build quality in", "Create knowledge", "Defer commitment", "Deliver fast"],
-                    "challenges_addressed": ["reduced costs", "inconsistent estimation", "stakeholder management"],
-                    "implementation_tips": [
-                        "Map your value stream to identify waste.",
-                        "Implement pull systems to avoid overproduction.",
-                        "Use A/B testing for process experiments."
-                    ]
-                }
-            },
-            "common_challenges": {
-                "resistance_to_change": {
-                    "strategies": [
-                        "Demonstrate small wins with pilot projects.",
-                        "Educate on benefits with real-world examples.",
-                        "Involve team in process design for ownership.",
-                        "Address concerns in retrospectives with action plans."
-                    ],
-                    "xp_specific": [
-                        "Use Pair Programming to build trust and reduce resistance.",
-                        "Show TDD’s impact on reducing defects early."
-                    ],
-                    "kanban_specific": [
-                        "Use a Kanban board to visualize progress, easing transition concerns.",
-                        "Start with low WIP limits to show quick wins."
-                    ]
-                },
-                "lack_of_engagement": {
-                    "strategies": [
-                        "Connect tasks to the product vision for purpose.",
-                        "Rotate roles to maintain interest.",
-                        "Celebrate milestones with team recognition.",
-                        "Encourage innovation through hackathons or experiments."
-                    ],
-                    "xp_specific": [
-                        "Rotate pairs in Pair Programming to foster collaboration.",
-                        "Use TDD to give developers immediate feedback, boosting engagement."
-                    ],
-                    "kanban_specific": [
-                        "Involve the team in designing the Kanban board for ownership.",
-                        "Use daily standups to encourage participation."
-                    ]
-                },
-                "poor_communication": {
-                    "strategies": [
-                        "Establish clear team agreements on communication channels.",
-                        "Use visual tools like Kanban boards or burndown charts.",
-                        "Timebox ceremonies to keep discussions focused.",
-                        "Implement daily check-ins for alignment."
-                    ],
-                    "xp_specific": [
-                        "Leverage Pair Programming for real-time communication.",
-                        "Use Continuous Integration feedback to align on code quality."
-                    ],
-                    "kanban_specific": [
-                        "Use the Kanban board as an information radiator for transparency.",
-                        "Review board updates in daily standups to align the team."
-                    ]
-                },
-                "inconsistent_estimation": {
-                    "strategies": [
-                        "Use story points and Planning Poker for consensus.",
-                        "Maintain a reference backlog for sizing consistency.",
-                        "Review past estimates in retrospectives.",
-                        "Break tasks into smaller, estimable units."
-                    ],
-                    "xp_specific": [
-                        "Estimate tasks collaboratively during TDD planning.",
-                        "Use Simple Design to keep tasks small and predictable."
-                    ]
-                },
-                "scope_creep": {
-                    "strategies": [
-                        "Prioritize backlog items with stakeholders regularly.",
-                        "Define strict 'Done' criteria for each task.",
-                        "Implement a change request process.",
-                        "Educate stakeholders on trade-offs of adding scope."
-                    ],
-                    "xp_specific": [
-                        "Use TDD to ensure new features meet quality standards.",
-                        "Refactor code to accommodate changes without technical debt."
-                    ]
-                },
-                "quality_issues": {
-                    "strategies": [
-                        "Implement automated testing suites.",
-                        "Conduct code reviews before merging.",
-                        "Define quality metrics like defect rates.",
-                        "Train team on best practices."
-                    ],
-                    "xp_specific": [
-                        "Adopt TDD to catch defects early.",
-                        "Use Continuous Integration to ensure code stability."
-                    ]
-                },
-                "meeting_deadlines": {
-                    "strategies": [
-                        "Break work into smaller iterations.",
-                        "Track velocity to predict delivery.",
-                        "Remove blockers promptly in daily standups.",
-                        "Negotiate scope with stakeholders."
-                    ],
-                    "xp_specific": [
-                        "Use TDD to reduce rework, speeding up delivery.",
-                        "Implement Continuous Integration for faster feedback."
-                    ],
-                    "kanban_specific": [
-                        "Optimize flow with WIP limits to meet deadlines.",
-                        "Track Cycle Time to identify delays early."
-                    ]
-                },
-                "stakeholder_management": {
-                    "strategies": [
-                        "Schedule regular stakeholder reviews.",
-                        "Use demos to align on expectations.",
-                        "Create transparent progress dashboards.",
-                        "Train team on stakeholder communication."
-                    ],
-                    "xp_specific": [
-                        "Show TDD test results to stakeholders for quality assurance.",
-                        "Use Simple Design to explain technical decisions clearly."
-                    ]
-                }
-            },
-            "metrics": {
-                "velocity": {
-                    "description": "Measures work completed per iteration, useful for predicting capacity.",
-                    "how_to_measure": "Sum story points completed per sprint.",
-                    "best_for": ["scrum"],
-                    "implementation_tips": [
-                        "Track over 3-5 sprints for stability.",
-                        "Adjust estimates if velocity fluctuates widely."
-                    ]
-                },
-                "cycle_time": {
-                    "description": "Time from starting a task to its completion, indicating efficiency.",
-                    "how_to_measure": "Average time from 'In Progress' to 'Done' in days/hours.",
-                    "best_for": ["kanban", "xp", "lean"],
-                    "implementation_tips": [
-                        "Use tools like Jira for automatic tracking.",
-                        "Aim for consistent Cycle Times (e.g., 1-3 days)."
-                    ]
-                },
-                "lead_time": {
-                    "description": "Time from task request to delivery, showing responsiveness.",
-                    "how_to_measure": "Average time from backlog entry to completion.",
-                    "best_for": ["kanban", "xp", "lean"],
-                    "implementation_tips": [
-                        "Break tasks into smaller units to reduce Lead Time.",
-                        "Review weekly to identify delays."
-                    ]
-                },
-                "defect_rate": {
-                    "description": "Number of bugs found post-release, indicating quality.",
-                    "how_to_measure": "Bugs per feature or per sprint, tracked in a bug system.",
-                    "best_for": ["xp", "quality focus"],
-                    "implementation_tips": [
-                        "Use automated tests to catch defects early.",
-                        "Target <1 bug per feature."
-                    ]
-                },
-                "team_happiness": {
-                    "description": "Team satisfaction and engagement, critical for retention.",
-                    "how_to_measure": "Survey team (1-5 scale) biweekly or monthly.",
-                    "best_for": ["all methodologies"],
-                    "implementation_tips": [
-                        "Use anonymous surveys for honest feedback.",
-                        "Act on results in retrospectives."
-                    ]
-                }
-            },
-            "team_sizes": {
-                "small": {
-                    "range": "1-5 members",
-                    "recommendations": [
-                        "Use Kanban or simplified Scrum for flexibility.",
-                        "Combine roles (e.g., Product Owner/Scrum Master).",
-                        "Keep ceremonies short (10-15 minutes).",
-                        "Encourage generalist skills."
-                    ],
-                    "xp_tips": [
-                        "Pair Programming can double as mentoring.",
-                        "TDD suits small teams for quick quality checks."
-                    ]
-                },
-                "medium": {
-                    "range": "6-12 members",
-                    "recommendations": [
-                        "Adopt Scrum or XP with dedicated roles.",
-                        "Balance specialists and generalists.",
-                        "Use regular ceremonies for alignment.",
-                        "Track metrics like velocity or defect rate."
-                    ],
-                    "xp_tips": [
-                        "Rotate pairs to spread expertise.",
-                        "Use CI tools to manage larger codebases."
-                    ]
-                },
-                "large": {
-                    "range": "13+ members",
-                    "recommendations": [
-                        "Scale with Scrum of Scrums or SAFe.",
-                        "Define clear inter-team dependencies.",
-                        "Standardize processes across teams.",
-                        "Foster communities of practice."
-                    ],
-                    "xp_tips": [
-                        "Apply TDD at the module level.",
-                        "Use CI/CD for cross-team integration."
-                    ]
-                }
-            }
-        }
-    
+        self.index_cache_path = index_cache_path or os.environ.get(INDEX_CACHE_ENV)
+        self.knowledge_base_path = (knowledge_base_path or os.environ.get(KNOWLEDGE_BASE_ENV)
+                                    or DEFAULT_KNOWLEDGE_BASE_PATH)
+        self.scoring_weights_path = scoring_weights_path or os.environ.get(SCORING_WEIGHTS_ENV)
+        self._scoring_weights = None
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> KnowledgeSnapshot:
+        """Return the current knowledge-base snapshot, loading version 1 on first access."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._snapshot_lock:
+                if self._snapshot is None:
+                    self._snapshot = build_knowledge_snapshot(self.knowledge_base_path, 1, self.index_cache_path)
+                snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def knowledge_base(self) -> Dict:
+        """Return the knowledge base, loading it on first access."""
+        return self.snapshot.knowledge_base
+
+    @property
+    def indexes(self) -> Dict:
+        """Return the compiled knowledge-base indexes, loading them from cache or building them on first access."""
+        return self.snapshot.indexes
+
+    @property
+    def scoring_weights(self) -> ScoringWeights:
+        """Return the methodology scoring weights: the fitted file at scoring_weights_path, else the built-in tables."""
+        weights = self._scoring_weights
+        if weights is None:
+            weights = self._scoring_weights = load_scoring_weights(self.scoring_weights_path)
+        return weights
+
+    def reload_scoring_weights(self) -> bool:
+        """Re-read the scoring-weights file if it changed; return True if new weights went live.
+
+        Views made earlier (with_context) keep scoring with the weights they were made with.
+        """
+        if not self.scoring_weights_path:
+            return False
+        current = self.scoring_weights
+        weights = load_scoring_weights(self.scoring_weights_path)
+        if weights is current:
+            return False
+        self._scoring_weights = weights
+        return True
+
+    def swap_snapshot(self, snapshot: KnowledgeSnapshot) -> KnowledgeSnapshot:
+        """Atomically make snapshot current and return the one it replaced; pinned views keep the old one."""
+        with self._snapshot_lock:
+            previous, self._snapshot = self._snapshot, snapshot
+        return previous
+
+    def pinned(self) -> "AgileProjectConsultant":
+        """Return a view sharing this consultant's context and history, fixed to the current snapshot."""
+        return self.with_snapshot(self.snapshot)
+
     def start_conversation(self) -> str:
         """Initiate a conversation with a tailored greeting based on context."""
         if self.project_context:
@@ -285,7 +279,7 @@ class AgileProjectConsultant:
                 "To get started, click 'Start Assessment' to share your team’s context, or ask a specific question "
                 "about agile methodologies, practices, or challenges."
             )
-        self.conversation_history.append({"role": "agent", "content": greeting})
+        self.conversation_history.append(Message("agent", greeting))
         return greeting
     
     def collect_project_context(self) -> List[Dict]:
@@ -357,69 +351,32 @@ class AgileProjectConsultant:
         if not answer or (isinstance(answer, list) and not answer):
             answer = "Not specified"
         self.project_context[question_id] = answer
-        self.conversation_history.append({"role": "user", "content": f"{question_id}: {answer}"})
+        self.conversation_history.append(Message("user", f"{question_id}: {answer}"))
     
+    def score_methodologies(self) -> Dict[str, int]:
+        """Score each methodology for the current context with the consultant's scoring weights."""
+        context = self.project_context
+        answers = [("team_size", context.get("team_size", "6-12 members"))]
+        answers.extend(("challenges", challenge) for challenge in context.get("challenges", []))
+        answers.extend(("goals", goal) for goal in context.get("goals", []))
+        answers.append(("experience_level", context.get("experience_level", "Intermediate")))
+        answers.append(("project_complexity", context.get("project_complexity", "Moderate")))
+        weights = self.scoring_weights
+        challenge_methodologies = self.indexes["challenge_methodologies"]
+        scores = dict.fromkeys(METHODOLOGIES, 0)
+        for question_id, answer in answers:
+            for methodology, weight in weights.answer_weights(question_id, answer, challenge_methodologies).items():
+                scores[methodology] += weight
+        return scores
+
     def get_methodology_recommendation(self) -> Dict:
         """Recommend a methodology using weighted context analysis."""
         team_size = self.project_context.get("team_size", "6-12 members")
         challenges = self.project_context.get("challenges", [])
         goals = self.project_context.get("goals", [])
         current_methodology = self.project_context.get("current_methodology", "None/Traditional").lower()
-        experience_level = self.project_context.get("experience_level", "Intermediate")
-        project_complexity = self.project_context.get("project_complexity", "Moderate")
-
-        # Scoring system for methodology selection
-        scores = {"scrum": 0, "kanban": 0, "xp": 0, "lean": 0}
-        
-        # Team size scoring
-        if team_size == "1-5 members":
-            scores["kanban"] += 30
-            scores["xp"] += 20
-            scores["scrum"] += 10
-        elif team_size == "6-12 members":
-            scores["scrum"] += 30
-            scores["xp"] += 20
-            scores["kanban"] += 10
-        else:  # 13+ members
-            scores["scrum"] += 20
-            scores["lean"] += 20
-            scores["xp"] += 10
-
-        # Challenge scoring
-        for challenge in challenges:
-            for methodology, info in self.knowledge_base["methodologies"].items():
-                if challenge.lower() in info["challenges_addressed"]:
-                    scores[methodology] += 15
-
-        # Goal scoring
-        goal_weights = {
-            "Faster delivery": {"kanban": 15, "lean": 15, "xp": 10},
-            "Higher quality": {"xp": 20, "lean": 10},
-            "Better predictability": {"scrum": 15, "kanban": 10},
-            "Team satisfaction": {"xp": 15, "kanban": 10},
-            "Reduced costs": {"lean": 20},
-            "Better customer collaboration": {"scrum": 15, "xp": 10},
-            "More innovation": {"lean": 15, "xp": 10}
-        }
-        for goal in goals:
-            for methodology, weight in goal_weights.get(goal, {}).items():
-                scores[methodology] += weight
 
-        # Experience level adjustment
-        if experience_level == "Beginner":
-            scores["kanban"] += 10  # Simpler to adopt
-            scores["xp"] -= 5  # Complex practices
-        elif experience_level == "Advanced":
-            scores["xp"] += 10  # Benefits from technical expertise
-            scores["lean"] += 5
-
-        # Complexity adjustment
-        if project_complexity == "Complex":
-            scores["scrum"] += 10
-            scores["xp"] += 10
-        elif project_complexity == "Simple":
-            scores["kanban"] += 10
-            scores["lean"] += 5
+        scores = self.score_methodologies()
 
         # Select the highest-scoring methodology
         recommended_methodology = max(scores, key=scores.get)
@@ -432,8 +389,9 @@ class AgileProjectConsultant:
         for challenge in challenges[:2]:
             if challenge.lower() in methodology_info.get("challenges_addressed", []):
                 reasons.append(f"It addresses your challenge of {challenge.lower()} effectively.")
+        goal_weights = self.scoring_weights.goals
         for goal in goals[:2]:
-            if goal in goal_weights and recommended_methodology in goal_weights[goal]:
+            if goal_weights.get(goal, {}).get(recommended_methodology, 0) > 0:
                 reasons.append(f"It supports your goal of {goal.lower()}.")
 
         return {
@@ -534,11 +492,12 @@ class AgileProjectConsultant:
         methodology = self.project_context.get("current_methodology", "xp").lower()
         challenge_info = self.knowledge_base["common_challenges"].get(challenge_key, {})
         
-        advice = challenge_info.get("strategies", [
+        # Copy so the methodology-specific additions below don't grow the knowledge base's list
+        advice = list(challenge_info.get("strategies", [
             "Discuss this challenge in a retrospective to identify root causes.",
             "Experiment with small changes to address it.",
             "Review outcomes after 1-2 iterations."
-        ])
+        ]))
         
         # Add methodology-specific advice
         if methodology in self.knowledge_base["methodologies"]:
@@ -547,8 +506,25 @@ class AgileProjectConsultant:
         
         return advice
     
-    def generate_full_recommendations(self) -> Dict:
-        """Generate comprehensive, context-driven recommendations."""
+    def with_context(self, context: Dict) -> "AgileProjectConsultant":
+        """Return a lightweight consultant sharing this one's knowledge base but with its own context and history."""
+        view = object.__new__(type(self))
+        view.__dict__.update(self.__dict__)
+        view._snapshot = self.snapshot
+        view._scoring_weights = self.scoring_weights
+        view.project_context = context
+        view.conversation_history = []
+        return view
+
+    def with_snapshot(self, snapshot: KnowledgeSnapshot) -> "AgileProjectConsultant":
+        """Return a view answering from another knowledge-base snapshot while sharing this one's context and history."""
+        view = object.__new__(type(self))
+        view.__dict__.update(self.__dict__)
+        view._snapshot = snapshot
+        return view
+
+    def build_full_recommendations(self) -> Tuple[Dict, str]:
+        """Compute the full recommendations and their summary without touching conversation history."""
         recommendations = {
             "methodology": self.get_methodology_recommendation(),
             "team_practices": self.get_team_practices_recommendations(),
@@ -564,11 +540,26 @@ class AgileProjectConsultant:
             f"Focus on practices like {', '.join([p['practice'] for p in recommendations['team_practices'][:2]])}. "
             f"Track metrics like {', '.join([m['metric'] for m in recommendations['metrics'][:2]])} to measure progress."
         )
-        self.conversation_history.append({"role": "agent", "content": summary})
+        return recommendations, summary
+
+    def generate_full_recommendations(self, coalescer: Optional["SingleFlight"] = None) -> Dict:
+        """Generate comprehensive, context-driven recommendations.
+
+        With a coalescer, concurrent calls for an identical context and knowledge base share one computation.
+        """
+        if coalescer is None:
+            recommendations, summary = self.build_full_recommendations()
+        else:
+            view = self.with_context(dict(self.project_context))
+            (recommendations, summary), _ = coalescer.do(
+                (view.snapshot.fingerprint, context_fingerprint(view.project_context)),
+                view.build_full_recommendations
+            )
+        self.conversation_history.append(Message("agent", summary))
         
         return recommendations
     
-    def get_team_practices_recommendations(self) -> List[Dict]:
+    def get_team_practices_recommendations(self) -> List[PracticeRecommendation]:
         """Recommend practices tailored to context and methodology."""
         challenges = self.project_context.get("challenges", [])
         methodology = self.project_context.get("current_methodology", "xp").lower()
@@ -579,68 +570,68 @@ class AgileProjectConsultant:
         # Methodology-specific practices
         if methodology == "xp":
             if "quality_issues" in challenges or "Higher quality" in self.project_context.get("goals", []):
-                practices.append({
-                    "practice": "Test-Driven Development",
-                    "description": "Write tests before code to ensure quality and reduce defects.",
-                    "implementation_tips": [
+                practices.append(PracticeRecommendation(
+                    practice="Test-Driven Development",
+                    description="Write tests before code to ensure quality and reduce defects.",
+                    implementation_tips=[
                         f"For {team_size}, start TDD on a critical module.",
                         "Use a testing framework like pytest.",
                         "Train team in a 2-hour workshop."
                     ]
-                })
+                ))
             if "lack_of_engagement" in challenges or "Team satisfaction" in self.project_context.get("goals", []):
-                practices.append({
-                    "practice": "Pair Programming",
-                    "description": "Two developers work together to improve code and collaboration.",
-                    "implementation_tips": [
+                practices.append(PracticeRecommendation(
+                    practice="Pair Programming",
+                    description="Two developers work together to improve code and collaboration.",
+                    implementation_tips=[
                         f"Rotate pairs weekly for {team_size} to share knowledge.",
                         "Use tools like VS Code Live Share.",
                         "Set clear pairing guidelines."
                     ]
-                })
+                ))
         elif methodology == "kanban":
             if "poor_communication" in challenges:
-                practices.append({
-                    "practice": "Information Radiators",
-                    "description": "Visual boards to enhance transparency.",
-                    "implementation_tips": [
+                practices.append(PracticeRecommendation(
+                    practice="Information Radiators",
+                    description="Visual boards to enhance transparency.",
+                    implementation_tips=[
                         f"Create a digital board for {team_size} using Trello.",
                         "Update daily in standups.",
                         "Include WIP limits."
                     ]
-                })
+                ))
         elif methodology == "scrum":
             if "scope_creep" in challenges:
-                practices.append({
-                    "practice": "Backlog Refinement",
-                    "description": "Regularly prioritize and refine the backlog.",
-                    "implementation_tips": [
+                practices.append(PracticeRecommendation(
+                    practice="Backlog Refinement",
+                    description="Regularly prioritize and refine the backlog.",
+                    implementation_tips=[
                         f"For {team_size}, hold 1-hour sessions biweekly.",
                         "Involve stakeholders for alignment.",
                         "Use story points for sizing."
                     ]
-                })
+                ))
         
         # Always include key practices from recommendations
         default_practices = [
-            {
-                "practice": "Regular Retrospectives",
-                "description": "Reflect on processes to drive improvement.",
-                "implementation_tips": [
+            PracticeRecommendation(
+                practice="Regular Retrospectives",
+                description="Reflect on processes to drive improvement.",
+                implementation_tips=[
                     f"Hold biweekly for {team_size}.",
                     "Use formats like Start-Stop-Continue.",
                     "Track action items."
                 ]
-            },
-            {
-                "practice": "Definition of Done",
-                "description": "Criteria for task completion to ensure quality.",
-                "implementation_tips": [
+            ),
+            PracticeRecommendation(
+                practice="Definition of Done",
+                description="Criteria for task completion to ensure quality.",
+                implementation_tips=[
                     f"Define collaboratively with {team_size}.",
                     "Post visibly in your workspace.",
                     "Review monthly."
                 ]
-            }
+            )
         ]
         
         for practice in default_practices:
@@ -649,21 +640,18 @@ class AgileProjectConsultant:
         
         return practices
     
-    def get_challenges_recommendations(self) -> List[Dict]:
+    def get_challenges_recommendations(self) -> List[ChallengeRecommendation]:
         """Generate tailored recommendations for each challenge."""
         challenges = self.project_context.get("challenges", [])
         recommendations = []
         
         for challenge in challenges:
             advice = self.get_challenge_advice(challenge)
-            recommendations.append({
-                "challenge": challenge,
-                "recommendations": advice
-            })
+            recommendations.append(ChallengeRecommendation(challenge, advice))
         
         return recommendations
     
-    def recommend_tools(self) -> List[Dict]:
+    def recommend_tools(self) -> List[ToolRecommendation]:
         """Recommend tools aligned with methodology and team needs."""
         methodology = self.project_context.get("current_methodology", "xp").lower()
         team_size = self.project_context.get("team_size", "6-12 members")
@@ -697,27 +685,22 @@ class AgileProjectConsultant:
         for category in tools:
             for tool in category["options"]:
                 if methodology in [m.lower() for m in tool["best_for"]] or "all methodologies" in [m.lower() for m in tool["best_for"]]:
-                    recommended_tools.append({
-                        "category": category["category"],
-                        "recommendation": tool["name"],
-                        "description": tool["description"]
-                    })
+                    recommended_tools.append(ToolRecommendation(category["category"], tool["name"], tool["description"]))
                     break
             else:
-                recommended_tools.append({
-                    "category": category["category"],
-                    "recommendation": category["options"][0]["name"],
-                    "description": category["options"][0]["description"]
-                })
+                recommended_tools.append(ToolRecommendation(
+                    category["category"], category["options"][0]["name"], category["options"][0]["description"]
+                ))
         
         return recommended_tools
     
-    def recommend_metrics(self) -> List[Dict]:
+    def recommend_metrics(self) -> List[MetricRecommendation]:
         """Recommend metrics tailored to methodology and goals."""
         methodology = self.project_context.get("current_methodology", "xp").lower()
         goals = self.project_context.get("goals", [])
         challenges = self.project_context.get("challenges", [])
         
+        measured = flow_findings(self.project_context.get("flow_metrics") or {})
         metrics = []
         for metric, info in self.knowledge_base["metrics"].items():
             methodology_match = methodology in [m.lower() for m in info["best_for"]] or "all methodologies" in [m.lower() for m in info["best_for"]]
@@ -732,13 +715,11 @@ class AgileProjectConsultant:
                 goal_match = True
             if "quality_issues" in challenges and metric == "Defect Rate":
                 goal_match = True
-            if methodology_match or goal_match:
-                metrics.append({
-                    "metric": metric,
-                    "description": info["description"],
-                    "how_to_measure": info["how_to_measure"],
-                    "tips": info["implementation_tips"]
-                })
+            if methodology_match or goal_match or metric in measured:
+                description = f"{info['description']} {measured[metric]}" if metric in measured else info["description"]
+                metrics.append(MetricRecommendation(
+                    metric, description, info["how_to_measure"], info["implementation_tips"]
+                ))
         
         # Ensure at least 3 metrics
         available_metrics = list(self.knowledge_base["metrics"].keys())
@@ -746,20 +727,39 @@ class AgileProjectConsultant:
             for metric in available_metrics:
                 if metric not in [m["metric"] for m in metrics]:
                     info = self.knowledge_base["metrics"][metric]
-                    metrics.append({
-                        "metric": metric,
-                        "description": info["description"],
-                        "how_to_measure": info["how_to_measure"],
-                        "tips": info["implementation_tips"]
-                    })
+                    metrics.append(MetricRecommendation(
+                        metric, info["description"], info["how_to_measure"], info["implementation_tips"]
+                    ))
                     break
         
         return metrics
     
     def process_free_text_query(self, query: str) -> str:
         """Process free-text queries with detailed, context-specific responses."""
+        return "".join(self.stream_free_text_query(query))
+
+    def stream_free_text_query(self, query: str) -> Iterator[str]:
+        """Yield the response to a free-text query section by section, recording it in history once complete."""
+        self.conversation_history.append(Message("user", query))
+        sections = []
+        try:
+            for section in self._free_text_sections(query):
+                sections.append(section)
+                yield section
+        except GeneratorExit:
+            # The client went away mid-stream; keep what was actually sent
+            self.conversation_history.append(Message("agent", "".join(sections)))
+            raise
+        self.conversation_history.append(Message("agent", "".join(sections)))
+
+    @staticmethod
+    def _key_practices(methodology_info: Dict) -> List[str]:
+        """Return a methodology's practices, falling back to its ceremonies, then its principles."""
+        return methodology_info.get("practices") or methodology_info.get("ceremonies") or methodology_info.get("principles", [])
+
+    def _free_text_sections(self, query: str) -> Iterator[str]:
+        """Generate the sections (steps, tips, challenge add-ons, goal add-ons) of a free-text response."""
         query_lower = query.lower().strip()
-        self.conversation_history.append({"role": "user", "content": query})
         
         # Extract context
         team_size = self.project_context.get("team_size", "6-12 members")
@@ -789,48 +789,52 @@ class AgileProjectConsultant:
         
         # Kanban-specific queries
         if "kanban board" in query_lower:
-            response = (
+            yield (
                 f"To set up a Kanban board for your {team_size} team in {industry}, follow these steps:\n"
                 "1. Identify your workflow stages (e.g., To Do, In Progress, Review, Done).\n"
                 "2. Create a digital board using Trello or Jira with 3-5 columns reflecting these stages.\n"
                 "3. Add tasks as cards, including descriptions and due dates.\n"
                 "4. Set Work-in-Progress (WIP) limits (e.g., 2-3 tasks per column) to prevent overloading.\n"
                 "5. Review and update the board daily in standups.\n"
+            )
+            yield (
                 f"Implementation tips for {team_size}:\n"
                 "- Keep columns simple to match your small team’s capacity.\n"
                 "- Use visual cues (e.g., color labels) for task types.\n"
                 "- Adjust WIP limits weekly based on flow.\n"
             )
             if "poor_communication" in challenges:
-                response += "To address poor communication, use the board as an information radiator, ensuring all team members stay aligned.\n"
+                yield "To address poor communication, use the board as an information radiator, ensuring all team members stay aligned.\n"
             if "lack_of_engagement" in challenges:
-                response += "To improve engagement, involve the team in designing the board to foster ownership.\n"
+                yield "To improve engagement, involve the team in designing the board to foster ownership.\n"
             if "Faster delivery" in goals:
-                response += "Since faster delivery is a goal, optimize flow to reduce Cycle Time.\n"
+                yield "Since faster delivery is a goal, optimize flow to reduce Cycle Time.\n"
         
         # XP-specific queries
         elif "test-driven" in query_lower or "tdd" in query_lower:
-            response = (
+            yield (
                 f"To implement Test-Driven Development (TDD) for your {team_size} team in {industry}, follow these steps:\n"
                 "1. Write a failing unit test for a small feature using a framework like pytest.\n"
                 "2. Run the test to confirm it fails (red phase).\n"
                 "3. Write minimal code to pass the test (green phase).\n"
                 "4. Refactor to improve code quality, ensuring tests still pass.\n"
                 "5. Repeat for each feature or bug fix.\n"
+            )
+            yield (
                 f"Implementation tips for {team_size}:\n"
                 "- Start with a critical module to show value.\n"
                 "- Train developers in a 2-hour TDD workshop.\n"
                 "- Use pair programming to reinforce TDD.\n"
             )
             if "resistance_to_change" in challenges:
-                response += "To address resistance to change, demonstrate TDD’s defect reduction with a pilot, showing tangible results.\n"
+                yield "To address resistance to change, demonstrate TDD’s defect reduction with a pilot, showing tangible results.\n"
             if "lack_of_engagement" in challenges:
-                response += "To boost engagement, let developers see immediate test feedback, making work more rewarding.\n"
+                yield "To boost engagement, let developers see immediate test feedback, making work more rewarding.\n"
             if "Higher quality" in goals:
-                response += "Since quality is a goal, TDD will help ensure robust code with fewer bugs.\n"
+                yield "Since quality is a goal, TDD will help ensure robust code with fewer bugs.\n"
         
         elif "pair programming" in query_lower:
-            response = (
+            yield (
                 f"Pair Programming is an XP practice where two developers work together at one workstation to write code. "
                 f"For your {team_size} team in {industry}, here’s how to use it:\n"
                 "1. Pair developers with complementary skills (e.g., senior/junior).\n"
@@ -838,90 +842,127 @@ class AgileProjectConsultant:
                 "3. Rotate pairs weekly to spread knowledge and avoid fatigue.\n"
                 "4. Define roles: one writes code (driver), the other reviews and suggests (navigator).\n"
                 "5. Schedule 2-4 hour pairing sessions with breaks.\n"
+            )
+            yield (
                 f"Implementation tips for {team_size}:\n"
                 "- Use pairing for complex tasks to improve quality.\n"
                 "- Monitor team feedback to adjust pair frequency.\n"
                 "- Celebrate successful pair outcomes to build buy-in.\n"
             )
             if "lack_of_engagement" in challenges:
-                response += "To improve engagement, rotate pairs to foster collaboration and make work interactive.\n"
+                yield "To improve engagement, rotate pairs to foster collaboration and make work interactive.\n"
             if "resistance_to_change" in challenges:
-                response += "To reduce resistance, start pairing on small tasks and highlight improved code quality.\n"
+                yield "To reduce resistance, start pairing on small tasks and highlight improved code quality.\n"
             if "Team satisfaction" in goals:
-                response += "Since team satisfaction is a goal, pairing can build stronger team bonds and shared ownership.\n"
+                yield "Since team satisfaction is a goal, pairing can build stronger team bonds and shared ownership.\n"
         
+        # Flow metric queries, answered from the team's own work-item log when one was ingested
+        elif any(term in query_lower for term in ("cycle time", "lead time", "throughput", "flow metric")):
+            flow = self.project_context.get("flow_metrics") or {}
+            findings = flow_findings(flow)
+            if findings:
+                yield (
+                    f"From your work-item log ({flow['items_completed']} completed items):\n"
+                    + "\n".join([f"- {line}" for line in findings.values()]) + "\n"
+                )
+                if "cycle_time" in findings:
+                    yield (
+                        f"Use {flow['cycle_time_days']['p85']} days (your 85th percentile) as a service level expectation "
+                        "when stakeholders ask how long an item will take.\n"
+                    )
+                if "Faster delivery" in goals:
+                    yield "Since faster delivery is a goal, lower WIP limits and watch whether the 85th percentile Cycle Time drops.\n"
+            else:
+                for metric in ("cycle_time", "lead_time"):
+                    info = self.knowledge_base["metrics"].get(metric)
+                    if info:
+                        yield f"{metric.replace('_', ' ').title()}: {info['description']} {info['how_to_measure']}\n"
+                yield "Upload a work-item transition log from your tracker to get these numbers for your team.\n"
+
         # Challenge-related queries
         elif (challenge_key := find_challenge(query_lower)):
             challenge_info = self.knowledge_base["common_challenges"].get(challenge_key, {})
-            response = (
+            yield (
                 f"To address {challenge_key.replace('_', ' ')} for your {team_size} team in {industry}, try these strategies:\n"
                 + "\n".join([f"- {s}" for s in challenge_info.get("strategies", [])]) + "\n"
             )
             if methodology in self.knowledge_base["methodologies"]:
                 specific_key = f"{methodology}_specific"
                 if specific_key in challenge_info:
-                    response += f"In {methodology.upper()}, specifically:\n" + "\n".join([f"- {s}" for s in challenge_info[specific_key]]) + "\n"
+                    yield f"In {methodology.upper()}, specifically:\n" + "\n".join([f"- {s}" for s in challenge_info[specific_key]]) + "\n"
             if "Team satisfaction" in goals and challenge_key == "lack_of_engagement":
-                response += "Since team satisfaction is a goal, use retrospectives to act on engagement feedback.\n"
+                yield "Since team satisfaction is a goal, use retrospectives to act on engagement feedback.\n"
             if "Faster delivery" in goals and challenge_key == "meeting_deadlines":
-                response += "Since faster delivery is a goal, optimize flow with smaller tasks and frequent reviews.\n"
+                yield "Since faster delivery is a goal, optimize flow with smaller tasks and frequent reviews.\n"
         
         # Metric-related queries
         elif "defect rate" in query_lower:
             metric_info = self.knowledge_base["metrics"]["defect_rate"]
-            response = (
+            yield (
                 f"Defect Rate measures bugs found after release, critical for quality in XP. "
                 f"For your {team_size} team in {industry}:\n"
                 "1. Track bugs in a tool like Jira post-release.\n"
                 "2. Calculate as bugs per feature, sprint, or 1,000 lines of code.\n"
                 "3. Use TDD to catch defects early, reducing the rate.\n"
                 "4. Review weekly in retrospectives to identify trends.\n"
+            )
+            yield (
                 f"Implementation tips for {team_size}:\n"
                 + "\n".join([f"- {t}" for t in metric_info["implementation_tips"]]) + "\n"
             )
             if "Higher quality" in goals:
-                response += "Since quality is a goal, aim for a Defect Rate below 1 bug per feature.\n"
+                yield "Since quality is a goal, aim for a Defect Rate below 1 bug per feature.\n"
             if "quality_issues" in challenges:
-                response += "To address quality issues, combine TDD with automated testing to lower defects.\n"
+                yield "To address quality issues, combine TDD with automated testing to lower defects.\n"
+            measured = flow_findings(self.project_context.get("flow_metrics") or {})
+            if "defect_rate" in measured:
+                yield f"From your work-item log: {measured['defect_rate']}\n"
         
         elif "team happiness" in query_lower:
             metric_info = self.knowledge_base["metrics"]["team_happiness"]
-            response = (
+            yield (
                 f"Team Happiness measures satisfaction and engagement. For your {team_size} team in {industry}:\n"
                 "1. Conduct biweekly surveys with a 1-5 scale (e.g., via Google Forms).\n"
                 "2. Ask questions like 'Do you feel valued?' or 'Are you satisfied with our process?'\n"
                 "3. Discuss results in retrospectives to plan improvements.\n"
                 "4. Track trends over 2-3 months to assess impact.\n"
+            )
+            yield (
                 f"Implementation tips for {team_size}:\n"
                 + "\n".join([f"- {t}" for t in metric_info["implementation_tips"]]) + "\n"
             )
             if "lack_of_engagement" in challenges:
-                response += "To address low engagement, act on survey feedback with visible changes.\n"
+                yield "To address low engagement, act on survey feedback with visible changes.\n"
             if "Team satisfaction" in goals:
-                response += "Since team satisfaction is a goal, prioritize actions that boost morale, like celebrating wins.\n"
+                yield "Since team satisfaction is a goal, prioritize actions that boost morale, like celebrating wins.\n"
         
         # Methodology queries
         elif any(m in query_lower for m in self.knowledge_base["methodologies"]):
             for methodology_name, info in self.knowledge_base["methodologies"].items():
                 if methodology_name in query_lower:
-                    response = (
+                    yield (
                         f"{methodology_name.upper()} is {info['description']} It’s best for {', '.join(info['best_for'])}.\n"
-                        f"Key practices include: {', '.join(info['practices'] if 'practices' in info else info.get('ceremonies', info['principles']))}.\n"
+                        f"Key practices include: {', '.join(self._key_practices(info))}.\n"
+                    )
+                    yield (
                         f"Implementation tips for {team_size}:\n"
                         + "\n".join([f"- {t}" for t in info["implementation_tips"]]) + "\n"
                     )
                     if methodology_name == methodology:
-                        response += f"Since you’re using {methodology_name.upper()}, focus on these practices to address {', '.join(challenges[:2])}.\n"
+                        yield f"Since you’re using {methodology_name.upper()}, focus on these practices to address {', '.join(challenges[:2])}.\n"
                     break
             else:
-                response = f"Please specify a methodology like Scrum, Kanban, XP, or Lean for detailed advice."
+                yield f"Please specify a methodology like Scrum, Kanban, XP, or Lean for detailed advice."
         
         # General agile queries
         elif "agile" in query_lower or "methodology" in query_lower:
-            response = (
+            if methodology not in self.knowledge_base["methodologies"]:
+                # None/Traditional, Hybrid or Other: talk about the methodology we would recommend instead
+                methodology = self.get_methodology_recommendation()["name"].lower()
+            yield (
                 f"For your {team_size} team in {industry}, {methodology.upper()} is recommended based on your context. "
                 f"It addresses {', '.join(challenges[:2] if challenges else ['your needs'])} and supports {', '.join(goals[:2] if goals else ['your goals'])}.\n"
-                f"Key practices: {', '.join(self.knowledge_base['methodologies'][methodology]['practices'] if 'practices' in self.knowledge_base['methodologies'][methodology] else self.knowledge_base['methodologies'][methodology].get('ceremonies', self.knowledge_base['methodologies'][methodology]['principles']))}.\n"
+                f"Key practices: {', '.join(self._key_practices(self.knowledge_base['methodologies'][methodology]))}.\n"
                 f"Ask about specific practices or challenges for detailed guidance."
             )
         
@@ -929,28 +970,55 @@ class AgileProjectConsultant:
         else:
             # Suggest practices based on context
             suggested_practices = self.get_team_practices_recommendations()
-            response = (
+            yield (
                 f"Your question about '{query}' is noted, but I need more specificity to provide tailored advice for your {team_size} team in {industry}. "
                 f"Based on your context, consider these practices to address {', '.join(challenges[:2] if challenges else ['your needs'])}:\n"
                 + "\n".join([f"- {p['practice']}: {p['description']}" for p in suggested_practices[:2]]) + "\n"
                 f"Try asking about a specific practice (e.g., Kanban board), challenge (e.g., poor communication), or metric (e.g., Cycle Time) for detailed guidance."
             )
-        
-        self.conversation_history.append({"role": "agent", "content": response})
-        return response
 
     def save_conversation(self, file_path: str) -> None:
         """Save the conversation history to a file with error handling."""
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.conversation_history, f, indent=2, ensure_ascii=False)
-            self.conversation_history.append({"role": "agent", "content": f"Conversation saved to {file_path}."})
+                json.dump(self.conversation_history, f, indent=2, ensure_ascii=False, default=json_default)
+            self.conversation_history.append(Message("agent", f"Conversation saved to {file_path}."))
         except Exception as e:
-            self.conversation_history.append({"role": "agent", "content": f"Failed to save conversation: {str(e)}."})
+            self.conversation_history.append(Message("agent", f"Failed to save conversation: {str(e)}."))
             raise
     
-    def get_conversation_history(self) -> List[Dict]:
+    def archive_conversation(self, archive, session_key: Optional[str] = None, title: Optional[str] = None) -> int:
+        """Store the conversation, context and methodology recommendation in a ConversationArchive."""
+        recommendations = {}
+        if self.project_context:
+            recommendations["methodology"] = self.get_methodology_recommendation()
+        try:
+            archive_id = archive.archive_conversation(
+                self.conversation_history, self.project_context, recommendations,
+                session_key=session_key, title=title
+            )
+            self.conversation_history.append(Message("agent", f"Conversation archived as #{archive_id}."))
+            return archive_id
+        except Exception as e:
+            self.conversation_history.append(Message("agent", f"Failed to archive conversation: {str(e)}."))
+            raise
+
+    def get_history_page(self, before: Optional[int] = None, limit: int = 20) -> Dict:
+        """Return up to `limit` messages preceding the `before` cursor, newest page first by default.
+
+        Cursors are message positions, so they stay valid as new messages are appended.
+        """
+        total = len(self.conversation_history)
+        end = total if before is None else max(0, min(before, total))
+        start = max(0, end - limit)
+        return {
+            "messages": self.conversation_history[start:end],
+            "next_cursor": start if start > 0 else None,
+            "total": total
+        }
+
+    def get_conversation_history(self) -> List[Message]:
         """Return the full conversation history with context summary."""
         if not self.conversation_history:
-            return [{"role": "agent", "content": "No conversation history yet. Start by asking a question or running an assessment."}]
+            return [Message("agent", "No conversation history yet. Start by asking a question or running an assessment.")]
         return self.conversation_history
\ No newline at end of file
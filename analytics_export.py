@@ -0,0 +1,248 @@
+"""Bulk export of archived conversations into a columnar file for analytics.
+
+Usage: python analytics_export.py [--db conversations.db] [--out sessions.acol] [--format auto|parquet|acol]
+
+One row per archived session: its assessment answers, turn count and recommended methodology.
+Sessions are streamed from the archive in batches, so memory stays bounded by the batch size and
+the number of distinct answers, not by the number of sessions. Parquet is written when pyarrow is
+installed; otherwise (or with --format acol) the compact ACOL format below is used.
+
+ACOL layout (all integers little-endian):
+    magic b"ACOL\\x00\\x01", then frames of <u32 header length><JSON header><buffers>.
+    The first frame's header is the schema ({"columns": [{"name", "type"}]}, no buffers).
+    Each batch frame's header holds "rows", the "buffers" that follow as [column, buffer, bytes]
+    triples, and "dictionary_deltas": values appended to each dictionary column since the
+    previous batch. A zero header length ends the file.
+Column types and their buffers:
+    int64 / float64      values (i8 / f8)
+    string               validity (u8 per row), offsets (i8, rows + 1), data (UTF-8)
+    dictionary           codes (i4 into the column's dictionary, -1 = null)
+    list<dictionary>     offsets (i4, rows + 1), codes (i4)
+"""
+import argparse
+import json
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List
+
+from conversation_archive import ConversationArchive
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional: without pyarrow only the ACOL format is available
+    pyarrow = None
+
+ACOL_MAGIC = b"ACOL\x00\x01"
+SCALAR_QUESTIONS = ("team_size", "industry", "current_methodology", "experience_level", "project_complexity")
+MULTI_SELECT_QUESTIONS = ("challenges", "goals")
+EXPORT_COLUMNS = (
+    [("session_id", "int64"), ("created_at", "float64"), ("title", "string"), ("turn_count", "int64")]
+    + [(question_id, "dictionary") for question_id in SCALAR_QUESTIONS]
+    + [(question_id, "list<dictionary>") for question_id in MULTI_SELECT_QUESTIONS]
+    + [("recommended_methodology", "dictionary")]
+)
+
+
+def session_columns(sessions: List[Dict]) -> Dict[str, list]:
+    """Pivot one batch of archived sessions (see ConversationArchive.iter_session_batches) into column lists."""
+    columns = {
+        "session_id": [s["id"] for s in sessions],
+        "created_at": [s["created_at"] for s in sessions],
+        "title": [s["title"] for s in sessions],
+        "turn_count": [s["turn_count"] for s in sessions],
+        "recommended_methodology": [s["recommendations"].get("methodology") for s in sessions],
+    }
+    for question_id in SCALAR_QUESTIONS:
+        answers = [s["context"].get(question_id) for s in sessions]
+        columns[question_id] = [a if not isinstance(a, list) else ", ".join(a) for a in answers]
+    for question_id in MULTI_SELECT_QUESTIONS:
+        answers = [s["context"].get(question_id) for s in sessions]
+        columns[question_id] = [a if isinstance(a, list) else ([a] if a else []) for a in answers]
+    return columns
+
+
+def _le(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class AcolWriter:
+    """Streams column batches into an ACOL file, carrying dictionaries across batches as deltas."""
+
+    def __init__(self, f):
+        self._f = f
+        self._dictionaries = {name: {} for name, kind in EXPORT_COLUMNS if "dictionary" in kind}
+        f.write(ACOL_MAGIC)
+        self._frame({"columns": [{"name": name, "type": kind} for name, kind in EXPORT_COLUMNS]}, [])
+
+    def _frame(self, header: Dict, buffers: List[bytes]) -> None:
+        encoded = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+        self._f.write(struct.pack("<I", len(encoded)))
+        self._f.write(encoded)
+        for buffer in buffers:
+            self._f.write(buffer)
+
+    def _codes(self, name: str, values: Iterable, deltas: Dict[str, list]) -> array:
+        dictionary = self._dictionaries[name]
+        codes = array("i")
+        for value in values:
+            if value is None:
+                codes.append(-1)
+                continue
+            code = dictionary.get(value)
+            if code is None:
+                code = dictionary[value] = len(dictionary)
+                deltas.setdefault(name, []).append(value)
+            codes.append(code)
+        return codes
+
+    def write_batch(self, columns: Dict[str, list]) -> None:
+        rows = len(columns["session_id"])
+        buffers, layout, deltas = [], [], {}
+
+        def add(name, buffer_name, data):
+            buffers.append(data)
+            layout.append([name, buffer_name, len(data)])
+
+        for name, kind in EXPORT_COLUMNS:
+            values = columns[name]
+            if kind == "int64":
+                add(name, "values", _le(array("q", values)))
+            elif kind == "float64":
+                add(name, "values", _le(array("d", values)))
+            elif kind == "string":
+                validity, offsets, data = bytearray(), array("q", [0]), bytearray()
+                for value in values:
+                    validity.append(value is not None)
+                    data += (value or "").encode("utf-8")
+                    offsets.append(len(data))
+                add(name, "validity", bytes(validity))
+                add(name, "offsets", _le(offsets))
+                add(name, "data", bytes(data))
+            elif kind == "dictionary":
+                add(name, "codes", _le(self._codes(name, values, deltas)))
+            else:
+                offsets = array("i", [0])
+                for value in values:
+                    offsets.append(offsets[-1] + len(value))
+                add(name, "offsets", _le(offsets))
+                add(name, "codes", _le(self._codes(name, (v for value in values for v in value), deltas)))
+        self._frame({"rows": rows, "buffers": layout, "dictionary_deltas": deltas}, buffers)
+
+    def close(self) -> None:
+        self._f.write(struct.pack("<I", 0))
+
+
+def iter_acol_batches(path: str) -> Iterator[Dict[str, list]]:
+    """Read an ACOL file back, yielding one dict of column lists per stored batch."""
+    with open(path, 'rb') as f:
+        if f.read(len(ACOL_MAGIC)) != ACOL_MAGIC:
+            raise ValueError(f"{path} is not an ACOL file")
+
+        def read_header():
+            (length,) = struct.unpack("<I", f.read(4))
+            return json.loads(f.read(length)) if length else None
+
+        schema = read_header()["columns"]
+        dictionaries = {c["name"]: [] for c in schema if "dictionary" in c["type"]}
+        while True:
+            header = read_header()
+            if header is None:
+                return
+            for name, values in header["dictionary_deltas"].items():
+                dictionaries[name].extend(values)
+            raw = {}
+            for name, buffer_name, length in header["buffers"]:
+                raw[(name, buffer_name)] = f.read(length)
+            columns = {}
+            for column in schema:
+                name, kind = column["name"], column["type"]
+                if kind in ("int64", "float64"):
+                    columns[name] = _from_le("q" if kind == "int64" else "d", raw[(name, "values")]).tolist()
+                elif kind == "string":
+                    offsets = _from_le("q", raw[(name, "offsets")])
+                    data, validity = raw[(name, "data")], raw[(name, "validity")]
+                    columns[name] = [
+                        data[offsets[i]:offsets[i + 1]].decode("utf-8") if validity[i] else None
+                        for i in range(header["rows"])
+                    ]
+                elif kind == "dictionary":
+                    dictionary = dictionaries[name]
+                    columns[name] = [dictionary[c] if c >= 0 else None for c in _from_le("i", raw[(name, "codes")])]
+                else:
+                    dictionary = dictionaries[name]
+                    offsets = _from_le("i", raw[(name, "offsets")])
+                    values = [dictionary[c] for c in _from_le("i", raw[(name, "codes")])]
+                    columns[name] = [values[offsets[i]:offsets[i + 1]] for i in range(header["rows"])]
+            yield columns
+
+
+def _parquet_schema():
+    types = {"int64": pyarrow.int64(), "float64": pyarrow.float64(), "string": pyarrow.string(),
+             "dictionary": pyarrow.string(), "list<dictionary>": pyarrow.list_(pyarrow.string())}
+    return pyarrow.schema([(name, types[kind]) for name, kind in EXPORT_COLUMNS])
+
+
+def export_sessions(archive: ConversationArchive, out_path: str, file_format: str = "auto",
+                    batch_size: int = 10000) -> int:
+    """Stream every archived session into out_path; return the number of rows written.
+
+    `file_format` is "parquet" (needs pyarrow; string columns are dictionary-encoded by Parquet),
+    "acol", or "auto" for Parquet when pyarrow is installed and ACOL otherwise.
+    """
+    if file_format == "auto":
+        file_format = "parquet" if pyarrow is not None else "acol"
+    if file_format == "parquet" and pyarrow is None:
+        raise RuntimeError("Parquet export needs pyarrow; install it or use the acol format")
+    if file_format not in ("parquet", "acol"):
+        raise ValueError(f"Unknown export format: {file_format}")
+
+    rows = 0
+    batches = (session_columns(sessions) for sessions in archive.iter_session_batches(batch_size))
+    if file_format == "parquet":
+        schema = _parquet_schema()
+        with pyarrow.parquet.ParquetWriter(out_path, schema, use_dictionary=True, compression="zstd") as writer:
+            for columns in batches:
+                writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema))
+                rows += len(columns["session_id"])
+    else:
+        with open(out_path, 'wb') as f:
+            writer = AcolWriter(f)
+            for columns in batches:
+                writer.write_batch(columns)
+                rows += len(columns["session_id"])
+            writer.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='conversations.db', help='conversation archive to export')
+    parser.add_argument('--out', default='sessions.acol', help='output file')
+    parser.add_argument('--format', default='auto', choices=['auto', 'parquet', 'acol'])
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    archive = ConversationArchive(args.db)
+    started = time.perf_counter()
+    rows = export_sessions(archive, args.out, args.format, args.batch_size)
+    elapsed = time.perf_counter() - started
+    archive.close()
+    print(f"exported {rows} sessions to {args.out} in {elapsed:.2f} s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
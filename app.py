@@ -1,14 +1,174 @@
-from flask import Flask, request, jsonify, render_template, session
+from flask import Flask, Response, make_response, request, jsonify, render_template, session, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import RequestEntityTooLarge
+import atexit
+import datetime
 import os
+import functools
+import hmac
 import json
+import threading
+import time
 import logging  # Added for debug logging
-from agile_consultant import AgileProjectConsultant  # Import the updated agent class
+from agile_consultant import AgileProjectConsultant, flow_findings  # Import the updated agent class
+from sensitivity import analyze_sensitivity, describe_sensitivity
+from session_store import create_session_store
+from conversation_archive import ConversationArchive
+from cumulative_flow import FlowBoards
+from feedback_store import SCORED_QUESTIONS, FeedbackStore, parse_feedback
+from flow_metrics import FlowMetricsIngestor
+from forecasting import ForecastEngine, describe_forecast
+from records import Message, Record
+from portfolio import PortfolioAssessor, PortfolioSummary, parse_teams
+from memory_accounting import SessionMemoryTracker, TracemallocProfiler, approx_size
+from admission import AdmissionController
+from assessment_schema import MAX_ASSESSMENT_BYTES, AssessmentSchema
+from assessment_stats import AssessmentAggregator
+from knowledge_reloader import KnowledgeBaseReloader
+from knowledge_tenants import TenantKnowledgeBases, UnknownTenantError
+from singleflight import SingleFlight
+from team_topology import describe_topology, plan_squads
+from warmup import Readiness, warm_up_consultant
+from wip_simulator import SWEEP_TIMEOUT_SECONDS, WipSimulator, describe_simulation
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Process-pool workers (see worker_pool) re-import the script that started the server as __mp_main__.
+# They only run simulation and assessment batches, so background threads and exit hooks stay in the server.
+SERVER_PROCESS = __name__ != '__mp_main__'
+
+class RecordJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes the consultant's slotted records exactly like the dicts they replace."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Record):
+            return o.as_dict()
+        return DefaultJSONProvider.default(o)
+
 app = Flask(__name__)
-app.secret_key = os.urandom(24)  # Secure key for session management
+app.json = RecordJSONProvider(app)
+app.secret_key = os.environ.get('AGILE_SECRET_KEY') or os.urandom(24)  # Secure key for session management
+
+# Server-side session state; the cookie only carries the session id
+SESSION_DB_PATH = os.environ.get('AGILE_SESSION_DB', 'sessions.db')
+SESSION_TTL_SECONDS = float(os.environ.get('AGILE_SESSION_TTL', 86400))
+session_store = create_session_store(SESSION_DB_PATH or None, ttl=SESSION_TTL_SECONDS)
+
+# Queryable archive of saved conversations
+archive = ConversationArchive(os.environ.get('AGILE_ARCHIVE_DB', 'conversations.db'))
+
+# Teams' ratings of how their methodology worked out; fit_weights.py refits the scoring weights from them
+feedback_store = FeedbackStore(os.environ.get('AGILE_FEEDBACK_DB', 'feedback.db'))
+
+# Memory instrumentation; the admin endpoints are disabled unless AGILE_ADMIN_TOKEN is set
+ADMIN_TOKEN = os.environ.get('AGILE_ADMIN_TOKEN')
+memory_tracker = SessionMemoryTracker()
+profiler = TracemallocProfiler()
+
+# Admission control: bounded in-flight work per route class, short bounded queues, fast 503s beyond that
+admission = AdmissionController()
+admission.add_route_class(
+    'assessment',
+    max_in_flight=int(os.environ.get('AGILE_ASSESSMENT_MAX_IN_FLIGHT', 8)),
+    max_queue=int(os.environ.get('AGILE_ASSESSMENT_MAX_QUEUE', 32)),
+    queue_timeout=float(os.environ.get('AGILE_ASSESSMENT_QUEUE_TIMEOUT', 2.0))
+)
+admission.add_route_class(
+    'query',
+    max_in_flight=int(os.environ.get('AGILE_QUERY_MAX_IN_FLIGHT', 16)),
+    max_queue=int(os.environ.get('AGILE_QUERY_MAX_QUEUE', 64)),
+    queue_timeout=float(os.environ.get('AGILE_QUERY_QUEUE_TIMEOUT', 1.0))
+)
+admission.add_route_class(
+    'forecast',
+    max_in_flight=int(os.environ.get('AGILE_FORECAST_MAX_IN_FLIGHT', 4)),
+    max_queue=int(os.environ.get('AGILE_FORECAST_MAX_QUEUE', 16)),
+    queue_timeout=float(os.environ.get('AGILE_FORECAST_QUEUE_TIMEOUT', 2.0))
+)
+admission.add_route_class(
+    'ingest',
+    max_in_flight=int(os.environ.get('AGILE_INGEST_MAX_IN_FLIGHT', 2)),
+    max_queue=int(os.environ.get('AGILE_INGEST_MAX_QUEUE', 4)),
+    queue_timeout=float(os.environ.get('AGILE_INGEST_QUEUE_TIMEOUT', 5.0))
+)
+admission.add_route_class(
+    'simulation',
+    max_in_flight=int(os.environ.get('AGILE_SIMULATION_MAX_IN_FLIGHT', 2)),
+    max_queue=int(os.environ.get('AGILE_SIMULATION_MAX_QUEUE', 4)),
+    queue_timeout=float(os.environ.get('AGILE_SIMULATION_QUEUE_TIMEOUT', 5.0))
+)
+admission.add_route_class(
+    'portfolio',
+    max_in_flight=int(os.environ.get('AGILE_PORTFOLIO_MAX_IN_FLIGHT', 2)),
+    max_queue=int(os.environ.get('AGILE_PORTFOLIO_MAX_QUEUE', 4)),
+    queue_timeout=float(os.environ.get('AGILE_PORTFOLIO_QUEUE_TIMEOUT', 5.0))
+)
+
+# Identical concurrent assessments share one recommendation computation
+recommendation_flight = SingleFlight()
+
+# Monte Carlo delivery forecasts, cached per input dataset
+forecast_engine = ForecastEngine(cache_size=int(os.environ.get('AGILE_FORECAST_CACHE_SIZE', 256)))
+
+# Per-session cumulative flow diagrams, built from ingested logs and live transition events
+flow_boards = FlowBoards(max_boards=int(os.environ.get('AGILE_FLOW_BOARDS', 1000)))
+
+# Kanban WIP-limit sweeps, fanned out over a process pool (AGILE_SIMULATION_WORKERS, default one per CPU)
+wip_simulator = WipSimulator(
+    max_workers=int(os.environ.get('AGILE_SIMULATION_WORKERS', 0)) or None,
+    timeout=float(os.environ.get('AGILE_SIMULATION_TIMEOUT', SWEEP_TIMEOUT_SECONDS))
+)
+
+# Portfolio assessments of many teams at once, on a process pool (AGILE_PORTFOLIO_WORKERS, default one per CPU)
+portfolio_assessor = PortfolioAssessor(max_workers=int(os.environ.get('AGILE_PORTFOLIO_WORKERS', 0)) or None)
+
+# Org-wide running counts over submitted assessments, snapshotted to AGILE_STATS_PATH ('' keeps them in memory)
+assessment_stats = AssessmentAggregator(os.environ.get('AGILE_STATS_PATH', 'assessment_stats.json') or None)
+if SERVER_PROCESS:
+    atexit.register(wip_simulator.close)
+    atexit.register(portfolio_assessor.close)
+    assessment_stats.start(float(os.environ.get('AGILE_STATS_SNAPSHOT_SECONDS', 60)))
+    atexit.register(assessment_stats.save)
+
+def admitted(route_class_name):
+    """Decorator that sheds requests with 503 + Retry-After when the route class is saturated.
+
+    Streaming responses keep their slot until the stream is closed.
+    """
+    route_class = admission[route_class_name]
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not route_class.acquire():
+                retry_after = route_class.retry_after()
+                logging.warning(f"Shedding {request.path}: {route_class_name} is at capacity")
+                response = jsonify({
+                    'error': 'The service is busy. Please retry shortly.',
+                    'retry_after': retry_after
+                })
+                response.status_code = 503
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+            started = time.perf_counter()
+
+            def release():
+                route_class.release(time.perf_counter() - started)
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                release()
+                raise
+            if response.is_streamed:
+                response.call_on_close(release)
+            else:
+                release()
+            return response
+        return wrapper
+    return decorator
 
 # Initialize the consultant with error handling
 try:
@@ -18,23 +178,117 @@ except Exception as e:
     logging.error(f"Failed to initialize AgileProjectConsultant: {str(e)}")
     raise
 
+# Assessment submissions are validated against the question definitions before any processing
+assessment_schema = AssessmentSchema(consultant.collect_project_context())
+ASSESSMENT_MAX_BYTES = int(os.environ.get('AGILE_ASSESSMENT_MAX_BYTES', MAX_ASSESSMENT_BYTES))
+
+# Hot reload of the knowledge-base file; AGILE_KB_POLL_SECONDS=0 turns the watcher off
+knowledge_reloader = KnowledgeBaseReloader(consultant, poll_interval=float(os.environ.get('AGILE_KB_POLL_SECONDS', 2.0)))
+if SERVER_PROCESS and knowledge_reloader.poll_interval > 0:
+    knowledge_reloader.start()
+
+# Per-tenant knowledge bases, loaded on demand from AGILE_TENANT_DIR/<tenant>.json
+tenants = TenantKnowledgeBases(
+    os.environ.get('AGILE_TENANT_DIR', 'tenants'),
+    consultant,
+    max_tenants=int(os.environ.get('AGILE_TENANT_CACHE_SIZE', 64))
+)
+
+def current_session_id():
+    """Return the session id from the cookie, issuing a new one if needed."""
+    if 'session_id' not in session:
+        session['session_id'] = os.urandom(16).hex()
+    return session['session_id']
+
+def load_session():
+    """Load this session's project context from the store; its history is kept apart as turns."""
+    state = session_store.get(current_session_id()) or {}
+    return {'context': dict(state.get('context', {}))}
+
+def load_context():
+    """Load this session's project context from the store."""
+    return load_session()['context']
+
+def load_history(before=None, limit=None):
+    """Load up to `limit` of this session's turns preceding position `before`, and the history length."""
+    return session_store.turns(current_session_id(), before=before, limit=limit)
+
+def current_tenant():
+    """Return the tenant from the X-Tenant-ID header or the session, or None for the built-in knowledge base."""
+    return request.headers.get('X-Tenant-ID') or session.get('tenant')
+
+def tenant_consultant():
+    """Return the consultant answering from the current tenant's knowledge base."""
+    return tenants.consultant_for(current_tenant())
+
+def session_consultant():
+    """Return a consultant for this request: the tenant's knowledge base with this session's own context.
+
+    Each request works on its own view, so concurrent sessions never see each other's context or turns.
+    The view's history starts empty and collects only this request's turns; save_consultant() appends them.
+    """
+    return tenant_consultant().with_context(load_session()['context'])
+
+def save_session(context, turns, replace=False):
+    """Persist this session's project context and append its new turns (role/content dicts) to its history."""
+    session_id = current_session_id()
+    session_store.put(session_id, {'context': context})
+    session_store.append_turns(session_id, turns, replace=replace)
+    memory_tracker.set(session_id, 'context', approx_size(context))
+    if replace:
+        memory_tracker.set(session_id, 'history', approx_size(turns))
+    elif turns:
+        memory_tracker.add(session_id, 'history', approx_size(turns))
+
+def save_context(context):
+    """Persist this session's project context, keeping its history."""
+    save_session(context, [])
+
+def save_consultant(view, loaded=0, replace=False):
+    """Persist the context and new turns of a consultant returned by session_consultant().
+
+    `loaded` counts turns read back into the view from the store, which are not appended again.
+    """
+    turns = [msg.as_dict() for msg in view.conversation_history[loaded:]]
+    save_session(view.project_context, turns, replace=replace)
+
+@app.before_request
+def resolve_tenant():
+    """Load the requesting tenant's knowledge base up front so unknown tenants get a clean 404.
+
+    A tenant file that exists but fails to load is a server-side problem: it is logged and the
+    request gets a JSON 503 until the file is fixed.
+    """
+    starting = request.endpoint == 'start_conversation' and 'tenant' in request.args
+    tenant = request.args['tenant'] if starting else current_tenant()
+    if tenant and request.path.startswith('/api/'):
+        try:
+            tenants.get(tenant)
+        except UnknownTenantError as e:
+            logging.warning(str(e))
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            logging.error(f"Failed to load knowledge base for tenant {tenant}: {str(e)}")
+            return jsonify({'error': str(e)}), 503
+    if starting:
+        session['tenant'] = tenant or None
+
 @app.route('/')
 def index():
     """Render the main web interface with initial context."""
-    if 'session_id' not in session:
-        session['session_id'] = os.urandom(16).hex()
-        session['context'] = {}  # Store project context in session
+    current_session_id()
     return render_template('index.html')
 
 @app.route('/api/start', methods=['GET'])
 def start_conversation():
     """Start a new conversation with a tailored greeting."""
-    session_id = session.get('session_id', os.urandom(16).hex())
-    session['session_id'] = session_id
-    session['context'] = {}  # Reset context on new conversation
-    consultant.project_context = {}  # Sync consultant context
+    session_id = current_session_id()
+    context = {}
     try:
-        greeting = consultant.start_conversation()
+        # A new conversation starts from an empty context and history
+        view = tenant_consultant().with_context(context)
+        greeting = view.start_conversation()
+        save_consultant(view, replace=True)
         logging.info("Conversation started successfully")
     except Exception as e:
         logging.error(f"Failed to start conversation: {str(e)}")
@@ -43,24 +297,37 @@ def start_conversation():
         'session_id': session_id,
         'message': greeting,
         'next_step': 'assessment',
-        'context': session['context']
+        'context': context
     })
 
+# The questions never change at runtime, so their JSON body is rendered once (normally during warm-up)
+questions_body = None
+
+def render_questions_body():
+    """Render and cache the /api/questions response body; return None if there are no questions."""
+    global questions_body
+    if questions_body is None:
+        questions = consultant.collect_project_context()
+        logging.debug(f"Rendering {len(questions)} questions")
+        if not questions:
+            return None
+        questions_body = app.json.response({
+            'questions': questions,
+            'message': 'Please answer the following questions to receive tailored recommendations.'
+        }).get_data()
+    return questions_body
+
 @app.route('/api/questions', methods=['GET'])
 def get_questions():
     """Retrieve assessment questions, ensuring all are returned."""
     try:
-        questions = consultant.collect_project_context()
-        logging.debug(f"Retrieved {len(questions)} questions")
-        if not questions:
+        body = render_questions_body()
+        if body is None:
             logging.warning("No questions returned from collect_project_context")
             return jsonify({
                 'error': 'No questions available. Please try restarting the conversation.'
             }), 500
-        return jsonify({
-            'questions': questions,
-            'message': 'Please answer the following questions to receive tailored recommendations.'
-        })
+        return Response(body, mimetype='application/json')
     except Exception as e:
         logging.error(f"Failed to load questions: {str(e)}")
         return jsonify({
@@ -68,37 +335,42 @@ def get_questions():
         }), 500
 
 @app.route('/api/submit_assessment', methods=['POST'])
+@admitted('assessment')
 def submit_assessment():
     """Process assessment answers and return detailed recommendations."""
     try:
-        data = request.json
-        if not data or not isinstance(data, dict):
-            logging.warning("Invalid or empty assessment data")
+        # Refuse oversized bodies before parsing them; the cap also bounds chunked uploads
+        request.max_content_length = ASSESSMENT_MAX_BYTES
+        if request.content_length is not None and request.content_length > ASSESSMENT_MAX_BYTES:
+            logging.warning(f"Assessment body of {request.content_length} bytes refused")
+            return jsonify({
+                'error': f'Assessment data cannot exceed {ASSESSMENT_MAX_BYTES} bytes.'
+            }), 413
+        data = request.get_json(silent=True)
+        error = assessment_schema.validate(data)
+        if error:
+            logging.warning(f"Invalid assessment data: {error}")
             return jsonify({
-                'error': 'Invalid or empty assessment data provided.'
+                'error': error
             }), 400
 
-        # Validate and process answers
+        # Process the validated answers
+        view = session_consultant()
         for question_id, answer in data.items():
-            if answer is None or (isinstance(answer, list) and not answer):
-                logging.warning(f"Empty answer for {question_id}")
-                return jsonify({
-                    'error': f'Answer for {question_id} cannot be empty.'
-                }), 400
-            consultant.process_user_input(question_id, answer)
-            session['context'][question_id] = answer  # Store in session
-
-        # Sync consultant.project_context with session['context']
-        consultant.project_context = session['context'].copy()
-        logging.debug(f"Updated project_context: {consultant.project_context}")
+            view.process_user_input(question_id, answer)
+        context = view.project_context
+        logging.debug(f"Updated project_context: {context}")
 
         # Generate recommendations
-        recommendations = consultant.generate_full_recommendations()
+        recommendations = view.generate_full_recommendations(coalescer=recommendation_flight)
+        save_consultant(view)
+        memory_tracker.set(current_session_id(), 'recommendations', approx_size(recommendations))
+        assessment_stats.record(context, recommendations['methodology']['name'])
         
         # Format a detailed summary
         methodology = recommendations['methodology']['name']
-        team_size = session['context'].get('team_size', 'your team')
-        challenges = session['context'].get('challenges', [])
+        team_size = context.get('team_size', 'your team')
+        challenges = context.get('challenges', [])
         summary = (
             f"For {team_size}, I recommend {methodology} to address {', '.join(challenges[:2] if challenges else ['your needs'])}. "
             f"Focus on practices like {', '.join([p['practice'] for p in recommendations['team_practices'][:2]])} "
@@ -110,13 +382,42 @@ def submit_assessment():
             'message': summary,
             'next_step': 'Ask specific questions about practices or challenges for further guidance.'
         })
+    except RequestEntityTooLarge:
+        logging.warning("Assessment body over the size cap refused")
+        return jsonify({
+            'error': f'Assessment data cannot exceed {ASSESSMENT_MAX_BYTES} bytes.'
+        }), 413
     except Exception as e:
         logging.error(f"Failed to process assessment: {str(e)}")
         return jsonify({
             'error': f'Failed to process assessment: {str(e)}'
         }), 500
 
+EMPTY_QUERY_SUGGESTIONS = [
+    'How do I set up a Kanban board for my team?',
+    'How can I improve team engagement?',
+    'What metrics should I track for Kanban?'
+]
+QUERY_FOLLOW_UP_MESSAGE = 'Here’s my advice. Try these follow-up questions for more details.'
+
+def query_suggestions(context):
+    """Build context-aware follow-up suggestions for a query response."""
+    suggestions = []
+    if 'challenges' in context:
+        challenges = context['challenges']
+        if 'Resistance to change' in challenges:
+            suggestions.append('How can I reduce resistance to Kanban practices?')
+        if 'Lack of engagement' in challenges:
+            suggestions.append('How can I improve team engagement with daily standups?')
+    if context.get('current_methodology', '').lower() == 'kanban':
+        suggestions.extend([
+            'How do I set up a Kanban board?',
+            'What are best practices for WIP limits?'
+        ])
+    return suggestions
+
 @app.route('/api/query', methods=['POST'])
+@admitted('query')
 def process_query():
     """Handle free-text queries with context-specific responses."""
     try:
@@ -127,34 +428,19 @@ def process_query():
             logging.warning("Empty query received")
             return jsonify({
                 'error': 'Query cannot be empty.',
-                'suggestions': [
-                    'How do I set up a Kanban board for my team?',
-                    'How can I improve team engagement?',
-                    'What metrics should I track for Kanban?'
-                ]
+                'suggestions': EMPTY_QUERY_SUGGESTIONS
             }), 400
         
-        response = consultant.process_free_text_query(query)
+        view = session_consultant()
+        context = view.project_context
+        response = view.process_free_text_query(query)
+        save_consultant(view)
         logging.debug(f"Processed query: {query}")
         
-        # Add context-aware suggestions
-        suggestions = []
-        if 'challenges' in session['context']:
-            challenges = session['context']['challenges']
-            if 'Resistance to change' in challenges:
-                suggestions.append('How can I reduce resistance to Kanban practices?')
-            if 'Lack of engagement' in challenges:
-                suggestions.append('How can I improve team engagement with daily standups?')
-        if session['context'].get('current_methodology', '').lower() == 'kanban':
-            suggestions.extend([
-                'How do I set up a Kanban board?',
-                'What are best practices for WIP limits?'
-            ])
-        
         return jsonify({
             'response': response,
-            'suggestions': suggestions,
-            'message': 'Here’s my advice. Try these follow-up questions for more details.'
+            'suggestions': query_suggestions(context),
+            'message': QUERY_FOLLOW_UP_MESSAGE
         })
     except Exception as e:
         logging.error(f"Failed to process query: {str(e)}")
@@ -162,24 +448,125 @@ def process_query():
             'error': f'Failed to process query: {str(e)}'
         }), 500
 
+def sse_event(event, data):
+    """Encode one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/api/query/stream', methods=['POST'])
+@admitted('query')
+def stream_query():
+    """Stream the response to a free-text query as Server-Sent Events, one event per section."""
+    try:
+        data = request.json
+        query = data.get('query', '').strip()
+        if not query:
+            logging.warning("Empty query received")
+            return jsonify({
+                'error': 'Query cannot be empty.',
+                'suggestions': EMPTY_QUERY_SUGGESTIONS
+            }), 400
+        responder = session_consultant()
+        suggestions = query_suggestions(responder.project_context)
+    except Exception as e:
+        logging.error(f"Failed to process query: {str(e)}")
+        return jsonify({
+            'error': f'Failed to process query: {str(e)}'
+        }), 500
+
+    def generate():
+        try:
+            sections = responder.stream_free_text_query(query)
+            try:
+                for section in sections:
+                    yield sse_event('section', {'text': section})
+            finally:
+                sections.close()  # Records what was sent in history, even if the client went away
+                save_consultant(responder)
+            logging.debug(f"Streamed query: {query}")
+            yield sse_event('done', {'suggestions': suggestions, 'message': QUERY_FOLLOW_UP_MESSAGE})
+        except Exception as e:
+            logging.error(f"Failed to stream query: {str(e)}")
+            yield sse_event('error', {'error': f'Failed to process query: {str(e)}'})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/portfolio', methods=['POST'])
+@admitted('portfolio')
+def assess_portfolio():
+    """Assess many teams in parallel, streaming each team's recommendations and then the portfolio summary as SSE."""
+    try:
+        try:
+            teams = parse_teams(request.json, assessment_schema)
+        except ValueError as e:
+            logging.warning(f"Invalid portfolio request: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+        snapshot = tenant_consultant().snapshot
+    except Exception as e:
+        logging.error(f"Failed to assess portfolio: {str(e)}")
+        return jsonify({
+            'error': f'Failed to assess portfolio: {str(e)}'
+        }), 500
+
+    def generate():
+        summary = PortfolioSummary()
+        try:
+            for result in portfolio_assessor.assess(snapshot, teams):
+                summary.add(result)
+                yield sse_event('error' if 'error' in result else 'team', result)
+            logging.debug(f"Assessed a portfolio of {len(teams)} teams")
+            yield sse_event('summary', summary.report())
+        except Exception as e:
+            logging.error(f"Failed to assess portfolio: {str(e)}")
+            yield sse_event('error', {'error': f'Failed to assess portfolio: {str(e)}'})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 200
+
 @app.route('/api/history', methods=['GET'])
 def get_history():
-    """Return conversation history with formatted summary."""
+    """Return one page of this session's conversation history, newest first, with a cursor for older messages."""
     try:
-        history = consultant.get_conversation_history()
+        try:
+            limit = int(request.args.get('limit', HISTORY_PAGE_SIZE))
+            before = request.args.get('before')
+            before = int(before) if before is not None else None
+        except ValueError:
+            return jsonify({
+                'error': "'limit' and 'before' must be integers."
+            }), 400
+        if not 1 <= limit <= HISTORY_MAX_PAGE_SIZE or (before is not None and before < 0):
+            return jsonify({
+                'error': f"'limit' must be between 1 and {HISTORY_MAX_PAGE_SIZE} and 'before' cannot be negative."
+            }), 400
+
+        # Pages are seeks on this session's own turns, so cursors only move when this session adds turns
+        view = session_consultant()
+        context = view.project_context
+        messages, total = load_history(before=before, limit=limit)
+        start = (total if before is None else min(before, total)) - len(messages)
+        page = {'next_cursor': start if start > 0 else None, 'total': total}
+        if not total:
+            messages = view.get_conversation_history()
         context_summary = (
-            f"Team: {session['context'].get('team_size', 'unknown')}\n"
-            f"Methodology: {session['context'].get('current_methodology', 'unknown')}\n"
-            f"Challenges: {', '.join(session['context'].get('challenges', ['none']))}\n"
-            f"Goals: {', '.join(session['context'].get('goals', ['none']))}"
+            f"Team: {context.get('team_size', 'unknown')}\n"
+            f"Methodology: {context.get('current_methodology', 'unknown')}\n"
+            f"Challenges: {', '.join(context.get('challenges', ['none']))}\n"
+            f"Goals: {', '.join(context.get('goals', ['none']))}"
         )
+        # Only the requested page is formatted
         formatted_history = [
             {'role': msg['role'], 'content': msg['content'].replace('\n', '; ')}
-            for msg in history
+            for msg in messages
         ]
-        logging.debug(f"Retrieved history with {len(formatted_history)} messages")
+        logging.debug(f"Retrieved history page with {len(formatted_history)} of {page['total']} messages")
         return jsonify({
             'history': formatted_history,
+            'next_cursor': page['next_cursor'],
+            'total': page['total'],
             'context': context_summary,
             'message': 'Conversation history retrieved. Ask a question or review your assessment.'
         })
@@ -191,26 +578,30 @@ def get_history():
 
 @app.route('/api/save_conversation', methods=['POST'])
 def save_conversation():
-    """Save conversation to a file with validation."""
+    """Archive the conversation, its context and recommendation in the conversation archive."""
     try:
-        data = request.json
-        file_path = data.get('file_path', 'conversation.json').strip()
-        
-        if not file_path.endswith('.json'):
-            file_path += '.json'
-        if not file_path:
-            logging.warning("Empty file path provided")
+        data = request.json or {}
+        title = str(data.get('title', data.get('file_path', 'Agile consultation'))).strip()
+        if not title:
+            logging.warning("Empty title provided")
             return jsonify({
-                'error': 'File path cannot be empty.'
+                'error': 'Title cannot be empty.'
             }), 400
-        
-        consultant.save_conversation(file_path)
-        logging.info(f"Conversation saved to {file_path}")
-        
+
+        # The archive keeps the whole conversation, so this is the one route that reads every turn back
+        view = session_consultant()
+        history, loaded = load_history()
+        view.conversation_history = [Message(msg['role'], msg['content']) for msg in history]
+        try:
+            archive_id = view.archive_conversation(archive, session_key=current_session_id(), title=title[:200])
+        finally:
+            save_consultant(view, loaded=loaded)  # The archive outcome is part of the conversation either way
+        logging.info(f"Conversation archived as #{archive_id}")
+
         return jsonify({
             'success': True,
-            'message': f'Conversation successfully saved to {file_path}.',
-            'file_path': file_path
+            'message': f'Conversation successfully saved as #{archive_id} ({title[:200]}).',
+            'archive_id': archive_id
         })
     except Exception as e:
         logging.error(f"Failed to save conversation: {str(e)}")
@@ -218,14 +609,352 @@ def save_conversation():
             'error': f'Failed to save conversation: {str(e)}'
         }), 500
 
+@app.route('/api/archive/search', methods=['GET'])
+def search_archive():
+    """Find archived conversations by an assessment answer or a recommended methodology."""
+    try:
+        limit = min(int(request.args.get('limit', 100)), 1000)
+        after_id = int(request.args.get('after', 0))
+        question_id = request.args.get('question_id')
+        value = request.args.get('value')
+        methodology = request.args.get('methodology')
+        if question_id and value:
+            results = archive.find_sessions(question_id, value, limit=limit, after_id=after_id)
+        elif methodology:
+            results = archive.sessions_by_recommendation(methodology.upper(), limit=limit, after_id=after_id)
+        else:
+            return jsonify({
+                'error': "Provide 'question_id' and 'value', or 'methodology'."
+            }), 400
+        return jsonify({
+            'results': results,
+            'next_cursor': results[-1]['id'] if len(results) == limit else None
+        })
+    except ValueError:
+        return jsonify({
+            'error': "'limit' and 'after' must be integers."
+        }), 400
+    except Exception as e:
+        logging.error(f"Failed to search archive: {str(e)}")
+        return jsonify({
+            'error': f'Failed to search archive: {str(e)}'
+        }), 500
+
+@app.route('/api/sensitivity', methods=['POST'])
+@admitted('query')
+def recommendation_sensitivity():
+    """Report which single-answer changes to the assessment would change the recommended methodology."""
+    try:
+        data = request.get_json(silent=True) or {}
+        context = data.get('context') if isinstance(data, dict) else None
+        if context is None:
+            context = load_context()
+        elif not isinstance(context, dict):
+            return jsonify({
+                'error': "'context' must be an object of assessment answers."
+            }), 400
+        elif context:
+            error = assessment_schema.validate(context)
+            if error:
+                logging.warning(f"Invalid sensitivity context: {error}")
+                return jsonify({
+                    'error': error
+                }), 400
+        result = analyze_sensitivity(tenant_consultant(), context)
+        return jsonify({
+            'sensitivity': result,
+            'message': describe_sensitivity(result)
+        })
+    except Exception as e:
+        logging.error(f"Failed to analyze sensitivity: {str(e)}")
+        return jsonify({
+            'error': f'Failed to analyze sensitivity: {str(e)}'
+        }), 500
+
+@app.route('/api/feedback', methods=['POST'])
+@admitted('assessment')
+def submit_feedback():
+    """Record a team's 1-5 rating of how the methodology it followed worked out after a few sprints."""
+    try:
+        try:
+            rating, methodology, sprints, context = parse_feedback(request.get_json(silent=True))
+        except ValueError as e:
+            logging.warning(f"Invalid feedback: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+        if context is not None:
+            error = assessment_schema.validate(context)
+            if error:
+                logging.warning(f"Invalid feedback context: {error}")
+                return jsonify({
+                    'error': error
+                }), 400
+        else:
+            # The stored answers were validated on submission; other keys (e.g. flow_metrics) are not answers
+            context = {key: value for key, value in load_context().items() if key in assessment_schema.checks}
+        if not context:
+            return jsonify({
+                'error': "Complete the assessment (or send its answers as 'context') before rating the recommendation."
+            }), 400
+
+        # The recommendation being rated is what the live weights recommend for these answers
+        advisor = tenant_consultant().with_context(dict(context))
+        scores = advisor.score_methodologies()
+        recommended = max(scores, key=scores.get)
+        methodology = (methodology or recommended).lower()
+        if methodology not in scores:
+            return jsonify({
+                'error': f"'methodology' must be one of {', '.join(m.upper() for m in scores)}."
+            }), 400
+        answers = {key: context[key] for key in SCORED_QUESTIONS if key in context}
+        feedback_id = feedback_store.add(
+            answers, recommended, methodology, rating, sprints,
+            session_key=current_session_id(), weights_version=advisor.scoring_weights.version
+        )
+        return jsonify({
+            'feedback_id': feedback_id,
+            'methodology': methodology.upper(),
+            'recommended': recommended.upper(),
+            'rating': rating,
+            'weights_version': advisor.scoring_weights.version,
+            'message': 'Thanks! Your rating will count the next time the recommendation weights are refitted.'
+        })
+    except Exception as e:
+        logging.error(f"Failed to record feedback: {str(e)}")
+        return jsonify({
+            'error': f'Failed to record feedback: {str(e)}'
+        }), 500
+
+@app.route('/api/forecast', methods=['POST'])
+@admitted('forecast')
+def forecast():
+    """Forecast delivery at P50/P85/P95 from historical velocities or cycle times."""
+    try:
+        data = request.json
+        if not data or not isinstance(data, dict):
+            return jsonify({
+                'error': 'Invalid or empty forecast request provided.'
+            }), 400
+        try:
+            result = forecast_engine.forecast(data)
+        except ValueError as e:
+            logging.warning(f"Invalid forecast request: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+        return jsonify({
+            'forecast': result,
+            'message': describe_forecast(result)
+        })
+    except Exception as e:
+        logging.error(f"Failed to forecast: {str(e)}")
+        return jsonify({
+            'error': f'Failed to forecast: {str(e)}'
+        }), 500
+
+def state_list(name):
+    """Read a comma-separated list of workflow states or item types from the query string, if given."""
+    value = request.args.get(name)
+    return [part for part in value.split(',') if part.strip()] if value else None
+
+@app.route('/api/flow/ingest', methods=['POST'])
+@admitted('ingest')
+def ingest_flow_log():
+    """Stream a work-item transition log (CSV or JSONL) and attach the resulting flow metrics to the session."""
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            stream, name = upload.stream, upload.filename or ''
+        else:
+            stream, name = request.stream, ''
+        file_format = request.args.get('format')
+        if not file_format:
+            jsonl = name.endswith(('.jsonl', '.ndjson')) or request.mimetype in ('application/x-ndjson', 'application/jsonl')
+            file_format = 'jsonl' if jsonl else 'csv'
+        options = {}
+        for option in ('started_states', 'done_states', 'defect_types'):
+            if state_list(option):
+                options[option] = state_list(option)
+        # A full log replaces the session's cumulative flow board
+        board = flow_boards.reset(current_session_id(), states=state_list('states'))
+        ingestor = FlowMetricsIngestor(cumulative_flow=board, **options)
+        try:
+            ingestor.ingest_file(stream, file_format)
+        except (ValueError, UnicodeDecodeError) as e:
+            logging.warning(f"Invalid work-item log: {str(e)}")
+            return jsonify({'error': f'Invalid work-item log: {str(e)}'}), 400
+        summary = ingestor.summary()
+        logging.debug(f"Ingested {summary['rows']} work-item events")
+
+        context = load_context()
+        context['flow_metrics'] = summary
+        save_context(context)
+        findings = flow_findings(summary)
+        return jsonify({
+            'flow_metrics': summary,
+            'message': ' '.join(findings.values()) if findings else 'No completed work items were found in the log.'
+        })
+    except Exception as e:
+        logging.error(f"Failed to ingest work-item log: {str(e)}")
+        return jsonify({
+            'error': f'Failed to ingest work-item log: {str(e)}'
+        }), 500
+
+@app.route('/api/flow/events', methods=['POST'])
+@admitted('ingest')
+def add_flow_events():
+    """Append live transition events to the session's cumulative flow board."""
+    try:
+        data = request.json
+        events = data.get('events') if isinstance(data, dict) else None
+        if not isinstance(events, list) or not all(isinstance(event, dict) for event in events):
+            return jsonify({
+                'error': "Provide 'events' as a list of objects with an item, state and timestamp."
+            }), 400
+        states = data.get('states')
+        if states is not None and (not isinstance(states, list) or not all(isinstance(s, str) for s in states)):
+            return jsonify({'error': "'states' must be a list of workflow state names."}), 400
+        board = flow_boards.get(current_session_id(), states=states)
+        try:
+            recorded = board.add_rows(events)
+        except ValueError as e:
+            logging.warning(f"Invalid transition events: {str(e)}")
+            return jsonify({'error': f'Invalid transition events: {str(e)}'}), 400
+        return jsonify({
+            'recorded': recorded,
+            'skipped': len(events) - recorded,
+            'events': board.events,
+            'states': board.states
+        })
+    except Exception as e:
+        logging.error(f"Failed to record transition events: {str(e)}")
+        return jsonify({
+            'error': f'Failed to record transition events: {str(e)}'
+        }), 500
+
+@app.route('/api/flow/simulate', methods=['POST'])
+@admitted('simulation')
+def simulate_wip_limits():
+    """Simulate candidate WIP limits for a board and rank them by throughput and cycle time."""
+    try:
+        data = request.json
+        if not data or not isinstance(data, dict):
+            return jsonify({
+                'error': 'Invalid or empty simulation request provided.'
+            }), 400
+        board = flow_boards.get(current_session_id(), create=False)
+        try:
+            result = wip_simulator.simulate(data, dwell_times=board.dwell_times if board is not None else None)
+        except ValueError as e:
+            logging.warning(f"Invalid simulation request: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+        logging.debug(f"Simulated {result['configurations']} WIP configurations")
+        return jsonify({
+            'simulation': result,
+            'message': describe_simulation(result)
+        })
+    except Exception as e:
+        logging.error(f"Failed to simulate WIP limits: {str(e)}")
+        return jsonify({
+            'error': f'Failed to simulate WIP limits: {str(e)}'
+        }), 500
+
+@app.route('/api/topology/squads', methods=['POST'])
+@admitted('simulation')
+def split_into_squads():
+    """Split a large organization's people and collaboration graph into squads, each with a methodology."""
+    try:
+        data = request.json
+        if not data or not isinstance(data, dict):
+            return jsonify({
+                'error': 'Invalid or empty team topology request provided.'
+            }), 400
+        try:
+            result = plan_squads(data, tenant_consultant(), org_context=load_context(), schema=assessment_schema)
+        except ValueError as e:
+            logging.warning(f"Invalid team topology request: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+        logging.debug(f"Split {result['people']} people into {len(result['squads'])} squads")
+        return jsonify({
+            'topology': result,
+            'message': describe_topology(result)
+        })
+    except Exception as e:
+        logging.error(f"Failed to plan squads: {str(e)}")
+        return jsonify({
+            'error': f'Failed to plan squads: {str(e)}'
+        }), 500
+
+def query_date(name):
+    """Read an optional YYYY-MM-DD date from the query string."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a date in YYYY-MM-DD format.") from None
+
+@app.route('/api/flow/cfd', methods=['GET'])
+def cumulative_flow_diagram():
+    """Return the session's cumulative flow diagram between optional start and end dates."""
+    try:
+        board = flow_boards.get(current_session_id(), create=False)
+        if board is None:
+            return jsonify({'error': 'No work-item events have been ingested for this session.'}), 404
+        try:
+            return jsonify(board.query(query_date('start'), query_date('end')))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Failed to build cumulative flow diagram: {str(e)}")
+        return jsonify({
+            'error': f'Failed to build cumulative flow diagram: {str(e)}'
+        }), 500
+
+@app.route('/api/flow/wip_breaches', methods=['GET'])
+def wip_breaches():
+    """Report the days each state exceeded its WIP limit, given as ?limits=State:3,Other State:5."""
+    try:
+        board = flow_boards.get(current_session_id(), create=False)
+        if board is None:
+            return jsonify({'error': 'No work-item events have been ingested for this session.'}), 404
+        try:
+            limits = {}
+            for part in state_list('limits') or []:
+                state, _, limit = part.rpartition(':')
+                if not state.strip() or not limit.strip().isdigit():
+                    raise ValueError(f"Invalid WIP limit '{part}'; use State:limit.")
+                limits[state.strip()] = int(limit)
+            if not limits:
+                raise ValueError("Provide WIP limits as ?limits=State:limit,Other State:limit.")
+            breaches = board.wip_breaches(limits, query_date('start'), query_date('end'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'limits': limits, 'breaches': breaches})
+    except Exception as e:
+        logging.error(f"Failed to check WIP limits: {str(e)}")
+        return jsonify({
+            'error': f'Failed to check WIP limits: {str(e)}'
+        }), 500
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Return org-wide assessment statistics from the running aggregator."""
+    try:
+        return jsonify(assessment_stats.report())
+    except Exception as e:
+        logging.error(f"Failed to load stats: {str(e)}")
+        return jsonify({
+            'error': f'Failed to load stats: {str(e)}'
+        }), 500
+
 @app.route('/api/context', methods=['GET'])
 def get_context():
-    """Debug route to inspect session and consultant context."""
+    """Debug route to inspect this session's stored context."""
     try:
         logging.debug("Fetching context for debugging")
+        _, history_messages = load_history(limit=0)
         return jsonify({
-            'session_context': session.get('context', {}),
-            'consultant_context': consultant.project_context
+            'session_context': load_context(),
+            'history_messages': history_messages
         })
     except Exception as e:
         logging.error(f"Failed to fetch context: {str(e)}")
@@ -233,376 +962,174 @@ def get_context():
             'error': f'Failed to fetch context: {str(e)}'
         }), 500
 
-if __name__ == '__main__':
-    # Create templates directory and write index.html
-    templates_dir = 'templates'
+def admin_authorized():
+    """Check the X-Admin-Token header against AGILE_ADMIN_TOKEN; admin routes are off when it is unset."""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+@app.route('/admin/memory', methods=['GET'])
+def memory_report():
+    """Admin: approximate bytes held per session, by category."""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden.'}), 403
     try:
-        if not os.path.exists(templates_dir):
-            os.makedirs(templates_dir)
-        
-        index_path = os.path.join(templates_dir, 'index.html')
-        with open(index_path, 'w', encoding='utf-8') as f:
-            f.write(r'''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <title>Agile Project Consultant</title>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body { background-color: #f8f9fa; }
-        .chat-container {
-            height: 500px;
-            overflow-y: auto;
-            border: 1px solid #dee2e6;
-            padding: 15px;
-            margin-bottom: 20px;
-            border-radius: 8px;
-            background-color: #fff;
-        }
-        .agent-message {
-            background-color: #e9f5ff;
-            border-radius: 10px;
-            padding: 12px;
-            margin-bottom: 10px;
-            max-width: 85%;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        }
-        .user-message {
-            background-color: #d4edda;
-            border-radius: 10px;
-            padding: 12px;
-            margin-bottom: 10px;
-            max-width: 85%;
-            margin-left: auto;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        }
-        .assessment-container {
-            margin-top: 20px;
-            border: 1px solid #dee2e6;
-            padding: 20px;
-            border-radius: 8px;
-            background-color: #fff;
-        }
-        .suggestions {
-            margin-top: 10px;
-            font-style: italic;
-            color: #6c757d;
-        }
-        .recommendation-box {
-            background-color: #f1f3f5;
-            padding: 15px;
-            border-radius: 8px;
-            margin-bottom: 15px;
-        }
-    </style>
-</head>
-<body>
-    <div class="container mt-5">
-        <h1 class="text-center mb-4">Agile Project Consultant</h1>
-        <div class="row justify-content-center">
-            <div class="col-md-10">
-                <div class="chat-container" id="chatContainer"></div>
-                <div class="input-group mb-4">
-                    <input type="text" id="userInput" class="form-control" placeholder="Ask about Kanban practices, challenges, or metrics...">
-                    <button class="btn btn-primary" id="sendBtn">Send</button>
-                </div>
-                <div id="assessmentContainer" class="assessment-container d-none">
-                    <h3>Project Assessment</h3>
-                    <p>Answer these questions to receive tailored agile recommendations.</p>
-                    <div id="questionsContainer"></div>
-                    <button class="btn btn-success mt-3" id="submitAssessmentBtn">Submit Assessment</button>
-                </div>
-                <div class="d-flex justify-content-between mt-4">
-                    <button class="btn btn-secondary" id="startAssessmentBtn">Start Assessment</button>
-                    <button class="btn btn-info" id="saveConversationBtn">Save Conversation</button>
-                    <button class="btn btn-outline-secondary" id="viewHistoryBtn">View History</button>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        // Global variables
-        let sessionId = null;
-        let questionsData = null;
-        let assessmentAnswers = {};
-
-        // DOM elements
-        const chatContainer = document.getElementById('chatContainer');
-        const userInput = document.getElementById('userInput');
-        const sendBtn = document.getElementById('sendBtn');
-        const assessmentContainer = document.getElementById('assessmentContainer');
-        const questionsContainer = document.getElementById('questionsContainer');
-        const submitAssessmentBtn = document.getElementById('submitAssessmentBtn');
-        const startAssessmentBtn = document.getElementById('startAssessmentBtn');
-        const saveConversationBtn = document.getElementById('saveConversationBtn');
-        const viewHistoryBtn = document.getElementById('viewHistoryBtn');
-
-        // Initialize conversation
-        window.addEventListener('load', startConversation);
-
-        // Start a new conversation
-        function startConversation() {
-            fetch('/api/start')
-                .then(response => response.json())
-                .then(data => {
-                    sessionId = data.session_id;
-                    addMessage('agent', data.message);
-                })
-                .catch(error => {
-                    console.error('Error starting conversation:', error);
-                    addMessage('agent', 'Failed to start conversation. Please refresh the page.');
-                });
-        }
-
-        // Add a message to the chat container
-        function addMessage(role, content, suggestions = []) {
-            const messageDiv = document.createElement('div');
-            messageDiv.className = role === 'user' ? 'user-message' : 'agent-message';
-            messageDiv.innerHTML = content.replace(/\n/g, '<br>');
-            chatContainer.appendChild(messageDiv);
-            if (suggestions.length) {
-                const suggDiv = document.createElement('div');
-                suggDiv.className = 'suggestions';
-                suggDiv.textContent = 'Suggestions: ' + suggestions.join(' | ');
-                messageDiv.appendChild(suggDiv);
-            }
-            chatContainer.scrollTop = chatContainer.scrollHeight;
-        }
-
-        // Load assessment questions
-        function loadQuestions() {
-            fetch('/api/questions')
-                .then(response => response.json())
-                .then(data => {
-                    if (data.error) {
-                        addMessage('agent', data.error);
-                        return;
-                    }
-                    questionsData = data.questions;
-                    addMessage('agent', data.message);
-                    renderQuestions();
-                    assessmentContainer.classList.remove('d-none');
-                })
-                .catch(error => {
-                    console.error('Error loading questions:', error);
-                    addMessage('agent', 'Failed to load questions. Please try again.');
-                });
-        }
-
-        // Render questions
-        function renderQuestions() {
-            questionsContainer.innerHTML = '';
-            questionsData.forEach(question => {
-                const questionDiv = document.createElement('div');
-                questionDiv.className = 'mb-4';
-                
-                const label = document.createElement('label');
-                label.className = 'form-label fw-bold';
-                label.textContent = question.question;
-                questionDiv.appendChild(label);
-                
-                if (question.type === 'text') {
-                    const input = document.createElement('input');
-                    input.type = 'text';
-                    input.className = 'form-control';
-                    input.id = question.id;
-                    input.required = true;
-                    input.addEventListener('input', (e) => {
-                        assessmentAnswers[question.id] = e.target.value.trim();
-                    });
-                    questionDiv.appendChild(input);
-                } else if (question.type === 'select') {
-                    const select = document.createElement('select');
-                    select.className = 'form-select';
-                    select.id = question.id;
-                    select.required = true;
-                    const defaultOption = document.createElement('option');
-                    defaultOption.value = '';
-                    defaultOption.textContent = 'Select an option';
-                    defaultOption.disabled = true;
-                    defaultOption.selected = true;
-                    select.appendChild(defaultOption);
-                    question.options.forEach(option => {
-                        const optionEl = document.createElement('option');
-                        optionEl.value = option;
-                        optionEl.textContent = option;
-                        select.appendChild(optionEl);
-                    });
-                    select.addEventListener('change', (e) => {
-                        assessmentAnswers[question.id] = e.target.value;
-                    });
-                    questionDiv.appendChild(select);
-                } else if (question.type === 'multi-select') {
-                    const checkContainer = document.createElement('div');
-                    checkContainer.className = 'mt-2';
-                    question.options.forEach(option => {
-                        const checkDiv = document.createElement('div');
-                        checkDiv.className = 'form-check';
-                        const checkbox = document.createElement('input');
-                        checkbox.type = 'checkbox';
-                        checkbox.className = 'form-check-input';
-                        checkbox.id = `${question.id}_${option.replace(/\s/g, '_')}`;
-                        checkbox.value = option;
-                        checkbox.addEventListener('change', (e) => {
-                            assessmentAnswers[question.id] = assessmentAnswers[question.id] || [];
-                            if (e.target.checked) {
-                                assessmentAnswers[question.id].push(option);
-                            } else {
-                                assessmentAnswers[question.id] = assessmentAnswers[question.id].filter(item => item !== option);
-                            }
-                        });
-                        const checkLabel = document.createElement('label');
-                        checkLabel.className = 'form-check-label';
-                        checkLabel.htmlFor = checkbox.id;
-                        checkLabel.textContent = option;
-                        checkDiv.appendChild(checkbox);
-                        checkDiv.appendChild(checkLabel);
-                        checkContainer.appendChild(checkDiv);
-                    });
-                    questionDiv.appendChild(checkContainer);
-                }
-                
-                questionsContainer.appendChild(questionDiv);
-            });
-        }
-
-        // Submit assessment
-        function submitAssessment() {
-            if (Object.keys(assessmentAnswers).length !== questionsData.length) {
-                addMessage('agent', 'Please answer all questions before submitting.');
-                return;
-            }
-            fetch('/api/submit_assessment', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(assessmentAnswers)
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.error) {
-                    addMessage('agent', data.error);
-                    return;
-                }
-                addMessage('agent', data.message);
-                const rec = data.recommendations;
-                const recHtml = `
-                    <div class="recommendation-box">
-                        <h4>${rec.methodology.name} Recommendation</h4>
-                        <p><strong>Why:</strong> ${rec.methodology.why_recommended}</p>
-                        <p><strong>Key Practices:</strong> ${rec.team_practices.map(p => p.practice).join(', ')}</p>
-                        <p><strong>Metrics:</strong> ${rec.metrics.map(m => m.metric).join(', ')}</p>
-                        <p><strong>Challenges Addressed:</strong> ${rec.challenges.map(c => `${c.challenge}: ${c.recommendations[0]}`).join('; ')}</p>
-                        <p><strong>Tools:</strong> ${rec.tools.map(t => t.recommendation).join(', ')}</p>
-                    </div>
-                `;
-                addMessage('agent', recHtml);
-                assessmentContainer.classList.add('d-none');
-                addMessage('agent', data.next_step);
-            })
-            .catch(error => {
-                console.error('Error submitting assessment:', error);
-                addMessage('agent', 'Failed to submit assessment. Please try again.');
-            });
-        }
-
-        // Send a query
-        function sendQuery(query) {
-            addMessage('user', query);
-            fetch('/api/query', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ query })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.error) {
-                    addMessage('agent', data.error, data.suggestions || []);
-                    return;
-                }
-                addMessage('agent', data.response, data.suggestions);
-                addMessage('agent', data.message);
-            })
-            .catch(error => {
-                console.error('Error sending query:', error);
-                addMessage('agent', 'Failed to process query. Please try again.');
-            });
-        }
-
-        // Save conversation
-        function saveConversation() {
-            const filename = prompt('Enter a filename (e.g., kanban_advice.json):', 'agile_consultation.json');
-            if (filename) {
-                fetch('/api/save_conversation', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ file_path: filename })
-                })
-                .then(response => response.json())
-                .then(data => {
-                    if (data.error) {
-                        addMessage('agent', data.error);
-                    } else {
-                        addMessage('agent', data.message);
-                    }
-                })
-                .catch(error => {
-                    console.error('Error saving conversation:', error);
-                    addMessage('agent', 'Failed to save conversation. Please try again.');
-                });
-            }
-        }
-
-        // View conversation history
-        function viewHistory() {
-            fetch('/api/history')
-                .then(response => response.json())
-                .then(data => {
-                    if (data.error) {
-                        addMessage('agent', data.error);
-                        return;
-                    }
-                    addMessage('agent', `Context:\n${data.context}`);
-                    data.history.forEach(msg => {
-                        addMessage(msg.role, msg.content.replace('; ', '\n'));
-                    });
-                    addMessage('agent', data.message);
-                })
-                .catch(error => {
-                    console.error('Error retrieving history:', error);
-                    addMessage('agent', 'Failed to retrieve history. Please try again.');
-                });
-        }
-
-        // Event listeners
-        sendBtn.addEventListener('click', () => {
-            const query = userInput.value.trim();
-            if (query) {
-                sendQuery(query);
-                userInput.value = '';
-            }
-        });
-
-        userInput.addEventListener('keypress', (e) => {
-            if (e.key === 'Enter') {
-                sendBtn.click();
-            }
-        });
-
-        startAssessmentBtn.addEventListener('click', loadQuestions);
-        submitAssessmentBtn.addEventListener('click', submitAssessment);
-        saveConversationBtn.addEventListener('click', saveConversation);
-        viewHistoryBtn.addEventListener('click', viewHistory);
-    </script>
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js"></script>
-</body>
-</html>
-            ''')
+        top = int(request.args.get('top', 20))
+        report = memory_tracker.report(top=top)
+        report['tenant_knowledge_bases'] = tenants.stats()
+        return jsonify(report)
+    except Exception as e:
+        logging.error(f"Failed to build memory report: {str(e)}")
+        return jsonify({
+            'error': f'Failed to build memory report: {str(e)}'
+        }), 500
+
+@app.route('/admin/tracemalloc', methods=['POST'])
+def tracemalloc_snapshot():
+    """Admin: start/stop tracemalloc or take a snapshot diffed against the previous one, by subsystem."""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden.'}), 403
+    try:
+        action = (request.json or {}).get('action', 'snapshot')
+        if action == 'start':
+            profiler.start()
+            return jsonify({'tracing': True})
+        if action == 'stop':
+            profiler.stop()
+            return jsonify({'tracing': False})
+        if action != 'snapshot':
+            return jsonify({'error': "'action' must be 'start', 'snapshot' or 'stop'."}), 400
+        if not profiler.tracing:
+            return jsonify({'error': "tracemalloc is not running; POST {'action': 'start'} first."}), 409
+        return jsonify(profiler.snapshot(top=int((request.json or {}).get('top', 25))))
+    except Exception as e:
+        logging.error(f"Failed to take tracemalloc snapshot: {str(e)}")
+        return jsonify({
+            'error': f'Failed to take tracemalloc snapshot: {str(e)}'
+        }), 500
+
+@app.route('/admin/admission', methods=['GET'])
+def admission_stats():
+    """Admin: in-flight counts, queue depth and rejection counters per route class, plus coalescing counters."""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden.'}), 403
+    stats = admission.stats()
+    stats['recommendation_coalescing'] = recommendation_flight.stats()
+    return jsonify(stats)
+
+@app.route('/admin/knowledge_base', methods=['GET', 'POST'])
+def knowledge_base_status():
+    """Admin: current knowledge-base and scoring-weights versions; POST checks both files for changes immediately."""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden.'}), 403
+    try:
+        if request.method == 'POST':
+            knowledge_reloader.check()
+        return jsonify(knowledge_reloader.status())
+    except Exception as e:
+        logging.error(f"Failed to check knowledge base: {str(e)}")
+        return jsonify({
+            'error': f'Failed to check knowledge base: {str(e)}'
+        }), 500
+
+readiness = Readiness()
+
+def run_warmup():
+    """Pay every lazy cost up front, then mark this worker ready."""
+    started = time.perf_counter()
+    try:
+        readiness.warmup_calls = warm_up_consultant(consultant)
+        app.jinja_env.get_template('index.html')
+        render_questions_body()
+        sample = consultant.with_context({'team_size': '1-5 members'}).build_full_recommendations()[0]
+        app.json.response({'recommendations': sample, 'message': 'warm-up'})
+        readiness.warmup_seconds = round(time.perf_counter() - started, 3)
+        readiness.ready = True
+        logging.info(f"Warm-up finished in {readiness.warmup_seconds} s ({readiness.warmup_calls} synthetic calls)")
     except Exception as e:
-        logging.error(f"Error creating templates/index.html: {str(e)}")
-        raise
+        readiness.error = str(e)
+        logging.error(f"Warm-up failed; worker stays unready: {str(e)}")
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once warm-up has completed, 503 before that."""
+    return jsonify(readiness.status()), 200 if readiness.ready else 503
+
+if os.environ.get('AGILE_WARMUP', '1') == '0' or not SERVER_PROCESS:
+    readiness.ready = True
+else:
+    threading.Thread(target=run_warmup, name='warmup', daemon=True).start()
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'index.html')
+# Element ids the frontend script depends on; a template missing any of them is a broken build
+REQUIRED_TEMPLATE_IDS = (
+    'chatContainer', 'userInput', 'sendBtn', 'assessmentContainer', 'questionsContainer',
+    'submitAssessmentBtn', 'startAssessmentBtn', 'saveConversationBtn', 'viewHistoryBtn'
+)
+
+def validate_template(path=TEMPLATE_PATH):
+    """Check that the shipped index.html exists and still contains the elements the UI needs."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+    except OSError as e:
+        raise RuntimeError(f"Template {path} is missing or unreadable: {str(e)}")
+    missing = [element_id for element_id in REQUIRED_TEMPLATE_IDS if f'id="{element_id}"' not in html]
+    if missing:
+        raise RuntimeError(f"Template {path} is missing required elements: {', '.join(missing)}")
+
+# Importing the app opens its databases and starts background threads; the profiled import keeps
+# the databases in memory and the reloader, stats snapshots and warm-up off, like the benchmarks do
+IMPORT_PROFILE_ENV = {
+    'AGILE_SESSION_DB': '',
+    'AGILE_ARCHIVE_DB': ':memory:',
+    'AGILE_FEEDBACK_DB': ':memory:',
+    'AGILE_STATS_PATH': '',
+    'AGILE_KB_POLL_SECONDS': '0',
+    'AGILE_WARMUP': '0'
+}
+
+def import_profile(module='app', top=15):
+    """Report cold-start import cost of a module using the interpreter's -X importtime output."""
+    import subprocess
+    import sys
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, **IMPORT_PROFILE_ENV)
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        entries.append((int(cumulative_us), int(self_us), name.strip()))
+    if result.returncode != 0 or not entries:
+        raise RuntimeError(f"Import profiling failed: {result.stderr.strip()[-500:]}")
+    total_us = next((c for c, _, name in entries if name == module), max(c for c, _, _ in entries))
+    print(f"import {module}: {total_us / 1000:.1f} ms cumulative")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in sorted(entries, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+    return total_us
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the Agile Project Consultant web app.')
+    parser.add_argument('--import-profile', action='store_true',
+                        help='print the cold-start import time of the app and exit')
+    parser.add_argument('--port', type=int, default=5001)
+    args = parser.parse_args()
+
+    if args.import_profile:
+        import_profile()
+    else:
+        try:
+            validate_template()
+        except RuntimeError as e:
+            logging.error(str(e))
+            raise SystemExit(1)
 
-    # Run the app
-    app.run(debug=True, port=5001)
\ No newline at end of file
+        # Run the app
+        app.run(debug=True, port=args.port)
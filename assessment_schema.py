@@ -0,0 +1,70 @@
+from typing import Callable, Dict, List, Optional
+
+MAX_TEXT_ANSWER_LENGTH = 100
+MAX_ASSESSMENT_BYTES = 16384  # Request bodies past this are refused before JSON parsing
+
+
+def _select_check(question_id: str, options: frozenset) -> Callable[[object], Optional[str]]:
+    def check(answer):
+        if answer.__class__ is not str or answer not in options:
+            return f"Answer for {question_id} must be one of the listed options."
+        return None
+    return check
+
+
+def _multi_select_check(question_id: str, options: frozenset) -> Callable[[object], Optional[str]]:
+    def check(answer):
+        if answer.__class__ is not list or len(answer) > len(options):
+            return f"Answer for {question_id} must be a list of the listed options."
+        for choice in answer:
+            if choice.__class__ is not str or choice not in options:
+                return f"Answer for {question_id} must be a list of the listed options."
+        return None
+    return check
+
+
+def _text_check(question_id: str, max_length: int) -> Callable[[object], Optional[str]]:
+    def check(answer):
+        if answer.__class__ is not str:
+            return f"Answer for {question_id} must be text."
+        if len(answer) > max_length:
+            return f"Answer for {question_id} cannot exceed {max_length} characters."
+        return None
+    return check
+
+
+class AssessmentSchema:
+    """Validator compiled once from the question definitions (AgileProjectConsultant.collect_project_context).
+
+    Select options become frozensets and each question gets a small check function, so
+    validating a submission is one dict lookup and one membership test per answer.
+    """
+
+    def __init__(self, questions: List[Dict], max_text_length: int = MAX_TEXT_ANSWER_LENGTH):
+        self.checks = {}
+        for question in questions:
+            options = frozenset(question.get("options", ()))
+            if question["type"] == "select":
+                self.checks[question["id"]] = _select_check(question["id"], options)
+            elif question["type"] == "multi-select":
+                self.checks[question["id"]] = _multi_select_check(question["id"], options)
+            else:
+                self.checks[question["id"]] = _text_check(question["id"], max_text_length)
+
+    def validate(self, data) -> Optional[str]:
+        """Return an error message for the first invalid answer, or None if the submission is valid."""
+        if data.__class__ is not dict or not data:
+            return "Invalid or empty assessment data provided."
+        if len(data) > len(self.checks):
+            return "Too many answers provided."
+        checks = self.checks
+        for question_id, answer in data.items():
+            check = checks.get(question_id)
+            if check is None:
+                return f"Unknown question: {str(question_id)[:MAX_TEXT_ANSWER_LENGTH]}"
+            if answer is None or answer == []:
+                return f"Answer for {question_id} cannot be empty."
+            error = check(answer)
+            if error:
+                return error
+        return None
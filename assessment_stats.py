@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+
+class AssessmentAggregator:
+    """Running org-wide counts over submitted assessments, updated in O(1) per event.
+
+    Tracks challenge and goal frequency, goal x recommended-methodology co-occurrence and
+    recommended methodology per team size and experience level. Reports are built from the
+    counters alone (never from history) and cached until the next event.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._counts = self._empty()
+        self._version = 0  # Bumped on every event; the saved and reported versions trail it
+        self._saved_version = 0
+        self._report = None
+        self._report_version = -1
+        self._stop = threading.Event()
+        self._thread = None
+        if path:
+            self.load()
+
+    @staticmethod
+    def _empty() -> Dict:
+        return {
+            'assessments': 0,
+            'challenges': {},
+            'goals': {},
+            'methodologies': {},
+            'goal_methodology': {},
+            'methodology_by_team_size': {},
+            'methodology_by_experience_level': {}
+        }
+
+    def record(self, context: Dict, methodology: str) -> None:
+        """Count one assessment's context and the methodology recommended for it."""
+        challenges = _as_list(context.get('challenges'))
+        goals = _as_list(context.get('goals'))
+        team_size = str(context.get('team_size', 'Not specified'))
+        experience_level = str(context.get('experience_level', 'Not specified'))
+        with self._lock:
+            counts = self._counts
+            counts['assessments'] += 1
+            _increment(counts['methodologies'], methodology)
+            for challenge in challenges:
+                _increment(counts['challenges'], challenge)
+            for goal in goals:
+                _increment(counts['goals'], goal)
+                _increment(counts['goal_methodology'].setdefault(goal, {}), methodology)
+            _increment(counts['methodology_by_team_size'].setdefault(team_size, {}), methodology)
+            _increment(counts['methodology_by_experience_level'].setdefault(experience_level, {}), methodology)
+            self._version += 1
+
+    def report(self) -> Dict:
+        """Return the current stats, with methodology win rates per team size and experience level."""
+        with self._lock:
+            if self._report_version != self._version:
+                counts = self._counts
+                self._report = {
+                    'assessments': counts['assessments'],
+                    'challenges': _ranked(counts['challenges']),
+                    'goals': _ranked(counts['goals']),
+                    'methodologies': _rates(counts['methodologies']),
+                    'goal_methodology': {goal: _ranked(by) for goal, by in counts['goal_methodology'].items()},
+                    'methodology_by_team_size': {
+                        team_size: _rates(by) for team_size, by in counts['methodology_by_team_size'].items()
+                    },
+                    'methodology_by_experience_level': {
+                        level: _rates(by) for level, by in counts['methodology_by_experience_level'].items()
+                    }
+                }
+                self._report_version = self._version
+            return self._report
+
+    def save(self) -> bool:
+        """Write the counters to `path` atomically if they changed since the last save; return True if written."""
+        if not self.path:
+            return False
+        with self._lock:
+            if self._version == self._saved_version:
+                return False
+            version = self._version
+            encoded = json.dumps(self._counts, ensure_ascii=False)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(encoded)
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            self._saved_version = max(self._saved_version, version)
+        return True
+
+    def load(self) -> None:
+        """Restore counters from the last snapshot at `path`, if there is one."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.error(f"Ignoring unreadable stats snapshot {self.path}: {str(e)}")
+            return
+        counts = self._empty()
+        counts.update({key: value for key, value in saved.items() if key in counts})
+        with self._lock:
+            self._counts = counts
+            self._report_version = -1
+
+    def start(self, interval: float) -> None:
+        """Snapshot to disk every `interval` seconds on a daemon thread."""
+        if self._thread is not None or not self.path:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='stats-snapshot', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.save()
+            except OSError as e:
+                logging.error(f"Failed to snapshot assessment stats: {str(e)}")
+
+
+def _as_list(answer) -> List[str]:
+    if answer is None:
+        return []
+    return [str(a) for a in answer] if isinstance(answer, list) else [str(answer)]
+
+
+def _increment(counter: Dict[str, int], key: str) -> None:
+    counter[key] = counter.get(key, 0) + 1
+
+
+def _ranked(counter: Dict[str, int]) -> Dict[str, int]:
+    return dict(sorted(counter.items(), key=lambda item: (-item[1], item[0])))
+
+
+def _rates(counter: Dict[str, int]) -> Dict:
+    total = sum(counter.values())
+    return {
+        'assessments': total,
+        'methodologies': {
+            name: {'count': count, 'rate': round(count / total, 4)} for name, count in _ranked(counter).items()
+        }
+    }
@@ -0,0 +1,77 @@
+"""Benchmark bulk inserts and range queries on the SQLite conversation archive.
+
+Usage: python benchmarks/archive_bench.py [--turns 1000000] [--turns-per-session 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_archive import ConversationArchive  # noqa: E402
+
+CHALLENGES = ["Resistance to change", "Inconsistent estimation", "Scope creep", "Poor communication",
+              "Lack of engagement", "Meeting deadlines", "Quality issues", "Stakeholder management"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--turns', type=int, default=1000000)
+    parser.add_argument('--turns-per-session', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = ConversationArchive(os.path.join(tmp, 'bench.db'))
+        rng = random.Random(42)
+        session_count = max(1, args.turns // args.turns_per_session)
+        base_time = time.time() - session_count
+
+        start = time.perf_counter()
+        session_ids = []
+        for i in range(session_count):
+            context = {"team_size": "6-12 members", "challenges": rng.sample(CHALLENGES, 2)}
+            session_ids.append(archive.archive_conversation([], context, {"methodology": {"name": "SCRUM"}}))
+
+        def rows():
+            for i, session_id in enumerate(session_ids):
+                created_at = base_time + i
+                for seq in range(args.turns_per_session):
+                    role = "user" if seq % 2 == 0 else "agent"
+                    yield session_id, seq, role, f"turn {seq} of session {session_id}", created_at
+
+        inserted = archive.bulk_insert_turns(rows())
+        elapsed = time.perf_counter() - start
+        print(f"insert: {inserted} turns in {session_count} sessions, {elapsed:.2f} s "
+              f"({inserted / elapsed:,.0f} turns/s)")
+
+        start = time.perf_counter()
+        returned = 0
+        for _ in range(args.queries):
+            window_start = base_time + rng.randrange(session_count)
+            returned += len(archive.turns_between(window_start, window_start + 10, limit=500))
+        elapsed = time.perf_counter() - start
+        print(f"time-range query: {args.queries} queries, {returned} turns, "
+              f"{elapsed / args.queries * 1000:.3f} ms/query")
+
+        start = time.perf_counter()
+        for _ in range(args.queries):
+            archive.get_turns(rng.choice(session_ids), 10, 30)
+        elapsed = time.perf_counter() - start
+        print(f"per-session seq range: {elapsed / args.queries * 1000:.3f} ms/query")
+
+        start = time.perf_counter()
+        matched = 0
+        for challenge in CHALLENGES:
+            matched += len(archive.find_sessions("challenges", challenge, limit=100))
+        elapsed = time.perf_counter() - start
+        print(f"challenge lookup: {len(CHALLENGES)} queries, {matched} sessions, "
+              f"{elapsed / len(CHALLENGES) * 1000:.3f} ms/query")
+        archive.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark refitting the methodology scoring weights on a large synthetic feedback log.
+
+Usage: python benchmarks/feedback_bench.py [--rows 1000000] [--regularization 25]
+
+Ratings are drawn from a known "true" weight matrix (the built-in weights with a few deliberate
+changes) plus noise, so the benchmark also reports how close the fit gets to the truth.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agile_consultant import METHODOLOGIES, AgileProjectConsultant, DEFAULT_SCORING_WEIGHTS  # noqa: E402
+from feedback_store import FeedbackStore  # noqa: E402
+from fit_weights import POINTS_PER_STAR, feature_columns, fit_weights, weight_matrix  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--regularization', type=float, default=25.0)
+    args = parser.parse_args()
+
+    consultant = AgileProjectConsultant()
+    questions = {q["id"]: q.get("options", []) for q in consultant.collect_project_context()}
+    features = feature_columns(consultant.collect_project_context())
+    column = {feature: i for i, feature in enumerate(features)}
+    challenge_methodologies = consultant.indexes["challenge_methodologies"]
+    truth = weight_matrix(DEFAULT_SCORING_WEIGHTS, features, challenge_methodologies)
+    truth[column[("goals", "Higher quality")], METHODOLOGIES.index("kanban")] += 15
+    truth[column[("challenges", "Scope creep")], METHODOLOGIES.index("lean")] -= 10
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeedbackStore(os.path.join(tmp, 'feedback.db'))
+
+        def rows():
+            for _ in range(args.rows):
+                context = {
+                    "team_size": rng.choice(questions["team_size"]),
+                    "experience_level": rng.choice(questions["experience_level"]),
+                    "project_complexity": rng.choice(questions["project_complexity"]),
+                    "challenges": rng.sample(questions["challenges"], rng.randint(0, 3)),
+                    "goals": rng.sample(questions["goals"], rng.randint(0, 3))
+                }
+                j = rng.randrange(len(METHODOLOGIES))
+                score = sum(truth[column[(q, a)], j] for q in ("team_size", "experience_level", "project_complexity")
+                            for a in [context[q]])
+                score += sum(truth[column[(q, a)], j] for q in ("challenges", "goals") for a in context[q])
+                rating = min(5, max(1, round(1 + score / POINTS_PER_STAR + rng.gauss(0, 0.5))))
+                yield store.row(context, METHODOLOGIES[j], METHODOLOGIES[j], rating)
+
+        start = time.perf_counter()
+        inserted = store.bulk_add(rows())
+        print(f"insert: {inserted} feedback rows in {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        weights, report = fit_weights(store, consultant, DEFAULT_SCORING_WEIGHTS, 1, args.regularization)
+        elapsed = time.perf_counter() - start
+        print(f"fit: {report['rows']} rows in {elapsed:.2f} s ({report['rows'] / elapsed:,.0f} rows/s), "
+              f"{report['changed_weights']} weights changed")
+        fitted = weight_matrix(weights, features, challenge_methodologies)
+        print(f"kanban weight for 'Higher quality': fitted {fitted[column[('goals', 'Higher quality')], 1]:.0f}, "
+              f"built-in {truth[column[('goals', 'Higher quality')], 1] - 15:.0f}")
+        print(f"mean absolute error against the true weights: {np.abs(fitted - truth).mean():.2f} points")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
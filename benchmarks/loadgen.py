@@ -0,0 +1,229 @@
+"""Open-loop load generator for the Agile Project Consultant web app.
+
+Sessions arrive as a Poisson process at --rate per second, independent of how fast the
+server responds. Each session walks the real user flow (start, questions, assessment,
+queries, history) with its own cookie jar. Latency is measured from each request's
+*intended* send time, so queueing inside the generator or the server is not hidden
+(no coordinated omission).
+
+Usage:
+    python benchmarks/loadgen.py --start-server --rate 20 --duration 30
+    python benchmarks/loadgen.py --url http://localhost:5001 --rate 50
+"""
+import argparse
+import http.cookiejar
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = [
+    "How do I set up a Kanban board?",
+    "How do we start with TDD?",
+    "Tips for pair programming",
+    "We have poor communication in our team",
+    "How do we handle scope creep?",
+    "How should we track defect rate?",
+    "How do we measure team happiness?",
+    "Tell me about kanban",
+    "Which agile methodology fits us?",
+    "What should we do next?",
+]
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (about 1% relative precision), safe to record from many threads."""
+
+    def __init__(self, precision: float = 0.01):
+        self._log_base = math.log1p(precision)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.max = 0.0
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        index = int(math.log(max(seconds, 1e-6) * 1e6) / self._log_base)
+        with self._lock:
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+            self.count += 1
+            self.errors += error
+            self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> float:
+        """Return the latency in seconds at percentile p (0-100)."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, math.ceil(self.count * p / 100))
+            seen = 0
+            for index in sorted(self._buckets):
+                seen += self._buckets[index]
+                if seen >= rank:
+                    return min(math.exp((index + 1) * self._log_base) / 1e6, self.max)
+        return self.max
+
+
+class SessionFlow:
+    """One simulated user: a cookie jar plus the sequence of requests a real visitor makes."""
+
+    def __init__(self, base_url: str, rng: random.Random, queries_per_session: int, think_time: float,
+                 histograms: dict, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.rng = rng
+        self.queries_per_session = queries_per_session
+        self.think_time = think_time
+        self.histograms = histograms
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def run(self, intended_start: float) -> None:
+        intended = intended_start
+        intended = self._request('/api/start', intended)
+        questions = self._request('/api/questions', intended, want_body=True)
+        intended, body = questions
+        answers = self._answers(body.get('questions', []) if body else [])
+        intended = self._request('/api/submit_assessment', intended, payload=answers)
+        for _ in range(self.queries_per_session):
+            intended = self._request('/api/query', intended, payload={'query': self.rng.choice(QUERIES)})
+        self._request('/api/history', intended)
+
+    def _answers(self, questions: list) -> dict:
+        answers = {}
+        for question in questions:
+            if question['type'] == 'text':
+                answers[question['id']] = self.rng.choice(['IT', 'Finance', 'Healthcare', 'Retail'])
+            elif question['type'] == 'select':
+                answers[question['id']] = self.rng.choice(question['options'])
+            else:
+                answers[question['id']] = self.rng.sample(question['options'], self.rng.randint(1, 3))
+        return answers
+
+    def _request(self, route: str, intended: float, payload=None, want_body: bool = False):
+        """Send one request no earlier than `intended`; record latency from `intended`; return the next intended time."""
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        req = urllib.request.Request(self.base_url + route, data=data,
+                                     headers={'Content-Type': 'application/json'} if data else {})
+        body = None
+        error = False
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                raw = resp.read()
+                if want_body:
+                    body = json.loads(raw)
+        except (urllib.error.URLError, OSError, ValueError):
+            error = True
+        finished = time.perf_counter()
+        self.histograms[route].record(finished - intended, error)
+        # The next step is due one think time after this one was due *or* finished, whichever is later
+        next_intended = max(intended, finished) + self.rng.expovariate(1 / self.think_time) if self.think_time else finished
+        return (next_intended, body) if want_body else next_intended
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workdir: str) -> subprocess.Popen:
+    """Start the app in a separate process (threaded, no debugger) and wait until it accepts connections."""
+    env = dict(os.environ, AGILE_SESSION_DB=os.path.join(workdir, 'sessions.db'),
+               AGILE_ARCHIVE_DB=os.path.join(workdir, 'conversations.db'),
+               AGILE_FEEDBACK_DB=os.path.join(workdir, 'feedback.db'),
+               AGILE_STATS_PATH=os.path.join(workdir, 'assessment_stats.json'))
+    code = (
+        "import logging, app; logging.disable(logging.INFO); "
+        f"app.app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)"
+    )
+    proc = subprocess.Popen([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("Server process exited during startup")
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("Server did not start within 30 seconds")
+
+
+def report(histograms: dict, elapsed: float) -> None:
+    print(f"{'route':<24}{'count':>8}{'errors':>8}{'req/s':>9}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'p999 ms':>10}{'max ms':>10}")
+    for route, hist in histograms.items():
+        print(f"{route:<24}{hist.count:>8}{hist.errors:>8}{hist.count / elapsed:>9.1f}"
+              + ''.join(f"{hist.percentile(p) * 1000:>10.1f}" for p in (50, 95, 99, 99.9))
+              + f"{hist.max * 1000:>10.1f}")
+
+
+def run_load(base_url: str, rate: float, duration: float, queries_per_session: int = 3,
+             think_time: float = 0.5, max_workers: int = 256, timeout: float = 30.0, seed: int = 1) -> dict:
+    """Drive sessions at an open-loop Poisson arrival `rate` for `duration` seconds; return per-route histograms."""
+    routes = ['/api/start', '/api/questions', '/api/submit_assessment', '/api/query', '/api/history']
+    histograms = {route: LatencyHistogram() for route in routes}
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        arrival = start
+        while arrival < start + duration:
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            flow = SessionFlow(base_url, random.Random(rng.random()), queries_per_session, think_time,
+                               histograms, timeout)
+            pool.submit(flow.run, arrival)
+            arrival += rng.expovariate(rate)
+    elapsed = time.perf_counter() - start
+    report(histograms, elapsed)
+    return histograms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop load generator for the consultant web app.')
+    parser.add_argument('--url', help='base URL of a running server')
+    parser.add_argument('--start-server', action='store_true', help='start a local server for the run')
+    parser.add_argument('--rate', type=float, default=10.0, help='session arrivals per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of arrivals')
+    parser.add_argument('--queries', type=int, default=3, help='free-text queries per session')
+    parser.add_argument('--think-time', type=float, default=0.5, help='mean seconds between steps')
+    parser.add_argument('--max-workers', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    if not args.url and not args.start_server:
+        parser.error('pass --url or --start-server')
+
+    server = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.start_server:
+            port = free_port()
+            server = start_server(port, workdir)
+            args.url = f'http://127.0.0.1:{port}'
+        try:
+            run_load(args.url, args.rate, args.duration, args.queries, args.think_time,
+                     args.max_workers, seed=args.seed)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == '__main__':
+    main()
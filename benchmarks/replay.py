@@ -0,0 +1,150 @@
+"""Replay saved conversations against AgileProjectConsultant to benchmark with production-shaped traffic.
+
+Sources (any mix, files or directories):
+  *.json   conversation files written by save_conversation: a list of {role, content} turns
+  *.jsonl  one conversation per line, either a list of turns or {"turns": [...]} / {"history": [...]}
+  *.db     the SQLite conversation archive (AGILE_ARCHIVE_DB)
+
+User turns of the form "<question_id>: <answer>" are replayed through process_user_input (followed
+by generate_full_recommendations, as /api/submit_assessment does); all other user turns go
+through process_free_text_query. Each session runs on its own consultant, sessions run in
+parallel, and gaps between turns are taken from "created_at"/"ts" timestamps when present
+(otherwise --default-gap) and divided by --speedup.
+
+Usage: python benchmarks/replay.py saved/ conversations.db --speedup 10 --workers 32
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agile_consultant import AgileProjectConsultant  # noqa: E402
+from loadgen import LatencyHistogram  # noqa: E402
+
+QUESTION_IDS = frozenset(q["id"] for q in AgileProjectConsultant().collect_project_context())
+
+
+def iter_sessions(paths: List[str]) -> Iterator[List[Dict]]:
+    """Yield each conversation (a list of turns) found in the given files and directories."""
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(glob.glob(os.path.join(path, '*.json')) + glob.glob(os.path.join(path, '*.jsonl'))
+                           + glob.glob(os.path.join(path, '*.db')))
+        else:
+            files = [path]
+        for file_path in files:
+            if file_path.endswith('.db'):
+                yield from _iter_archive(file_path)
+            elif file_path.endswith('.jsonl'):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            yield _turns(json.loads(line))
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    yield _turns(json.load(f))
+
+
+def _turns(record) -> List[Dict]:
+    if isinstance(record, dict):
+        return record.get('turns') or record.get('history') or []
+    return record
+
+
+def _iter_archive(db_path: str) -> Iterator[List[Dict]]:
+    from conversation_archive import ConversationArchive
+
+    archive = ConversationArchive(db_path)
+    try:
+        for session in archive.iter_sessions():
+            yield [dict(turn, created_at=session['created_at']) for turn in archive.get_turns(session['id'])]
+    finally:
+        archive.close()
+
+
+def parse_user_turn(content: str):
+    """Return ("answer", question_id, answer) for assessment answers, else ("query", content)."""
+    question_id, sep, answer = content.partition(': ')
+    if sep and question_id in QUESTION_IDS:
+        if answer.startswith('['):
+            try:
+                return "answer", question_id, ast.literal_eval(answer)
+            except (ValueError, SyntaxError):
+                pass
+        return "answer", question_id, answer
+    return ("query", content)
+
+
+def replay_session(turns: List[Dict], speedup: float, default_gap: float, histograms: Dict) -> int:
+    """Replay one conversation's user turns; return the number of consultant calls made."""
+    consultant = AgileProjectConsultant()
+    calls = 0
+    pending_assessment = False
+    previous_ts = None
+    for turn in turns:
+        if turn.get('role') != 'user':
+            continue
+        ts = turn.get('created_at', turn.get('ts'))
+        gap = default_gap if ts is None or previous_ts is None else max(0.0, ts - previous_ts)
+        previous_ts = ts
+        if speedup > 0 and gap > 0 and calls:
+            time.sleep(gap / speedup)
+        parsed = parse_user_turn(turn.get('content', ''))
+        if parsed[0] == "answer":
+            _timed(histograms['process_user_input'], consultant.process_user_input, parsed[1], parsed[2])
+            pending_assessment = True
+        else:
+            if pending_assessment:
+                _timed(histograms['generate_full_recommendations'], consultant.generate_full_recommendations)
+                pending_assessment = False
+            _timed(histograms['process_free_text_query'], consultant.process_free_text_query, parsed[1])
+        calls += 1
+    if pending_assessment:
+        _timed(histograms['generate_full_recommendations'], consultant.generate_full_recommendations)
+    return calls
+
+
+def _timed(histogram: LatencyHistogram, func, *args) -> None:
+    start = time.perf_counter()
+    error = False
+    try:
+        func(*args)
+    except Exception:
+        error = True
+    histogram.record(time.perf_counter() - start, error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay saved conversations against the consultant.')
+    parser.add_argument('paths', nargs='+', help='conversation files, JSONL files, archive databases or directories')
+    parser.add_argument('--speedup', type=float, default=10.0, help='divide recorded gaps by this (0 = no waiting)')
+    parser.add_argument('--default-gap', type=float, default=5.0, help='seconds between turns without timestamps')
+    parser.add_argument('--workers', type=int, default=16, help='sessions replayed in parallel')
+    args = parser.parse_args()
+
+    histograms = {name: LatencyHistogram() for name in
+                  ('process_user_input', 'generate_full_recommendations', 'process_free_text_query')}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(replay_session, turns, args.speedup, args.default_gap, histograms)
+                   for turns in iter_sessions(args.paths)]
+        sessions = len(futures)
+        calls = sum(f.result() for f in futures)
+    elapsed = time.perf_counter() - start
+    print(f"replayed {sessions} sessions, {calls} user turns in {elapsed:.2f} s (speed-up {args.speedup:g}x)")
+    print(f"{'call':<32}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, hist in histograms.items():
+        print(f"{name:<32}{hist.count:>8}{hist.errors:>8}"
+              + ''.join(f"{hist.percentile(p) * 1000:>10.3f}" for p in (50, 95, 99))
+              + f"{hist.max * 1000:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
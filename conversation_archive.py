@@ -0,0 +1,279 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    session_key TEXT,
+    title TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_session_key ON sessions (session_key);
+CREATE INDEX IF NOT EXISTS sessions_created_at ON sessions (created_at);
+
+CREATE TABLE IF NOT EXISTS turns (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS turns_created_at ON turns (created_at);
+
+CREATE TABLE IF NOT EXISTS contexts (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    question_id TEXT NOT NULL,
+    value TEXT NOT NULL,
+    is_option INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, question_id, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS contexts_answer ON contexts (question_id, value, session_id);
+
+CREATE TABLE IF NOT EXISTS recommendations (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    section TEXT NOT NULL,
+    name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (session_id, section)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS recommendations_name ON recommendations (section, name, session_id);
+"""
+
+
+class ConversationArchive:
+    """Queryable SQLite archive of conversations, their assessment contexts and recommendations.
+
+    Multi-select answers are stored one row per selected option, so questions like
+    "all conversations where Scope creep was selected" are a single index lookup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def archive_conversation(self, history: List[Dict], context: Optional[Dict] = None,
+                             recommendations: Optional[Dict[str, Dict]] = None,
+                             session_key: Optional[str] = None, title: Optional[str] = None) -> int:
+        """Store one conversation with its context and recommendations in a single transaction; return its id.
+
+        `recommendations` maps a section (e.g. "methodology") to a dict with at least a "name".
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                session_id = self._conn.execute(
+                    "INSERT INTO sessions (session_key, title, created_at) VALUES (?, ?, ?)",
+                    (session_key, title, now)
+                ).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO turns (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                    ((session_id, seq, msg["role"], msg["content"], now) for seq, msg in enumerate(history))
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO contexts (session_id, question_id, value, is_option) VALUES (?, ?, ?, ?)",
+                    ((session_id,) + row for row in _context_rows(context or {}))
+                )
+                self._conn.executemany(
+                    "INSERT INTO recommendations (session_id, section, name, payload) VALUES (?, ?, ?, ?)",
+                    ((session_id, section, str(rec.get("name", "")), json.dumps(rec, ensure_ascii=False))
+                     for section, rec in (recommendations or {}).items())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return session_id
+
+    def bulk_insert_turns(self, rows: Iterable[Tuple[int, int, str, str, float]], batch_size: int = 10000) -> int:
+        """Insert (session_id, seq, role, content, created_at) rows, committing once per batch; return the count."""
+        inserted = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                inserted += self._insert_turn_batch(batch)
+                batch = []
+        if batch:
+            inserted += self._insert_turn_batch(batch)
+        return inserted
+
+    def _insert_turn_batch(self, batch: List[Tuple]) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO turns (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)", batch
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(batch)
+
+    def create_session(self, session_key: Optional[str] = None, title: Optional[str] = None,
+                       created_at: Optional[float] = None) -> int:
+        """Create an empty archived session (e.g. before bulk-loading its turns) and return its id."""
+        with self._lock:
+            return self._conn.execute(
+                "INSERT INTO sessions (session_key, title, created_at) VALUES (?, ?, ?)",
+                (session_key, title, time.time() if created_at is None else created_at)
+            ).lastrowid
+
+    def iter_sessions(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Yield every archived session in id order, reading `batch_size` rows at a time."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, session_key, title, created_at FROM sessions WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _session_row(row)
+            last_id = rows[-1][0]
+
+    def iter_session_batches(self, batch_size: int = 1000) -> Iterator[List[Dict]]:
+        """Yield archived sessions in id order, `batch_size` at a time, each with its turn count, context and
+        recommendation names (section -> name). Every batch costs four range queries, however many sessions it holds.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, session_key, title, created_at FROM sessions WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+                if not rows:
+                    return
+                bounds = (rows[0][0], rows[-1][0])
+                turn_counts = dict(self._conn.execute(
+                    "SELECT session_id, COUNT(*) FROM turns WHERE session_id BETWEEN ? AND ? GROUP BY session_id",
+                    bounds
+                ).fetchall())
+                context_rows = self._conn.execute(
+                    "SELECT session_id, question_id, value, is_option FROM contexts WHERE session_id BETWEEN ? AND ?",
+                    bounds
+                ).fetchall()
+                recommendation_rows = self._conn.execute(
+                    "SELECT session_id, section, name FROM recommendations WHERE session_id BETWEEN ? AND ?", bounds
+                ).fetchall()
+            batch = {}
+            for row in rows:
+                session = batch[row[0]] = _session_row(row)
+                session["turn_count"] = turn_counts.get(row[0], 0)
+                session["context"] = {}
+                session["recommendations"] = {}
+            for session_id, question_id, value, is_option in context_rows:
+                context = batch[session_id]["context"]
+                if is_option:
+                    context.setdefault(question_id, []).append(value)
+                else:
+                    context[question_id] = value
+            for session_id, section, name in recommendation_rows:
+                batch[session_id]["recommendations"][section] = name
+            yield list(batch.values())
+            last_id = bounds[1]
+
+    def find_sessions(self, question_id: str, value: str, limit: int = 100, after_id: int = 0) -> List[Dict]:
+        """Return archived sessions whose context answered `question_id` with `value` (or selected it)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.id, s.session_key, s.title, s.created_at FROM contexts c "
+                "JOIN sessions s ON s.id = c.session_id "
+                "WHERE c.question_id = ? AND c.value = ? AND c.session_id > ? "
+                "ORDER BY c.session_id LIMIT ?",
+                (question_id, value, after_id, limit)
+            ).fetchall()
+        return [_session_row(row) for row in rows]
+
+    def sessions_by_recommendation(self, name: str, section: str = "methodology",
+                                   limit: int = 100, after_id: int = 0) -> List[Dict]:
+        """Return archived sessions whose recommendation for `section` was `name` (e.g. "KANBAN")."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.id, s.session_key, s.title, s.created_at FROM recommendations r "
+                "JOIN sessions s ON s.id = r.session_id "
+                "WHERE r.section = ? AND r.name = ? AND r.session_id > ? "
+                "ORDER BY r.session_id LIMIT ?",
+                (section, name, after_id, limit)
+            ).fetchall()
+        return [_session_row(row) for row in rows]
+
+    def get_turns(self, session_id: int, start_seq: int = 0, end_seq: Optional[int] = None) -> List[Dict]:
+        """Return a session's turns with start_seq <= seq < end_seq."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, role, content FROM turns WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (session_id, start_seq, end_seq if end_seq is not None else 2 ** 62)
+            ).fetchall()
+        return [{"seq": seq, "role": role, "content": content} for seq, role, content in rows]
+
+    def turns_between(self, start_time: float, end_time: float, limit: int = 1000) -> List[Dict]:
+        """Return turns created in [start_time, end_time), oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, seq, role, content, created_at FROM turns "
+                "WHERE created_at >= ? AND created_at < ? ORDER BY created_at LIMIT ?",
+                (start_time, end_time, limit)
+            ).fetchall()
+        return [
+            {"session_id": sid, "seq": seq, "role": role, "content": content, "created_at": created_at}
+            for sid, seq, role, content, created_at in rows
+        ]
+
+    def get_context(self, session_id: int) -> Dict:
+        """Rebuild an archived session's context; multi-select answers come back as lists."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question_id, value, is_option FROM contexts WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        context = {}
+        for question_id, value, is_option in rows:
+            if is_option:
+                context.setdefault(question_id, []).append(value)
+            else:
+                context[question_id] = value
+        return context
+
+    def get_recommendations(self, session_id: int) -> Dict[str, Dict]:
+        """Return an archived session's recommendations keyed by section."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT section, payload FROM recommendations WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        return {section: json.loads(payload) for section, payload in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _context_rows(context: Dict) -> Iterable[Tuple[str, str, int]]:
+    """Flatten a context into (question_id, value, is_option) rows; each multi-select option gets its own row.
+
+    Structured entries (such as measured flow metrics) are not assessment answers and are skipped.
+    """
+    for question_id, answer in context.items():
+        if isinstance(answer, dict):
+            continue
+        if isinstance(answer, list):
+            for option in answer:
+                yield question_id, str(option), 1
+        else:
+            yield question_id, str(answer), 0
+
+
+def _session_row(row: Tuple) -> Dict:
+    session_id, session_key, title, created_at = row
+    return {"id": session_id, "session_key": session_key, "title": title, "created_at": created_at}
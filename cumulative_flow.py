@@ -0,0 +1,249 @@
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from flow_metrics import _parse_timestamps, _resolve_columns
+
+SECONDS_PER_DAY = 86400
+MAX_DWELL_SAMPLES = 10000  # Most recent time-in-state samples kept per state
+MAX_SPAN_DAYS = 3660  # Longest span of days a board records, and the longest range a query returns
+
+
+class CumulativeFlow:
+    """Per-day, per-state work-item counts for a cumulative flow diagram, maintained incrementally.
+
+    Each transition is recorded as two entries in a (states x days) array of daily changes:
+    -1 for the state an item leaves and +1 for the state it enters, on the transition day.
+    Appending events therefore costs O(1) each, late events need no replay, and any range
+    query is a prefix sum over the requested days. States are kept in workflow order: the
+    order given at construction, then new states in order of first appearance. The time items
+    spent in each state is sampled too, to fit service times for WIP simulations. A board spans
+    at most MAX_SPAN_DAYS days: events that would stretch it further are rejected, as are longer
+    query ranges.
+    """
+
+    def __init__(self, states: Optional[Sequence[str]] = None):
+        self.states = []
+        self._state_index = {}
+        self._deltas = np.zeros((0, 64), dtype=np.int32)
+        self.origin = None  # Day number (days since the epoch) of column 0
+        self.last_day = None
+        self._current = {}  # item id -> (index of the state it is in, epoch seconds it entered)
+        self._dwell = []  # Per state: recent durations (days) items spent in it before moving on
+        self._counts = None  # Cached prefix sums, dropped on every update
+        self.events = 0
+        self._lock = threading.Lock()
+        for state in states or ():
+            self._state(state)
+
+    def _state(self, state: str) -> int:
+        index = self._state_index.get(state)
+        if index is None:
+            index = self._state_index[state] = len(self.states)
+            self.states.append(state)
+            self._dwell.append(np.zeros(0))
+            self._deltas = np.vstack([self._deltas, np.zeros((1, self._deltas.shape[1]), dtype=np.int32)])
+        return index
+
+    def _check_span(self, first_day: int, last_day: int) -> None:
+        if self.origin is not None:
+            first_day, last_day = min(first_day, self.origin), max(last_day, self.last_day)
+        if last_day - first_day + 1 > MAX_SPAN_DAYS:
+            raise ValueError(f"Transition timestamps must fall within {MAX_SPAN_DAYS} days of each other "
+                             f"(the board would span {_date(first_day)} to {_date(last_day)}).")
+
+    def _ensure_days(self, first_day: int, last_day: int) -> None:
+        if self.origin is None:
+            self.origin = first_day
+            self.last_day = last_day
+        if first_day < self.origin:
+            shift = self.origin - first_day
+            self._deltas = np.hstack([np.zeros((self._deltas.shape[0], shift), dtype=np.int32), self._deltas])
+            self.origin = first_day
+        capacity = self._deltas.shape[1]
+        needed = last_day - self.origin + 1
+        if needed > capacity:
+            grown = max(needed, capacity * 2)
+            self._deltas = np.hstack([self._deltas, np.zeros((self._deltas.shape[0], grown - capacity), dtype=np.int32)])
+        self.last_day = max(self.last_day, last_day)
+
+    def add_events(self, items: Sequence[str], states: Sequence[str], timestamps: np.ndarray) -> None:
+        """Record transitions: item `items[i]` entered `states[i]` at epoch seconds `timestamps[i]`.
+
+        Events for one item must arrive in time order (across calls too); different items may interleave.
+        """
+        if not len(items):
+            return
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if not np.all(np.isfinite(timestamps)) or timestamps.min() < FIRST_TIMESTAMP or timestamps.max() >= END_TIMESTAMP:
+            raise ValueError("Transition timestamps must be dates between years 1 and 9999.")
+        days = np.floor(timestamps / SECONDS_PER_DAY).astype(np.int64)
+        items = np.asarray(items).astype(str)
+        with self._lock:
+            self._check_span(int(days.min()), int(days.max()))
+            state_index = np.fromiter((self._state(str(s).strip()) for s in states), dtype=np.int64, count=len(states))
+            self._ensure_days(int(days.min()), int(days.max()))
+            columns = days - self.origin
+
+            # Group each item's events in time order so the previous state of every event is known
+            order = np.lexsort((timestamps, items))
+            items, state_index, columns, timestamps = items[order], state_index[order], columns[order], timestamps[order]
+            first_of_item = np.ones(items.size, dtype=bool)
+            first_of_item[1:] = items[1:] != items[:-1]
+            previous = np.empty(items.size, dtype=np.int64)
+            previous[1:] = state_index[:-1]
+            entered = np.empty(items.size)
+            entered[1:] = timestamps[:-1]
+            starts = np.flatnonzero(first_of_item)
+            carried = [self._current.get(item, (-1, np.nan)) for item in items[starts].tolist()]
+            previous[starts] = [state for state, _ in carried]
+            entered[starts] = [since for _, since in carried]
+
+            np.add.at(self._deltas, (state_index, columns), 1)
+            moved = previous >= 0
+            np.add.at(self._deltas, (previous[moved], columns[moved]), -1)
+            dwell = (timestamps[moved] - entered[moved]) / SECONDS_PER_DAY
+            for index in np.unique(previous[moved]).tolist():
+                samples = np.concatenate([self._dwell[index], dwell[previous[moved] == index]])
+                self._dwell[index] = samples[-MAX_DWELL_SAMPLES:]
+
+            ends = np.append(starts[1:], items.size) - 1
+            for item, state, since in zip(items[ends].tolist(), state_index[ends].tolist(), timestamps[ends].tolist()):
+                self._current[item] = (state, since)
+            self.events += int(items.size)
+            self._counts = None
+
+    def add_rows(self, rows: List[Dict]) -> int:
+        """Record transitions given as dicts keyed like a tracker export (see flow_metrics.COLUMN_ALIASES).
+
+        Returns the number of rows recorded; rows missing an item, state or timestamp are skipped.
+        """
+        if not rows:
+            return 0
+        columns = _resolve_columns(set().union(*(row.keys() for row in rows)))
+        item, state, timestamp = columns["item"], columns["state"], columns["timestamp"]
+        rows = [row for row in rows if all(row.get(key) not in ("", None) for key in (item, state, timestamp))]
+        if rows:
+            self.add_events([row[item] for row in rows], [row[state] for row in rows],
+                            _parse_timestamps([row[timestamp] for row in rows]))
+        return len(rows)
+
+    def dwell_times(self, state: str) -> np.ndarray:
+        """Recent durations (days) that items spent in a state before moving to another one."""
+        with self._lock:
+            index = self._state_index.get(state)
+            return self._dwell[index].copy() if index is not None else np.zeros(0)
+
+    def _daily_counts(self) -> np.ndarray:
+        counts = self._counts
+        if counts is None:
+            days = self.last_day - self.origin + 1
+            counts = self._counts = np.cumsum(self._deltas[:, :days], axis=1)
+        return counts
+
+    def _window(self, start: Optional[datetime.date], end: Optional[datetime.date]):
+        first = self.origin if start is None else _day_number(start)
+        last = self.last_day if end is None else _day_number(end)
+        if last < first:
+            raise ValueError("The end date is before the start date.")
+        if last - first + 1 > MAX_SPAN_DAYS:
+            raise ValueError(f"The date range cannot be longer than {MAX_SPAN_DAYS} days.")
+        return first, last
+
+    def _slice(self, counts: np.ndarray, first: int, last: int) -> np.ndarray:
+        """Columns first..last (day numbers) of a (states x days) array; days before any data are zero,
+        days after the last event repeat the final counts."""
+        out = np.zeros((counts.shape[0], last - first + 1), dtype=counts.dtype)
+        lo, hi = max(first, self.origin), min(last, self.last_day)
+        if lo <= hi:
+            out[:, lo - first:hi - first + 1] = counts[:, lo - self.origin:hi - self.origin + 1]
+        if last > self.last_day and counts.shape[1]:
+            out[:, max(self.last_day + 1, first) - first:] = counts[:, -1:]
+        return out
+
+    def query(self, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None) -> Dict:
+        """Return per-day counts in each state (`wip`) and cumulative bands (`cumulative`: in this state or any
+        later one) for the inclusive date range, defaulting to all recorded days."""
+        with self._lock:
+            if self.origin is None:
+                return {'states': list(self.states), 'days': [], 'wip': {}, 'cumulative': {}}
+            first, last = self._window(start, end)
+            wip = self._slice(self._daily_counts(), first, last)
+        cumulative = np.cumsum(wip[::-1], axis=0)[::-1]
+        return {
+            'states': list(self.states),
+            'days': [_date(day).isoformat() for day in range(first, last + 1)],
+            'wip': {state: wip[i].tolist() for i, state in enumerate(self.states)},
+            'cumulative': {state: cumulative[i].tolist() for i, state in enumerate(self.states)}
+        }
+
+    def wip_breaches(self, limits: Dict[str, int], start: Optional[datetime.date] = None,
+                     end: Optional[datetime.date] = None) -> List[Dict]:
+        """Return the runs of consecutive days on which a state held more items than its WIP limit."""
+        with self._lock:
+            if self.origin is None:
+                return []
+            unknown = [state for state in limits if state not in self._state_index]
+            if unknown:
+                raise ValueError(f"Unknown states: {', '.join(unknown)}")
+            first, last = self._window(start, end)
+            wip = self._slice(self._daily_counts(), first, last)
+        breaches = []
+        for state, limit in limits.items():
+            over = np.concatenate(([False], wip[self._state_index[state]] > limit, [False]))
+            edges = np.flatnonzero(over[1:] != over[:-1])
+            for run_start, run_end in zip(edges[::2], edges[1::2]):
+                counts = wip[self._state_index[state], run_start:run_end]
+                breaches.append({
+                    'state': state,
+                    'limit': limit,
+                    'from': _date(first + int(run_start)).isoformat(),
+                    'to': _date(first + int(run_end) - 1).isoformat(),
+                    'days': int(run_end - run_start),
+                    'peak': int(counts.max())
+                })
+        return breaches
+
+
+class FlowBoards:
+    """Cumulative flow engines keyed by session, keeping only the `max_boards` most recently used."""
+
+    def __init__(self, max_boards: int = 1000):
+        self.max_boards = max_boards
+        self._boards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, create: bool = True, states: Optional[Sequence[str]] = None) -> Optional[CumulativeFlow]:
+        with self._lock:
+            board = self._boards.get(key)
+            if board is not None:
+                self._boards.move_to_end(key)
+                return board
+            if not create:
+                return None
+            board = self._boards[key] = CumulativeFlow(states)
+            while len(self._boards) > self.max_boards:
+                self._boards.popitem(last=False)
+            return board
+
+    def reset(self, key: str, states: Optional[Sequence[str]] = None) -> CumulativeFlow:
+        """Replace the board for key with an empty one."""
+        with self._lock:
+            self._boards.pop(key, None)
+        return self.get(key, states=states)
+
+
+def _day_number(day: datetime.date) -> int:
+    return (day - datetime.date(1970, 1, 1)).days
+
+
+# Epoch seconds of the first and one past the last representable date
+FIRST_TIMESTAMP = _day_number(datetime.date.min) * SECONDS_PER_DAY
+END_TIMESTAMP = (_day_number(datetime.date.max) + 1) * SECONDS_PER_DAY
+
+
+def _date(day_number: int) -> datetime.date:
+    return datetime.date(1970, 1, 1) + datetime.timedelta(days=day_number)
@@ -0,0 +1,170 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+RATINGS = range(1, 6)  # 1 = the methodology did not work for us, 5 = it worked very well
+MAX_SPRINTS = 1000
+SCORED_QUESTIONS = ("team_size", "experience_level", "project_complexity", "challenges", "goals")
+MULTI_SELECT_QUESTIONS = ("challenges", "goals")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    question_id TEXT NOT NULL,
+    value TEXT NOT NULL,
+    UNIQUE (question_id, value)
+);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    session_key TEXT,
+    team_size INTEGER REFERENCES answers (id),
+    experience_level INTEGER REFERENCES answers (id),
+    project_complexity INTEGER REFERENCES answers (id),
+    challenges INTEGER NOT NULL REFERENCES answers (id),
+    goals INTEGER NOT NULL REFERENCES answers (id),
+    recommended INTEGER NOT NULL REFERENCES answers (id),
+    methodology INTEGER NOT NULL REFERENCES answers (id),
+    rating INTEGER NOT NULL,
+    sprints INTEGER,
+    weights_version INTEGER NOT NULL
+);
+"""
+COLUMNS = ("created_at", "session_key") + SCORED_QUESTIONS + (
+    "recommended", "methodology", "rating", "sprints", "weights_version")
+INSERT_SQL = f"INSERT INTO feedback ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+# Columns read back for fitting the scoring weights; unanswered single-answer questions read as -1
+FIT_COLUMNS = SCORED_QUESTIONS + ("methodology", "rating")
+FIT_SQL = (
+    "SELECT id, " + ", ".join(f"COALESCE({c}, -1)" if c not in MULTI_SELECT_QUESTIONS else c for c in FIT_COLUMNS)
+    + " FROM feedback WHERE id > ? ORDER BY id LIMIT ?"
+)
+
+
+def parse_feedback(data) -> Tuple[int, Optional[str], Optional[int], Optional[Dict]]:
+    """Validate a feedback request; return (rating, methodology or None, sprints or None, context or None)."""
+    if not isinstance(data, dict):
+        raise ValueError("Feedback must be a JSON object with a 'rating'.")
+    rating = data.get("rating")
+    if rating.__class__ is not int or rating not in RATINGS:
+        raise ValueError(f"'rating' must be a whole number from {RATINGS[0]} to {RATINGS[-1]}.")
+    methodology = data.get("methodology")
+    if methodology is not None and not isinstance(methodology, str):
+        raise ValueError("'methodology' must be the name of the methodology the team followed.")
+    sprints = data.get("sprints")
+    if sprints is not None and (sprints.__class__ is not int or not 1 <= sprints <= MAX_SPRINTS):
+        raise ValueError(f"'sprints' must be a whole number from 1 to {MAX_SPRINTS}.")
+    context = data.get("context")
+    if context is not None and not isinstance(context, dict):
+        raise ValueError("'context' must be an object of assessment answers.")
+    return rating, methodology, sprints, context
+
+
+class FeedbackStore:
+    """SQLite log of how recommended methodologies worked out, rated by teams after a few sprints.
+
+    Answers are dictionary-encoded: each distinct answer (a whole multi-select selection, sorted,
+    counts as one answer) is stored once in `answers`, and feedback rows hold small integer ids.
+    fit_weights.py reads rows back as integer columns, so refitting never parses answer text per row.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._answer_ids = {
+            (question_id, value): answer_id
+            for answer_id, question_id, value in self._conn.execute("SELECT id, question_id, value FROM answers")
+        }
+
+    def _answer_id(self, question_id: str, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        answer_id = self._answer_ids.get((question_id, value))
+        if answer_id is None:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO answers (question_id, value) VALUES (?, ?)", (question_id, value)
+                )
+                answer_id = self._conn.execute(
+                    "SELECT id FROM answers WHERE question_id = ? AND value = ?", (question_id, value)
+                ).fetchone()[0]
+            self._answer_ids[(question_id, value)] = answer_id
+        return answer_id
+
+    def row(self, context: Dict, recommended: str, methodology: str, rating: int, sprints: Optional[int] = None,
+            session_key: Optional[str] = None, weights_version: int = 0, created_at: Optional[float] = None) -> Tuple:
+        """Encode one feedback entry as a row in COLUMNS order; only the answers that feed scoring are kept."""
+        answers = []
+        for question_id in SCORED_QUESTIONS:
+            answer = context.get(question_id)
+            if question_id in MULTI_SELECT_QUESTIONS:
+                answer = json.dumps(sorted(set(answer)) if isinstance(answer, list) else [], ensure_ascii=False)
+            answers.append(self._answer_id(question_id, answer))
+        return (time.time() if created_at is None else created_at, session_key, *answers,
+                self._answer_id("methodology", recommended.lower()), self._answer_id("methodology", methodology.lower()),
+                rating, sprints, weights_version)
+
+    def add(self, context: Dict, recommended: str, methodology: str, rating: int, sprints: Optional[int] = None,
+            session_key: Optional[str] = None, weights_version: int = 0) -> int:
+        """Record one team's rating of the methodology it followed; return the feedback id."""
+        row = self.row(context, recommended, methodology, rating, sprints, session_key, weights_version)
+        with self._lock:
+            return self._conn.execute(INSERT_SQL, row).lastrowid
+
+    def bulk_add(self, rows: Iterable[Tuple], batch_size: int = 10000) -> int:
+        """Insert rows built by FeedbackStore.row, committing once per batch; return the count."""
+        inserted = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                inserted += self._insert_batch(batch)
+                batch = []
+        if batch:
+            inserted += self._insert_batch(batch)
+        return inserted
+
+    def _insert_batch(self, batch: List[Tuple]) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(INSERT_SQL, batch)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(batch)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+
+    def answers(self) -> Dict[int, Tuple[str, object]]:
+        """The answer dictionary: id -> (question id, answer), with multi-select selections as lists."""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, question_id, value FROM answers").fetchall()
+        return {answer_id: (question_id, json.loads(value) if question_id in MULTI_SELECT_QUESTIONS else value)
+                for answer_id, question_id, value in rows}
+
+    def iter_fit_batches(self, batch_size: int = 100000) -> Iterator[Dict[str, tuple]]:
+        """Yield feedback in id order as FIT_COLUMNS -> column tuples of answer ids (and ratings)."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(FIT_SQL, (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            columns = list(zip(*rows))
+            yield dict(zip(FIT_COLUMNS, columns[1:]))
+            last_id = columns[0][-1]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
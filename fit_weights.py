@@ -0,0 +1,212 @@
+"""Refit the methodology scoring weights from the outcome feedback teams have submitted.
+
+Usage: python fit_weights.py [--db feedback.db] [--out scoring_weights.json] [--regularization 25]
+
+Every scored answer (each team size, experience level and complexity option, each challenge and
+each goal) is a feature column, and each methodology has one weight per column, exactly as
+AgileProjectConsultant.score_methodologies adds them up. A team's 1-5 rating of the methodology it
+followed, at --points-per-star points per star above one, is the target score for that methodology,
+so each methodology's weights are a ridge regression over the teams that followed it, shrunk toward
+the prior weights (the built-in tables unless --prior names a weights file):
+
+    w = (X'X + regularization * I)^-1 (X'y + regularization * w_prior)
+
+With little feedback a weight stays at its prior; with plenty it follows the ratings. The
+regularization reads as "the prior is worth this many teams' ratings". Feedback is read in id-ordered
+batches and only the normal equations (one features x features matrix per methodology) are kept,
+so memory does not grow with the number of rows. Weights are rounded to whole points and written
+as the next version of --out, which the consultant loads when AGILE_SCORING_WEIGHTS points at it.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agile_consultant import METHODOLOGIES, AgileProjectConsultant, load_scoring_weights
+from feedback_store import FeedbackStore
+from scoring_weights import ScoringWeights, write_scoring_weights
+from sensitivity import DEFAULT_ANSWERS, MULTI_ANSWER_QUESTIONS, SINGLE_ANSWER_QUESTIONS
+
+POINTS_PER_STAR = 25  # A 5-star outcome is worth 100 points, about a clear winner's score with the built-in weights
+DEFAULT_REGULARIZATION = 25.0
+
+
+def feature_columns(questions: List[Dict]) -> List[Tuple[str, str]]:
+    """(question id, answer) for every option of every scored question, in question order."""
+    options = {q["id"]: q.get("options", []) for q in questions}
+    return [(question_id, answer) for question_id in SINGLE_ANSWER_QUESTIONS + MULTI_ANSWER_QUESTIONS
+            for answer in options.get(question_id, [])]
+
+
+def weight_matrix(weights: ScoringWeights, features: List[Tuple[str, str]],
+                  challenge_methodologies: Dict[str, list]) -> np.ndarray:
+    """The (features x methodologies) matrix form of a set of scoring weights."""
+    matrix = np.zeros((len(features), len(METHODOLOGIES)))
+    for i, (question_id, answer) in enumerate(features):
+        for methodology, weight in weights.answer_weights(question_id, answer, challenge_methodologies).items():
+            if methodology in METHODOLOGIES:
+                matrix[i, METHODOLOGIES.index(methodology)] = weight
+    return matrix
+
+
+class NormalEquations:
+    """Per-methodology X'X and X'y accumulated over batches of feedback (FeedbackStore.iter_fit_batches).
+
+    Every id in the store's answer dictionary maps to its feature row once, up front; a batch of
+    rows is then a sum of table lookups by id, with no per-row Python work.
+    """
+
+    def __init__(self, features: List[Tuple[str, str]], answers: Dict[int, Tuple[str, object]],
+                 points_per_star: float = POINTS_PER_STAR):
+        self.features = features
+        self.points_per_star = points_per_star
+        column = {feature: i for i, feature in enumerate(features)}
+        self.top = max(answers, default=0) + 1
+        # Rows 0..top-1 are answer ids, then each single-answer question's default, then "unknown"
+        self.defaults = {question_id: self.top + k for k, question_id in enumerate(SINGLE_ANSWER_QUESTIONS)}
+        self.unknown = self.top + len(SINGLE_ANSWER_QUESTIONS)
+        self.table = np.zeros((self.unknown + 1, len(features)))
+        self.known = np.zeros(self.unknown + 1, dtype=bool)
+        self.methodology_of = np.full(self.unknown + 1, -1)
+        entries = list(answers.items()) + [(row, (q, DEFAULT_ANSWERS[q])) for q, row in self.defaults.items()]
+        for row, (question_id, answer) in entries:
+            if question_id == "methodology":
+                self.methodology_of[row] = METHODOLOGIES.index(answer) if answer in METHODOLOGIES else -1
+                continue
+            selected = answer if question_id in MULTI_ANSWER_QUESTIONS else [answer]
+            columns = [column.get((question_id, a)) for a in selected]
+            if None not in columns:  # Answers the current questions no longer offer make the row unusable
+                self.table[row, columns] = 1
+                self.known[row] = True
+        self.gram = np.zeros((len(METHODOLOGIES), len(features), len(features)))
+        self.rhs = np.zeros((len(METHODOLOGIES), len(features)))
+        self.rows = np.zeros(len(METHODOLOGIES), dtype=np.int64)
+        self.rating_sums = np.zeros(len(METHODOLOGIES))
+        self.skipped = 0  # Rows naming an answer or methodology the current questions no longer have
+
+    def _codes(self, ids: tuple, default: Optional[int] = None) -> np.ndarray:
+        codes = np.array(ids, dtype=np.int64)
+        codes[codes >= self.top] = self.unknown  # Answers added after the dictionary was read
+        codes[codes < 0] = self.unknown if default is None else default
+        return codes
+
+    def add_batch(self, batch: Dict[str, tuple]) -> None:
+        n = len(batch["rating"])
+        x = np.zeros((n, len(self.features)))
+        valid = np.ones(n, dtype=bool)
+        for question_id in SINGLE_ANSWER_QUESTIONS + MULTI_ANSWER_QUESTIONS:
+            codes = self._codes(batch[question_id], self.defaults.get(question_id))
+            valid &= self.known[codes]
+            x += self.table[codes]
+        methodologies = self.methodology_of[self._codes(batch["methodology"])]
+        valid &= methodologies >= 0
+        ratings = np.array(batch["rating"], dtype=float)
+        targets = (ratings - 1) * self.points_per_star
+        self.skipped += int(n - valid.sum())
+        for j in range(len(METHODOLOGIES)):
+            rows = valid & (methodologies == j)
+            xj = x[rows]
+            self.gram[j] += xj.T @ xj
+            self.rhs[j] += xj.T @ targets[rows]
+            self.rows[j] += len(xj)
+            self.rating_sums[j] += ratings[rows].sum()
+
+    def solve(self, prior: np.ndarray, regularization: float) -> np.ndarray:
+        """Ridge solution shrunk toward prior (features x methodologies), one linear solve per methodology."""
+        if regularization <= 0:
+            raise ValueError("Regularization must be positive")
+        penalty = regularization * np.eye(len(self.features))
+        solved = np.linalg.solve(self.gram + penalty, (self.rhs + regularization * prior.T)[..., None])[..., 0]
+        return solved.T
+
+
+def fitted_weights(matrix: np.ndarray, features: List[Tuple[str, str]], prior: ScoringWeights, version: int,
+                   metadata: Dict) -> ScoringWeights:
+    """Round a fitted weight matrix to whole points and lay it out as scoring-weight tables."""
+    tables = {question_id: {} for question_id in SINGLE_ANSWER_QUESTIONS + MULTI_ANSWER_QUESTIONS}
+    for (question_id, answer), row in zip(features, np.rint(matrix).astype(int)):
+        key = answer.lower() if question_id == "challenges" else answer
+        tables[question_id][key] = {m: int(w) for m, w in zip(METHODOLOGIES, row) if w}
+    # Team sizes scored by the prior's catch-all row (13+ members) give the fitted catch-all row
+    large_sizes = [answer for answer in tables["team_size"] if answer not in prior.team_size]
+    large_team = tables["team_size"][large_sizes[0]] if large_sizes else prior.large_team
+    return ScoringWeights(
+        version, tables["team_size"], large_team, tables["goals"], tables["experience_level"],
+        tables["project_complexity"], challenges=tables["challenges"], metadata=metadata
+    )
+
+
+def fit_weights(store: FeedbackStore, consultant: AgileProjectConsultant, prior: ScoringWeights, version: int,
+                regularization: float = DEFAULT_REGULARIZATION, points_per_star: float = POINTS_PER_STAR,
+                batch_size: int = 100000) -> Tuple[ScoringWeights, Dict]:
+    """Fit new scoring weights from every feedback row in store; return them with a fit report."""
+    features = feature_columns(consultant.collect_project_context())
+    challenge_methodologies = consultant.indexes["challenge_methodologies"]
+    equations = NormalEquations(features, store.answers(), points_per_star)
+    for batch in store.iter_fit_batches(batch_size):
+        equations.add_batch(batch)
+    prior_matrix = weight_matrix(prior, features, challenge_methodologies)
+    fitted = equations.solve(prior_matrix, regularization)
+    metadata = {
+        "fitted_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "feedback_rows": int(equations.rows.sum()),
+        "regularization": regularization,
+        "points_per_star": points_per_star,
+        "prior_version": prior.version
+    }
+    weights = fitted_weights(fitted, features, prior, version, metadata)
+    report = {
+        "rows": int(equations.rows.sum()),
+        "skipped": equations.skipped,
+        "methodologies": {
+            m: {"rows": int(equations.rows[j]),
+                "mean_rating": round(equations.rating_sums[j] / equations.rows[j], 2) if equations.rows[j] else None}
+            for j, m in enumerate(METHODOLOGIES)
+        },
+        "changed_weights": int((weight_matrix(weights, features, challenge_methodologies) != prior_matrix).sum())
+    }
+    return weights, report
+
+
+def next_version(path: str) -> int:
+    """One more than the version of the weights file at path, or 1 if there is none yet."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            version = json.load(f).get("version")
+    except (OSError, ValueError, AttributeError):
+        return 1
+    return version + 1 if version.__class__ is int and version > 0 else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='feedback.db', help='feedback database written by the web app')
+    parser.add_argument('--out', default='scoring_weights.json', help='weights file to write the next version of')
+    parser.add_argument('--prior', default=None, help='weights file to shrink toward (default: built-in weights)')
+    parser.add_argument('--regularization', type=float, default=DEFAULT_REGULARIZATION)
+    parser.add_argument('--points-per-star', type=float, default=POINTS_PER_STAR)
+    parser.add_argument('--batch-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"No feedback database at {args.db}")
+    store = FeedbackStore(args.db)
+    started = time.perf_counter()
+    weights, report = fit_weights(
+        store, AgileProjectConsultant(), load_scoring_weights(args.prior), next_version(args.out),
+        args.regularization, args.points_per_star, args.batch_size
+    )
+    elapsed = time.perf_counter() - started
+    store.close()
+    write_scoring_weights(args.out, weights)
+    print(f"fitted version {weights.version} from {report['rows']} feedback rows in {elapsed:.2f} s "
+          f"({report['skipped']} skipped, {report['changed_weights']} weights changed) -> {args.out}")
+    for methodology, stats in report["methodologies"].items():
+        print(f"  {methodology:<7} {stats['rows']:>9} rows, mean rating {stats['mean_rating']}")
+
+
+if __name__ == '__main__':
+    main()
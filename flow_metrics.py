@@ -0,0 +1,263 @@
+import csv
+import datetime
+import io
+import itertools
+import json
+import warnings
+from typing import Dict, IO, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_STARTED_STATES = ("in progress", "doing", "development", "in development", "in review", "review", "testing")
+DEFAULT_DONE_STATES = ("done", "closed", "resolved", "released", "complete", "completed")
+DEFAULT_DEFECT_TYPES = ("bug", "defect", "incident")
+# Accepted column names in tracker exports, first match wins
+COLUMN_ALIASES = {
+    "item": ("item_id", "id", "key", "issue", "issue_key", "work_item"),
+    "state": ("state", "to_state", "status", "to_status", "column"),
+    "timestamp": ("timestamp", "changed_at", "time", "date", "created"),
+    "type": ("type", "item_type", "issue_type", "work_item_type"),
+}
+SECONDS_PER_DAY = 86400.0
+SECONDS_PER_WEEK = 7 * SECONDS_PER_DAY
+# Log-spaced duration histogram (in days) from one minute to ten years; percentiles are read from it
+HISTOGRAM_EDGES = np.logspace(np.log10(1 / 1440), np.log10(3650), 1201)
+
+
+class DurationHistogram:
+    """Fixed-size histogram of durations, so percentiles cost constant memory however many items complete."""
+
+    def __init__(self):
+        self.counts = np.zeros(HISTOGRAM_EDGES.size + 1, dtype=np.int64)  # Plus underflow and overflow bins
+        self.total = 0.0
+        self.n = 0
+
+    def add(self, days: np.ndarray) -> None:
+        if not days.size:
+            return
+        self.counts += np.bincount(np.searchsorted(HISTOGRAM_EDGES, days, side='right'),
+                                   minlength=self.counts.size)
+        self.total += float(days.sum())
+        self.n += int(days.size)
+
+    def percentile(self, p: float) -> float:
+        rank = int(np.ceil(p / 100 * self.n))
+        index = int(np.searchsorted(np.cumsum(self.counts), max(rank, 1)))
+        # Report the bin's upper edge: accurate to the bin width (about 1.3%)
+        return float(HISTOGRAM_EDGES[min(index, HISTOGRAM_EDGES.size - 1)])
+
+    def summary(self) -> Optional[Dict]:
+        if not self.n:
+            return None
+        return {
+            'mean': round(self.total / self.n, 2),
+            'p50': round(self.percentile(50), 2),
+            'p85': round(self.percentile(85), 2),
+            'p95': round(self.percentile(95), 2)
+        }
+
+
+class FlowMetricsIngestor:
+    """Computes cycle time, lead time, throughput and defect rate from a stream of work-item transitions.
+
+    Each row is one transition: an item id, the state it moved to, a timestamp and optionally the
+    item type. Lead time runs from an item's first event to its first done state; cycle time from
+    its first started state to its first done state. Rows are processed in NumPy chunks and only
+    items still in progress are kept, so memory is bounded by work in progress, not log length.
+    Within a chunk each item's rows are taken in timestamp order; across chunks they are expected
+    in time order. An item that moves out of a done state again starts a new cycle; further done
+    states (say "resolved" then "closed") complete nothing, and neither do done states of an item
+    never seen open. When a `cumulative_flow` engine is given, every chunk is also added to it.
+    """
+
+    def __init__(self, started_states: Sequence[str] = DEFAULT_STARTED_STATES,
+                 done_states: Sequence[str] = DEFAULT_DONE_STATES,
+                 defect_types: Sequence[str] = DEFAULT_DEFECT_TYPES, chunk_size: int = 50000,
+                 cumulative_flow=None):
+        self.started_states = {s.strip().lower() for s in started_states}
+        self.done_states = {s.strip().lower() for s in done_states}
+        self.defect_types = {t.strip().lower() for t in defect_types}
+        self.chunk_size = chunk_size
+        self.cumulative_flow = cumulative_flow
+        self.rows = 0
+        self.skipped_rows = 0
+        self.completed = 0
+        self.completed_defects = 0
+        self.cycle_times = DurationHistogram()
+        self.lead_times = DurationHistogram()
+        self.weekly_throughput = {}  # week index since the epoch -> completed items
+        self._open = {}  # item id -> [first seen, first started or nan, is defect]
+
+    def ingest_rows(self, rows: Iterable[Dict]) -> None:
+        """Consume rows given as dicts keyed by any of COLUMN_ALIASES (e.g. parsed JSON lines)."""
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return
+        columns = _resolve_columns(first.keys())
+        keys = [columns[k] for k in ("item", "state", "timestamp", "type")]
+        self._ingest_table(
+            ([row.get(key, "") if key else "" for key in keys] for row in itertools.chain([first], rows)),
+            [0, 1, 2, 3]
+        )
+
+    def ingest_file(self, stream: IO, file_format: str = "csv") -> None:
+        """Consume a CSV (with a header row) or JSONL export from a binary or text stream."""
+        if not isinstance(stream, io.TextIOBase):
+            stream = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        if file_format == "csv":
+            reader = csv.reader(stream)
+            header = next(reader, None)
+            if header is None:
+                return
+            columns = _resolve_columns(header)
+            positions = {name.strip().lower(): i for i, name in enumerate(header)}
+            self._ingest_table(reader, [positions[columns[k].strip().lower()] if columns[k] else None
+                                        for k in ("item", "state", "timestamp", "type")])
+        elif file_format == "jsonl":
+            self.ingest_rows(json.loads(line) for line in stream if line.strip())
+        else:
+            raise ValueError(f"Unsupported log format: {file_format}")
+
+    def _ingest_table(self, rows: Iterable[Sequence], positions: List[Optional[int]]) -> None:
+        """Consume row sequences in chunks; positions give the item, state, timestamp and (optional) type fields."""
+        item_at, state_at, timestamp_at, type_at = positions
+        width = max(p for p in positions if p is not None) + 1
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.chunk_size))
+            if not batch:
+                return
+            self.rows += len(batch)
+            received = len(batch)
+            batch = [row for row in batch if len(row) >= width]
+            items = [row[item_at] for row in batch]
+            states = [row[state_at] for row in batch]
+            timestamps = [row[timestamp_at] for row in batch]
+            types = [row[type_at] for row in batch] if type_at is not None else [""] * len(batch)
+            keep = [i for i in range(len(batch)) if items[i] not in ("", None) and states[i] not in ("", None)
+                    and timestamps[i] not in ("", None)]
+            self.skipped_rows += received - len(keep)
+            if len(keep) < len(batch):
+                items, states, timestamps, types = ([column[i] for i in keep]
+                                                    for column in (items, states, timestamps, types))
+            if items:
+                self._process_chunk({"item": items, "state": states, "timestamp": timestamps, "type": types})
+
+    def _process_chunk(self, chunk: Dict[str, List]) -> None:
+        timestamps = _parse_timestamps(chunk["timestamp"])
+        if self.cumulative_flow is not None:
+            self.cumulative_flow.add_events(chunk["item"], chunk["state"], timestamps)
+        items, item_index = np.unique(np.asarray(chunk["item"]).astype(str), return_inverse=True)
+        states, state_index = np.unique(np.asarray(chunk["state"]).astype(str), return_inverse=True)
+        states = [state.strip().lower() for state in states.tolist()]  # Only the distinct states
+        started_row = np.isin(states, list(self.started_states))[state_index]
+        done_row = np.isin(states, list(self.done_states))[state_index]
+        types, type_index = np.unique(np.asarray(chunk["type"]).astype(str), return_inverse=True)
+        defect_row = np.isin([t.strip().lower() for t in types.tolist()], list(self.defect_types))[type_index]
+
+        # Walk each item's events in time order: a cycle runs up to the first non-done event after a
+        # done one (a reopen) and is closed by its first done event. A cycle that starts with a done
+        # event for an item not in self._open continues one already closed (or never opened) and is
+        # skipped, so the open items are all the state carried between chunks and results do not
+        # depend on where the chunk boundaries fall
+        order = np.lexsort((timestamps, item_index))
+        item_index, timestamps = item_index[order], timestamps[order]
+        started_row, done_row, defect_row = started_row[order], done_row[order], defect_row[order]
+        cycle_start = np.ones(item_index.size, dtype=bool)
+        cycle_start[1:] = (item_index[1:] != item_index[:-1]) | (done_row[:-1] & ~done_row[1:])
+        starts = np.flatnonzero(cycle_start)
+        first_started = np.minimum.reduceat(np.where(started_row, timestamps, np.inf), starts)
+        first_done = np.minimum.reduceat(np.where(done_row, timestamps, np.inf), starts)
+        is_defect = np.logical_or.reduceat(defect_row, starts)
+
+        done_at, started_at, seen_at, done_defect = [], [], [], []
+        names = items.tolist()
+        for k, first in enumerate(starts.tolist()):
+            item = names[item_index[first]]
+            state = self._open.get(item)
+            if state is None:
+                if done_row[first]:
+                    continue
+                state = self._open[item] = [timestamps[first], np.nan, False]
+            if np.isnan(state[1]) and first_started[k] < np.inf:
+                state[1] = first_started[k]
+            state[2] = state[2] or bool(is_defect[k])
+            if first_done[k] < np.inf:
+                done_at.append(first_done[k])
+                seen_at.append(state[0])
+                started_at.append(state[1])
+                done_defect.append(state[2])
+                del self._open[item]
+
+        if done_at:
+            done_at = np.asarray(done_at)
+            started_at = np.asarray(started_at)
+            self.completed += done_at.size
+            self.completed_defects += int(np.count_nonzero(done_defect))
+            self.lead_times.add(np.maximum(done_at - np.asarray(seen_at), 0) / SECONDS_PER_DAY)
+            has_start = ~np.isnan(started_at)
+            self.cycle_times.add(np.maximum(done_at[has_start] - started_at[has_start], 0) / SECONDS_PER_DAY)
+            weeks, counts = np.unique(np.floor(done_at / SECONDS_PER_WEEK).astype(np.int64), return_counts=True)
+            for week, count in zip(weeks.tolist(), counts.tolist()):
+                self.weekly_throughput[week] = self.weekly_throughput.get(week, 0) + count
+
+    def summary(self) -> Dict:
+        """Return the flow metrics computed so far (durations in days)."""
+        throughput = None
+        if self.weekly_throughput:
+            first, last = min(self.weekly_throughput), max(self.weekly_throughput)
+            weeks = last - first + 1
+            throughput = {
+                'mean': round(self.completed / weeks, 2),
+                'last_week': self.weekly_throughput[last],
+                'weeks': weeks
+            }
+        return {
+            'rows': self.rows,
+            'skipped_rows': self.skipped_rows,
+            'items_completed': self.completed,
+            'open_items': len(self._open),
+            'cycle_time_days': self.cycle_times.summary(),
+            'lead_time_days': self.lead_times.summary(),
+            'throughput_per_week': throughput,
+            'defect_rate': round(self.completed_defects / self.completed, 4) if self.completed else None
+        }
+
+
+def _resolve_columns(names: Iterable[str]) -> Dict[str, Optional[str]]:
+    by_lower = {name.strip().lower(): name for name in names if name}
+    columns = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        columns[column] = next((by_lower[a] for a in aliases if a in by_lower), None)
+        if columns[column] is None and column != "type":
+            raise ValueError(f"Work-item log has no {column} column (expected one of: {', '.join(aliases)})")
+    return columns
+
+
+def _parse_timestamps(values: List) -> np.ndarray:
+    """Convert epoch seconds or ISO 8601 strings to float epoch seconds, vectorized where possible."""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except ValueError:
+        pass
+    if not all(isinstance(v, str) for v in values):
+        return np.asarray([v if isinstance(v, (int, float)) else _parse_timestamp(v) for v in values], dtype=np.float64)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # NumPy warns about (but applies) UTC offsets
+            parsed = np.asarray(values, dtype="datetime64[ms]")
+        return parsed.astype(np.int64) / 1000.0
+    except ValueError:
+        return np.asarray([_parse_timestamp(v) for v in values])
+
+
+def _parse_timestamp(value) -> float:
+    try:
+        parsed = datetime.datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Unrecognized timestamp: {value!r}") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
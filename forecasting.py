@@ -0,0 +1,274 @@
+import datetime
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+FORECAST_PERCENTILES = (50, 85, 95)
+DEFAULT_TRIALS = 100000
+MAX_TRIALS = 1000000
+MAX_HORIZON_STEPS = 100000  # Sprints or items walked one by one per trial before a forecast is declared unreachable
+MAX_HORIZON_DAYS = 100 * 365  # Expected forecast horizon; anything longer is not a meaningful forecast
+MAX_DRAWS_PER_TRIAL = 10 ** 9  # Expected sprints or items drawn per trial within that horizon
+CHUNK_CELLS = 4000000  # Upper bound on trials x steps drawn at once, to keep memory flat
+MULTINOMIAL_DRAWS_PER_VALUE = 12  # Past this many draws per distinct value, one multinomial draw beats summing
+
+
+def _draws_to_reach(rng: np.random.Generator, samples: np.ndarray, target: float, trials: int) -> np.ndarray:
+    """For each trial, the number of draws (with replacement) whose running sum first reaches target."""
+    mean, std = float(samples.mean()), float(samples.std())
+    expected = target / mean
+    # Jump straight past the draws that almost surely fall short, using one aggregated draw per trial
+    skip = max(0, int(expected - 4 * np.sqrt(expected) * std / mean) - 1)
+    totals = _sum_of_draws(rng, samples, skip, trials)
+    counts = np.empty(trials, dtype=np.int64)
+    early = totals >= target
+    if early.any():
+        # Rare: these trials may have reached the target before `skip` draws, so walk them from the start
+        counts[early] = _walk(rng, samples, target, np.zeros(int(early.sum())), 0)
+    counts[~early] = _walk(rng, samples, target, totals[~early], skip)
+    return counts
+
+
+def _walk(rng: np.random.Generator, samples: np.ndarray, target: float, totals: np.ndarray, offset: int) -> np.ndarray:
+    """Draw one sample at a time (vectorized across trials) from running totals until each reaches target."""
+    counts = np.empty(totals.size, dtype=np.int64)
+    if not totals.size:
+        return counts
+    mean, std = float(samples.mean()), float(samples.std())
+    remaining = max(0.0, target - float(totals.mean())) / mean
+    # Enough steps for nearly every trial to finish in one pass; stragglers take another
+    horizon = max(1, min(MAX_HORIZON_STEPS, int(np.ceil(remaining + 2 * np.sqrt(remaining) * std / mean)) + 2))
+    chunk = max(1, CHUNK_CELLS // horizon)
+    for start in range(0, totals.size, chunk):
+        running_totals = totals[start:start + chunk].copy()
+        chunk_counts = np.empty(running_totals.size, dtype=np.int64)
+        active = np.arange(running_totals.size)
+        steps = 0
+        while active.size:
+            if steps >= MAX_HORIZON_STEPS:
+                raise ValueError("Forecast horizon is too long for this history; check the input values.")
+            draws = samples[rng.integers(0, samples.size, size=(active.size, horizon))]
+            running = running_totals[active, None] + np.cumsum(draws, axis=1)
+            reached = running[:, -1] >= target
+            first = np.argmax(running >= target, axis=1)
+            chunk_counts[active[reached]] = offset + steps + first[reached] + 1
+            running_totals[active] = running[:, -1]
+            active = active[~reached]
+            steps += horizon
+        counts[start:start + running_totals.size] = chunk_counts
+    return counts
+
+
+def _sum_of_draws(rng: np.random.Generator, samples: np.ndarray, draws: int, trials: int) -> np.ndarray:
+    """For each trial, the sum of `draws` samples drawn with replacement.
+
+    Long sums are drawn as multinomial counts over the distinct sample values, so the cost
+    depends on the number of distinct values rather than on `draws`.
+    """
+    totals = np.zeros(trials)
+    if draws <= 0:
+        return totals
+    values, frequencies = np.unique(samples, return_counts=True)
+    if draws > MULTINOMIAL_DRAWS_PER_VALUE * values.size:
+        probabilities = frequencies / frequencies.sum()
+        chunk = max(1, CHUNK_CELLS // values.size)
+        for start in range(0, trials, chunk):
+            size = min(chunk, trials - start)
+            totals[start:start + size] = rng.multinomial(draws, probabilities, size=size) @ values
+        return totals
+    block = max(1, CHUNK_CELLS // trials)
+    for start in range(0, draws, block):
+        width = min(block, draws - start)
+        totals += samples[rng.integers(0, samples.size, size=(trials, width))].sum(axis=1)
+    return totals
+
+
+def _percentile(sorted_outcomes: np.ndarray, p: float) -> float:
+    """Nearest-rank percentile: the outcome that p% of trials are at or below."""
+    index = min(sorted_outcomes.size - 1, max(0, int(np.ceil(p / 100 * sorted_outcomes.size)) - 1))
+    return float(sorted_outcomes[index])
+
+
+def _validated_samples(values, name: str) -> np.ndarray:
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"'{name}' must be a non-empty list of numbers.")
+    try:
+        samples = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must contain only numbers.") from None
+    if not np.all(np.isfinite(samples)) or np.any(samples < 0):
+        raise ValueError(f"'{name}' must contain only non-negative numbers.")
+    if samples.sum() <= 0:
+        raise ValueError(f"'{name}' must contain at least one value above zero.")
+    return samples
+
+
+class ForecastEngine:
+    """Monte Carlo delivery forecasts from historical velocity or cycle-time samples.
+
+    Two questions are answered at P50/P85/P95:
+    - "when": how long until `items` more items are done (sprints/days, plus a date);
+    - "how_many": how many items will be done within `days` (or by `target_date`).
+    Velocity samples are items per sprint; cycle-time samples are days per item, worked
+    `wip` at a time. Trials are seeded from the request so identical inputs always give
+    identical answers, and the last `cache_size` answers are cached by their inputs.
+    """
+
+    def __init__(self, cache_size: int = 256):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def forecast(self, request: Dict, today: Optional[datetime.date] = None) -> Dict:
+        """Validate a forecast request (see the class docstring) and return its percentiles, using the cache."""
+        today = today or datetime.date.today()
+        spec = self._normalize(request, today)
+        key = hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        result = self._simulate(spec, np.random.default_rng(int(key[:16], 16)))
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _normalize(self, request: Dict, today: datetime.date) -> Dict:
+        if not isinstance(request, dict):
+            raise ValueError("Forecast request must be a JSON object.")
+        if ('velocities' in request) == ('cycle_times' in request):
+            raise ValueError("Provide exactly one of 'velocities' (items per sprint) or 'cycle_times' (days per item).")
+        mode = 'velocity' if 'velocities' in request else 'cycle_time'
+        samples = _validated_samples(request['velocities' if mode == 'velocity' else 'cycle_times'],
+                                     'velocities' if mode == 'velocity' else 'cycle_times')
+        trials = _positive_int(request.get('trials', DEFAULT_TRIALS), 'trials')
+        if trials > MAX_TRIALS:
+            raise ValueError(f"'trials' cannot exceed {MAX_TRIALS}.")
+        start_date = _parse_date(request.get('start_date'), 'start_date') or today
+        spec = {'mode': mode, 'samples': samples.tolist(), 'trials': trials, 'start_date': start_date.isoformat()}
+        if mode == 'velocity':
+            spec['sprint_length_days'] = _positive_int(request.get('sprint_length_days', 14), 'sprint_length_days')
+        else:
+            spec['wip'] = _positive_int(request.get('wip', 1), 'wip')
+
+        if 'items' in request:
+            spec['question'] = 'when'
+            spec['items'] = _positive_int(request['items'], 'items')
+        elif 'days' in request or 'target_date' in request:
+            spec['question'] = 'how_many'
+            target_date = _parse_date(request.get('target_date'), 'target_date')
+            days = (target_date - start_date).days if target_date else request['days']
+            spec['days'] = _positive_int(days, 'days' if not target_date else 'target_date (days from start)')
+        else:
+            raise ValueError("Provide 'items' to forecast a completion date, or 'days'/'target_date' to forecast items.")
+        draws, days = _expected_horizon(spec, float(samples.mean()))
+        if not (draws <= MAX_DRAWS_PER_TRIAL and days <= MAX_HORIZON_DAYS):
+            raise ValueError("Forecast horizon is too long for this history; check the input values.")
+        return spec
+
+    def _simulate(self, spec: Dict, rng: np.random.Generator) -> Dict:
+        samples = np.asarray(spec['samples'], dtype=np.float64)
+        trials = spec['trials']
+        start_date = datetime.date.fromisoformat(spec['start_date'])
+        percentiles = {}
+        if spec['question'] == 'when':
+            if spec['mode'] == 'velocity':
+                sprints = np.sort(_draws_to_reach(rng, samples, spec['items'], trials))
+                for p in FORECAST_PERCENTILES:
+                    count = int(_percentile(sprints, p))
+                    days = count * spec['sprint_length_days']
+                    percentiles[f'P{p}'] = {'sprints': count, 'days': days,
+                                            'date': _date_after(start_date, days)}
+            else:
+                durations = np.sort(_sum_of_draws(rng, samples, spec['items'], trials) / spec['wip'])
+                for p in FORECAST_PERCENTILES:
+                    days = int(np.ceil(_percentile(durations, p)))
+                    percentiles[f'P{p}'] = {'days': days,
+                                            'date': _date_after(start_date, days)}
+        else:
+            if spec['mode'] == 'velocity':
+                sprints = spec['days'] // spec['sprint_length_days']
+                done = _sum_of_draws(rng, samples, sprints, trials)
+            else:
+                # Items whose cumulative cycle time fits in the capacity of `wip` parallel lanes
+                budget = float(np.nextafter(spec['days'] * spec['wip'], np.inf))
+                done = _draws_to_reach(rng, samples, budget, trials) - 1
+            done = np.sort(done)
+            for p in FORECAST_PERCENTILES:
+                # P85 means 85% of trials finish at least this many items
+                percentiles[f'P{p}'] = {'items': int(np.floor(_percentile(done, 100 - p)))}
+        return {
+            'question': spec['question'],
+            'mode': spec['mode'],
+            'trials': trials,
+            'start_date': spec['start_date'],
+            'percentiles': percentiles
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'cached': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+def _expected_horizon(spec: Dict, mean: float) -> Tuple[float, float]:
+    """(samples each trial is expected to draw, days it is expected to span); inf when either overflows."""
+    try:
+        if spec['question'] == 'how_many':
+            if spec['mode'] == 'velocity':
+                return float(spec['days'] // spec['sprint_length_days']), float(spec['days'])
+            return spec['days'] * spec['wip'] / mean, float(spec['days'])
+        if spec['mode'] == 'velocity':
+            sprints = spec['items'] / mean
+            return sprints, sprints * spec['sprint_length_days']
+        return float(spec['items']), spec['items'] * mean / spec['wip']
+    except OverflowError:
+        return float('inf'), float('inf')
+
+
+def _date_after(start_date: datetime.date, days: int) -> str:
+    try:
+        return (start_date + datetime.timedelta(days=days)).isoformat()
+    except OverflowError:
+        raise ValueError("Forecast horizon is too long for this history; check the input values.") from None
+
+
+def _positive_int(value, name: str) -> int:
+    if (isinstance(value, bool) or not isinstance(value, (int, float))
+            or (isinstance(value, float) and not np.isfinite(value))
+            or value != int(value) or value < 1):
+        raise ValueError(f"'{name}' must be a positive whole number.")
+    return int(value)
+
+
+def _parse_date(value, name: str) -> Optional[datetime.date]:
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"'{name}' must be a date in YYYY-MM-DD format.") from None
+
+
+def describe_forecast(result: Dict) -> str:
+    """Summarize a forecast in one sentence for the chat view."""
+    percentiles: Dict[str, Dict] = result['percentiles']
+    parts: List[str] = []
+    for label, outcome in percentiles.items():
+        if result['question'] == 'when':
+            parts.append(f"{label}: {outcome['date']}")
+        else:
+            parts.append(f"{label}: {outcome['items']} items")
+    if result['question'] == 'when':
+        return f"Projected completion ({result['trials']} simulated runs) - " + ", ".join(parts) + "."
+    return f"Projected items done ({result['trials']} simulated runs) - " + ", ".join(parts) + "."
@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from agile_consultant import AgileProjectConsultant, build_knowledge_snapshot
+
+
+class KnowledgeBaseReloader:
+    """Watches the consultant's knowledge-base file and hot-swaps a recompiled snapshot when it changes.
+
+    Compilation happens on the watcher thread; requests only ever read the consultant's current
+    snapshot reference, so they never wait on a reload. A file that fails to load or validate is
+    logged and skipped, and the previous snapshot stays live until the file changes again. The
+    fitted scoring-weights file (AGILE_SCORING_WEIGHTS) is watched and swapped the same way.
+    """
+
+    def __init__(self, consultant: AgileProjectConsultant, poll_interval: float = 2.0):
+        self.consultant = consultant
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self.last_error = None
+        self.last_reload_at = None
+        self.weights_reloads = 0
+        self.weights_error = None
+        self._signature = None
+        self._check_lock = threading.Lock()  # Serializes reloads; readers never take it
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.consultant.knowledge_base_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> bool:
+        """Reload the knowledge base and scoring weights if their files changed; return True if a new version went live."""
+        with self._check_lock:
+            weights_reloaded = self._check_scoring_weights()
+            return self._check() or weights_reloaded
+
+    def _check_scoring_weights(self) -> bool:
+        current = self.consultant.scoring_weights
+        try:
+            if not self.consultant.reload_scoring_weights():
+                return False
+        except Exception as e:
+            self.weights_error = str(e)
+            logging.error(f"Scoring weights reload failed; keeping version {current.version}: {str(e)}")
+            return False
+        self.weights_reloads += 1
+        self.weights_error = None
+        logging.info(f"Scoring weights version {self.consultant.scoring_weights.version} are live")
+        return True
+
+    def _check(self) -> bool:
+        signature = self._file_signature()
+        if self._signature is None:
+            # First check: record the file the current snapshot was (or is about to be) built from
+            self._signature = signature
+            self.consultant.snapshot
+            return False
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        current = self.consultant.snapshot
+        try:
+            snapshot = build_knowledge_snapshot(
+                self.consultant.knowledge_base_path, current.version + 1, self.consultant.index_cache_path
+            )
+        except Exception as e:
+            self.last_error = str(e)
+            logging.error(f"Knowledge base reload failed; keeping version {current.version}: {str(e)}")
+            return False
+        if snapshot.fingerprint == current.fingerprint:
+            return False  # Touched but unchanged
+        self.consultant.swap_snapshot(snapshot)
+        self.reloads += 1
+        self.last_error = None
+        self.last_reload_at = time.time()
+        logging.info(f"Knowledge base version {snapshot.version} is live ({snapshot.fingerprint[:12]})")
+        return True
+
+    def start(self) -> None:
+        """Poll for changes on a daemon thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='knowledge-reloader', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"Knowledge base watcher error: {str(e)}")
+            if self._stop.wait(self.poll_interval):
+                return
+
+    def status(self) -> Dict:
+        snapshot = self.consultant.snapshot
+        return {
+            'version': snapshot.version,
+            'fingerprint': snapshot.fingerprint,
+            'source': snapshot.source,
+            'reloads': self.reloads,
+            'last_reload_at': self.last_reload_at,
+            'last_error': self.last_error,
+            'scoring_weights': {
+                'version': self.consultant.scoring_weights.version,
+                'path': self.consultant.scoring_weights_path,
+                'reloads': self.weights_reloads,
+                'last_error': self.weights_error
+            },
+            'watching': self._thread is not None and not self._stop.is_set()
+        }
@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from agile_consultant import (
+    KNOWLEDGE_BASE_SECTIONS, AgileProjectConsultant, KnowledgeSnapshot, compile_knowledge_indexes,
+    knowledge_base_fingerprint
+)
+from singleflight import SingleFlight
+
+# Sections a tenant file may override; anything else in the file is ignored
+TENANT_SECTIONS = KNOWLEDGE_BASE_SECTIONS
+# Tenant ids double as file names, so keep them to a safe alphabet
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class UnknownTenantError(LookupError):
+    """Raised when a tenant id is malformed or has no knowledge-base file."""
+
+
+class TenantKnowledgeBases:
+    """Per-tenant knowledge bases, loaded on demand from ``<directory>/<tenant>.json``.
+
+    A tenant file overrides the built-in knowledge base entry by entry within each of
+    TENANT_SECTIONS; a ``null`` entry removes the built-in one. Entries are deduplicated
+    across tenants (identical entries share one object), and at most `max_tenants`
+    compiled knowledge bases are kept, least recently used first out. A tenant snapshot
+    carries the version of the built-in snapshot it was merged onto and is rebuilt once
+    the built-in knowledge base is reloaded.
+    """
+
+    def __init__(self, directory: str, base_consultant: AgileProjectConsultant, max_tenants: int = 64):
+        self.directory = directory
+        self.base_consultant = base_consultant
+        self.max_tenants = max_tenants
+        self._tenants = OrderedDict()  # tenant -> KnowledgeSnapshot
+        self._lock = threading.Lock()
+        self._loads = SingleFlight()
+        self._entries = {}  # entry fingerprint -> [entry, number of cached tenants using it]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, tenant: str) -> KnowledgeSnapshot:
+        """Return the snapshot for tenant, loading it if it is not cached or its base has been reloaded."""
+        base = self.base_consultant.snapshot
+        with self._lock:
+            cached = self._tenants.get(tenant)
+            if cached is not None and cached.version == base.version:
+                self._tenants.move_to_end(tenant)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        # Concurrent first requests for one tenant share a single load
+        loaded, _ = self._loads.do((tenant, base.version), lambda: self._load(tenant, base))
+        return loaded
+
+    def consultant_for(self, tenant: Optional[str]) -> AgileProjectConsultant:
+        """Return a view of the base consultant pinned to the tenant's snapshot, or to the built-in one."""
+        if not tenant:
+            return self.base_consultant.pinned()
+        return self.base_consultant.with_snapshot(self.get(tenant))
+
+    def _load(self, tenant: str, base: KnowledgeSnapshot) -> KnowledgeSnapshot:
+        if not TENANT_ID_PATTERN.match(tenant):
+            raise UnknownTenantError(f"Invalid tenant id: {tenant!r}")
+        path = os.path.join(self.directory, f"{tenant}.json")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                overrides = json.load(f)
+        except FileNotFoundError:
+            raise UnknownTenantError(f"Unknown tenant: {tenant}") from None
+        except ValueError as e:
+            raise ValueError(f"Knowledge base for tenant {tenant} is not valid JSON: {str(e)}") from None
+        if not isinstance(overrides, dict):
+            raise ValueError(f"Knowledge base for tenant {tenant} must be a JSON object")
+        for section in TENANT_SECTIONS:
+            if not isinstance(overrides.get(section) or {}, dict):
+                raise ValueError(f"Knowledge base for tenant {tenant}: '{section}' must be an object")
+
+        knowledge_base = {}
+        with self._lock:
+            for section in TENANT_SECTIONS:
+                entries = dict(base.knowledge_base.get(section, {}))
+                for key, entry in (overrides.get(section) or {}).items():
+                    if entry is None:
+                        entries.pop(key, None)
+                    else:
+                        entries[key] = entry
+                knowledge_base[section] = {key: self._share(entry) for key, entry in entries.items()}
+        indexes = compile_knowledge_indexes(knowledge_base)
+        loaded = KnowledgeSnapshot(base.version, knowledge_base, indexes, knowledge_base_fingerprint(knowledge_base), path)
+
+        with self._lock:
+            stale = self._tenants.pop(tenant, None)
+            if stale is not None:
+                self._release(stale.knowledge_base)
+            self._tenants[tenant] = loaded
+            while len(self._tenants) > self.max_tenants:
+                _, evicted = self._tenants.popitem(last=False)
+                self._release(evicted.knowledge_base)
+                self.evictions += 1
+        logging.info(f"Loaded knowledge base for tenant {tenant}")
+        return loaded
+
+    def _share(self, entry):
+        """Return the canonical copy of entry, counting one more tenant that uses it."""
+        key = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+        shared = self._entries.get(key)
+        if shared is None:
+            shared = self._entries[key] = [entry, 0]
+        shared[1] += 1
+        return shared[0]
+
+    def _release(self, knowledge_base: Dict) -> None:
+        for entries in knowledge_base.values():
+            for entry in entries.values():
+                key = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+                shared = self._entries.get(key)
+                if shared is not None:
+                    shared[1] -= 1
+                    if shared[1] <= 0:
+                        del self._entries[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'cached_tenants': list(self._tenants),
+                'max_tenants': self.max_tenants,
+                'shared_entries': len(self._entries),
+                'entry_references': sum(count for _, count in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
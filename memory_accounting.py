@@ -0,0 +1,201 @@
+import ast
+import os
+import sys
+import threading
+import tracemalloc
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from records import Record
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Modules whose allocations are attributed to a consultant subsystem; everything else is grouped by package
+SUBSYSTEM_MODULES = (
+    'agile_consultant', 'app', 'session_store', 'conversation_archive', 'records', 'memory_accounting',
+    'knowledge_tenants', 'knowledge_reloader', 'admission', 'singleflight', 'warmup', 'analytics_export',
+    'assessment_stats', 'assessment_schema', 'forecasting', 'flow_metrics', 'cumulative_flow', 'wip_simulator',
+    'team_topology', 'sensitivity', 'portfolio', 'worker_pool', 'scoring_weights', 'feedback_store', 'fit_weights'
+)
+
+
+def approx_size(obj, _seen: Optional[set] = None) -> int:
+    """Approximate the deep size in bytes of plain data (dicts, lists, strings, records)."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, seen) + approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item, seen) for item in obj)
+    elif isinstance(obj, Record):
+        size += sum(approx_size(getattr(obj, field), seen) for field in obj.__slots__)
+    return size
+
+
+class SessionMemoryTracker:
+    """Approximate bytes held on behalf of each session, by category (history, context, recommendations).
+
+    Each category is a gauge replaced on update; the app sets "history" from the session's own stored
+    history whenever it is saved, so concurrent requests are never charged for each other's turns.
+    Only the `max_sessions` most recently active sessions are kept.
+    """
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # session_id -> {category: bytes}
+        self._lock = threading.Lock()
+
+    def add(self, session_id: str, category: str, nbytes: int) -> None:
+        with self._lock:
+            usage = self._touch(session_id)
+            usage[category] = usage.get(category, 0) + nbytes
+
+    def set(self, session_id: str, category: str, nbytes: int) -> None:
+        with self._lock:
+            self._touch(session_id)[category] = nbytes
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _touch(self, session_id: str) -> Dict[str, int]:
+        usage = self._sessions.get(session_id)
+        if usage is None:
+            usage = self._sessions[session_id] = {}
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return usage
+
+    def report(self, top: int = 20) -> Dict:
+        """Return per-category totals and the `top` sessions by approximate bytes."""
+        with self._lock:
+            sessions = [(sid, dict(usage)) for sid, usage in self._sessions.items()]
+        totals = {}
+        for _, usage in sessions:
+            for category, nbytes in usage.items():
+                totals[category] = totals.get(category, 0) + nbytes
+        sessions.sort(key=lambda item: sum(item[1].values()), reverse=True)
+        return {
+            'tracked_sessions': len(sessions),
+            'totals': totals,
+            'top_sessions': [
+                {'session_id': sid, 'bytes': sum(usage.values()), 'by_category': usage}
+                for sid, usage in sessions[:top]
+            ]
+        }
+
+
+class TracemallocProfiler:
+    """Takes tracemalloc snapshots and diffs them grouped by consultant subsystem (module.function)."""
+
+    def __init__(self, nframes: int = 25):
+        self.nframes = nframes
+        self._previous = None
+        self._lock = threading.Lock()
+        self._function_ranges = {}  # filename -> [(start, end, qualified name)]
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.nframes)
+            self._previous = None
+
+    def stop(self) -> None:
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+
+    def snapshot(self, top: int = 25) -> Dict:
+        """Take a snapshot and return current usage and growth since the previous snapshot, by subsystem."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc is not running; start it first")
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+            current = self._group(snapshot)
+            previous, self._previous = self._previous, current
+        growth = []
+        if previous is not None:
+            for subsystem in set(current) | set(previous):
+                size, count = current.get(subsystem, (0, 0))
+                old_size, old_count = previous.get(subsystem, (0, 0))
+                if size != old_size or count != old_count:
+                    growth.append({'subsystem': subsystem, 'size_diff': size - old_size,
+                                   'count_diff': count - old_count, 'size': size})
+            growth.sort(key=lambda item: abs(item['size_diff']), reverse=True)
+        usage = sorted(({'subsystem': s, 'size': size, 'count': count} for s, (size, count) in current.items()),
+                       key=lambda item: item['size'], reverse=True)
+        traced, peak = tracemalloc.get_traced_memory()
+        return {
+            'traced_bytes': traced,
+            'peak_bytes': peak,
+            'usage': usage[:top],
+            'growth': growth[:top] if previous is not None else None
+        }
+
+    def _group(self, snapshot) -> Dict[str, tuple]:
+        groups = {}
+        for stat in snapshot.statistics('traceback'):
+            subsystem = self._subsystem(stat.traceback)
+            size, count = groups.get(subsystem, (0, 0))
+            groups[subsystem] = (size + stat.size, count + stat.count)
+        return groups
+
+    def _subsystem(self, traceback) -> str:
+        # Attribute to the innermost frame inside this project, else to the innermost frame's package
+        for frame in reversed(traceback):
+            module = os.path.splitext(os.path.basename(frame.filename))[0]
+            if module in SUBSYSTEM_MODULES and os.path.dirname(os.path.abspath(frame.filename)) == ROOT:
+                function = self._function_at(frame.filename, frame.lineno)
+                return f"{module}.{function}" if function else module
+        filename = traceback[-1].filename if len(traceback) else '<unknown>'
+        return _package_of(filename)
+
+    def _function_at(self, filename: str, lineno: int) -> Optional[str]:
+        ranges = self._function_ranges.get(filename)
+        if ranges is None:
+            ranges = self._function_ranges[filename] = _function_ranges(filename)
+        best = None
+        for start, end, name in ranges:
+            if start <= lineno <= end and (best is None or start >= best[0]):
+                best = (start, name)
+        return best[1] if best else None
+
+
+def _function_ranges(filename: str) -> List[tuple]:
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError):
+        return []
+    ranges = []
+
+    def visit(node, prefix):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                name = f"{prefix}{child.name}"
+                if not isinstance(child, ast.ClassDef):
+                    ranges.append((child.lineno, child.end_lineno, name))
+                visit(child, f"{name}.")
+
+    visit(tree, '')
+    return ranges
+
+
+def _package_of(filename: str) -> str:
+    parts = os.path.normpath(filename).split(os.sep)
+    if 'site-packages' in parts:
+        index = parts.index('site-packages')
+        if index + 1 < len(parts):
+            return os.path.splitext(parts[index + 1])[0]
+    return os.path.splitext(os.path.basename(filename))[0] or '<unknown>'
@@ -0,0 +1,160 @@
+import json
+import threading
+from collections import Counter
+from concurrent.futures import as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agile_consultant import AgileProjectConsultant, KnowledgeSnapshot
+from assessment_schema import AssessmentSchema
+from records import dumps
+from worker_pool import LazyProcessPool
+
+MAX_TEAMS = 1000
+BATCH_SIZE = 8  # Teams per pool task: small enough that results stream steadily
+INLINE_TEAMS = 8  # Portfolios this small are assessed in the request thread
+SHARED_SHARE = 0.5  # A tool or metric recommended to at least this share of teams is "shared"
+OUTLIER_SHARE = 0.1  # A methodology recommended to at most this share of teams marks its teams as outliers
+OUTLIER_STDEVS = 2.0
+
+_worker_consultants: Dict[str, AgileProjectConsultant] = {}  # Per process, by knowledge-base fingerprint
+# Small portfolios run _assess_batch in request threads, so the cache is shared with other requests
+_worker_consultants_lock = threading.Lock()
+
+
+def _assess_batch(snapshot: KnowledgeSnapshot, batch: List[Tuple[int, str, Dict]]) -> List[Dict]:
+    """Worker entry point: full recommendations for (index, name, context) teams, as plain JSON data."""
+    with _worker_consultants_lock:
+        consultant = _worker_consultants.get(snapshot.fingerprint)
+        if consultant is None:
+            consultant = AgileProjectConsultant()
+            consultant.swap_snapshot(snapshot)
+            _worker_consultants.clear()  # Only the latest knowledge base is worth keeping
+            _worker_consultants[snapshot.fingerprint] = consultant
+        try:
+            consultant.reload_scoring_weights()  # Follow a refit the server has picked up too
+        except Exception:
+            pass  # Keep the previous weights, as the server does
+    results = []
+    for index, name, context in batch:
+        try:
+            recommendations = consultant.with_context(dict(context)).generate_full_recommendations()
+            results.append({'index': index, 'team': name, 'context': context,
+                            'recommendations': json.loads(dumps(recommendations))})
+        except Exception as e:
+            results.append({'index': index, 'team': name, 'error': f'Failed to assess team: {str(e)}'})
+    return results
+
+
+class PortfolioSummary:
+    """Aggregate view over many teams' recommendations, built up as team results arrive."""
+
+    def __init__(self):
+        self.teams = 0
+        self.failed = 0
+        self.methodologies = Counter()
+        self.challenges = Counter()
+        self.goals = Counter()
+        self.tools = Counter()
+        self.metrics = Counter()
+        self._profiles = []  # (index, team, methodology, number of challenges) for outlier detection
+
+    def add(self, result: Dict) -> None:
+        if 'error' in result:
+            self.failed += 1
+            return
+        self.teams += 1
+        recommendations, context = result['recommendations'], result['context']
+        methodology = recommendations['methodology']['name']
+        challenges = context.get('challenges', [])
+        challenges = challenges if isinstance(challenges, list) else []
+        goals = context.get('goals', [])
+        self.methodologies[methodology] += 1
+        self.challenges.update(challenges)
+        self.goals.update(goals if isinstance(goals, list) else [])
+        self.tools.update({tool['recommendation'] for tool in recommendations['tools']})
+        self.metrics.update({metric['metric'] for metric in recommendations['metrics']})
+        self._profiles.append((result['index'], result['team'], methodology, len(challenges)))
+
+    def _shared(self, counter: Counter) -> List[Dict]:
+        return [{'name': name, 'teams': count, 'share': round(count / self.teams, 3)}
+                for name, count in counter.most_common() if count >= SHARED_SHARE * self.teams]
+
+    def outliers(self) -> List[Dict]:
+        """Teams recommended a rare methodology, or carrying far more challenges than their peers."""
+        if self.teams < 2:
+            return []
+        loads = [load for _, _, _, load in self._profiles]
+        mean = sum(loads) / len(loads)
+        spread = (sum((load - mean) ** 2 for load in loads) / len(loads)) ** 0.5
+        outliers = []
+        for index, team, methodology, load in sorted(self._profiles):
+            reasons = []
+            if self.methodologies[methodology] <= OUTLIER_SHARE * self.teams:
+                reasons.append(f"{methodology} is recommended to only {self.methodologies[methodology]} of {self.teams} teams")
+            if spread and load > mean + OUTLIER_STDEVS * spread:
+                reasons.append(f"{load} challenges against a portfolio average of {mean:.1f}")
+            if reasons:
+                outliers.append({'index': index, 'team': team, 'methodology': methodology, 'reasons': reasons})
+        return outliers
+
+    def report(self) -> Dict:
+        return {
+            'teams': self.teams,
+            'failed': self.failed,
+            'methodology_mix': {
+                name: {'teams': count, 'share': round(count / self.teams, 3)}
+                for name, count in self.methodologies.most_common()
+            },
+            'common_challenges': dict(self.challenges.most_common(10)),
+            'common_goals': dict(self.goals.most_common(10)),
+            'shared_tools': self._shared(self.tools),
+            'shared_metrics': self._shared(self.metrics),
+            'outliers': self.outliers()
+        }
+
+
+def parse_teams(request: Dict, schema: Optional[AssessmentSchema] = None) -> List[Tuple[int, str, Dict]]:
+    """Validate a portfolio request: `teams` is a list of {"name", "context"} objects (or bare contexts).
+
+    With a `schema`, each non-empty context is checked like an assessment submission.
+    """
+    teams = request.get('teams') if isinstance(request, dict) else None
+    if not isinstance(teams, list) or not teams or len(teams) > MAX_TEAMS:
+        raise ValueError(f"'teams' must be a list of 1 to {MAX_TEAMS} team contexts.")
+    parsed = []
+    for index, team in enumerate(teams):
+        if not isinstance(team, dict):
+            raise ValueError(f"Team {index + 1} must be an object.")
+        context = team.get('context', team if 'name' not in team else {})
+        if not isinstance(context, dict):
+            raise ValueError(f"Team {index + 1}: 'context' must be an object of assessment answers.")
+        error = schema.validate(context) if schema is not None and context else None
+        if error:
+            raise ValueError(f"Team {index + 1}: {error}")
+        parsed.append((index, str(team.get('name') or f"Team {index + 1}"), context))
+    return parsed
+
+
+class PortfolioAssessor:
+    """Runs full recommendations for many teams on a process pool, yielding each result as it completes."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.pool = LazyProcessPool(max_workers, preload=['portfolio'])
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def assess(self, snapshot: KnowledgeSnapshot, teams: List[Tuple[int, str, Dict]]) -> Iterator[Dict]:
+        """Yield one result per team in completion order; results carry the team's input index."""
+        if len(teams) <= INLINE_TEAMS:
+            yield from _assess_batch(snapshot, teams)
+            return
+        executor = self.pool.executor()
+        futures = [executor.submit(_assess_batch, snapshot, teams[i:i + BATCH_SIZE])
+                   for i in range(0, len(teams), BATCH_SIZE)]
+        try:
+            for future in as_completed(futures):
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()  # The client went away: drop batches that have not started
@@ -0,0 +1,100 @@
+import json
+import sys
+from typing import Dict, List
+
+
+class Record:
+    """Base for compact, slotted records that stand in for small dicts.
+
+    Records support read-only dict-style access (``rec["practice"]``, ``rec.get(...)``,
+    ``"key" in rec``) so existing callers keep working, and serialize to exactly the dict
+    they replace via ``as_dict()`` or the ``json_default`` hook.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def as_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.as_dict() == other.as_dict()
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{k}={getattr(self, k)!r}' for k in self.__slots__)})"
+
+
+class Message(Record):
+    """One conversation turn; roles are interned so every turn shares the same role string."""
+    __slots__ = ("role", "content")
+
+    def __init__(self, role: str, content: str):
+        self.role = sys.intern(role)
+        self.content = content
+
+
+class PracticeRecommendation(Record):
+    __slots__ = ("practice", "description", "implementation_tips")
+
+    def __init__(self, practice: str, description: str, implementation_tips: List[str]):
+        self.practice = sys.intern(practice)
+        self.description = description
+        self.implementation_tips = implementation_tips
+
+
+class ToolRecommendation(Record):
+    __slots__ = ("category", "recommendation", "description")
+
+    def __init__(self, category: str, recommendation: str, description: str):
+        self.category = sys.intern(category)
+        self.recommendation = sys.intern(recommendation)
+        self.description = description
+
+
+class MetricRecommendation(Record):
+    __slots__ = ("metric", "description", "how_to_measure", "tips")
+
+    def __init__(self, metric: str, description: str, how_to_measure: str, tips: List[str]):
+        self.metric = sys.intern(metric)
+        self.description = description
+        self.how_to_measure = how_to_measure
+        self.tips = tips
+
+
+class ChallengeRecommendation(Record):
+    __slots__ = ("challenge", "recommendations")
+
+    def __init__(self, challenge: str, recommendations: List[str]):
+        self.challenge = challenge
+        self.recommendations = recommendations
+
+
+def json_default(obj):
+    """``default`` hook for json.dump(s): encode records as the dicts they replace."""
+    if isinstance(obj, Record):
+        return obj.as_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, default=json_default)
+
+
+def dumps(obj) -> str:
+    """Serialize a structure that may contain records to JSON, reusing one encoder."""
+    return _encoder.encode(obj)
@@ -0,0 +1,104 @@
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+# Tables of a weights file, keyed by the assessment question whose answers they score
+WEIGHT_TABLES = ("team_size", "challenges", "goals", "experience_level", "project_complexity")
+
+
+class ScoringWeights:
+    """Points each assessment answer adds to each methodology's score.
+
+    The built-in weights (version 0) are the hand-picked tables in agile_consultant; they leave
+    `challenges` unset and add `challenge_weight` for every methodology whose knowledge-base entry
+    addresses a challenge. Fitted weights (version 1 and up, see fit_weights.py) give every
+    challenge its own row.
+    """
+    __slots__ = ("version", "team_size", "large_team", "challenges", "challenge_weight", "goals",
+                 "experience_level", "project_complexity", "metadata")
+
+    def __init__(self, version: int, team_size: Dict[str, Dict[str, int]], large_team: Dict[str, int],
+                 goals: Dict[str, Dict[str, int]], experience_level: Dict[str, Dict[str, int]],
+                 project_complexity: Dict[str, Dict[str, int]], challenges: Optional[Dict[str, Dict[str, int]]] = None,
+                 challenge_weight: int = 0, metadata: Optional[Dict] = None):
+        self.version = version
+        self.team_size = team_size
+        self.large_team = large_team  # Any team size without its own row
+        self.challenges = challenges  # Keyed by lower-cased challenge
+        self.challenge_weight = challenge_weight
+        self.goals = goals
+        self.experience_level = experience_level
+        self.project_complexity = project_complexity
+        self.metadata = metadata or {}
+
+    def answer_weights(self, question_id: str, answer: str, challenge_methodologies: Dict[str, list]) -> Dict[str, int]:
+        """The score contribution of one answer; challenge_methodologies is the knowledge base's challenge index."""
+        if question_id == "team_size":
+            return self.team_size.get(answer, self.large_team)
+        if question_id == "challenges":
+            if self.challenges is None:
+                return {m: self.challenge_weight for m in challenge_methodologies.get(answer.lower(), [])}
+            return self.challenges.get(answer.lower(), {})
+        if question_id == "goals":
+            return self.goals.get(answer, {})
+        if question_id == "experience_level":
+            return self.experience_level.get(answer, {})
+        if question_id == "project_complexity":
+            return self.project_complexity.get(answer, {})
+        return {}
+
+    def as_dict(self) -> Dict:
+        """The weights-file form of these weights (challenges must be set, as they are for fitted weights)."""
+        return dict(self.metadata, version=self.version, weights={
+            "team_size": self.team_size,
+            "large_team": self.large_team,
+            "challenges": self.challenges or {},
+            "goals": self.goals,
+            "experience_level": self.experience_level,
+            "project_complexity": self.project_complexity
+        })
+
+
+def _weight_table(path: str, name: str, table, methodologies: Iterable[str]) -> Dict[str, int]:
+    if not isinstance(table, dict):
+        raise ValueError(f"Scoring weights {path}: '{name}' must be an object")
+    for methodology, weight in table.items():
+        if methodology not in methodologies:
+            raise ValueError(f"Scoring weights {path}: unknown methodology {methodology!r} in '{name}'")
+        if weight.__class__ is not int:
+            raise ValueError(f"Scoring weights {path}: weights must be whole points ('{name}', {methodology})")
+    return table
+
+
+def read_scoring_weights(path: str, methodologies: Iterable[str]) -> ScoringWeights:
+    """Read and sanity-check a versioned scoring-weights file written by fit_weights.py."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("weights"), dict):
+        raise ValueError(f"Scoring weights {path} must be a JSON object with a 'weights' object")
+    version = data.get("version")
+    if version.__class__ is not int or version < 1:
+        raise ValueError(f"Scoring weights {path} must have a positive integer 'version'")
+    methodologies = tuple(methodologies)
+    weights = data["weights"]
+    tables = {}
+    for name in WEIGHT_TABLES:
+        rows = weights.get(name)
+        if not isinstance(rows, dict):
+            raise ValueError(f"Scoring weights {path} is missing the '{name}' table")
+        tables[name] = {answer: _weight_table(path, f"{name}.{answer}", row, methodologies) for answer, row in rows.items()}
+    large_team = _weight_table(path, "large_team", weights.get("large_team", {}), methodologies)
+    metadata = {key: value for key, value in data.items() if key not in ("version", "weights")}
+    return ScoringWeights(
+        version, tables["team_size"], large_team, tables["goals"], tables["experience_level"],
+        tables["project_complexity"], challenges={c.lower(): row for c, row in tables["challenges"].items()},
+        metadata=metadata
+    )
+
+
+def write_scoring_weights(path: str, weights: ScoringWeights) -> None:
+    """Atomically replace the weights file at path, so a running server reloading it never reads a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(weights.as_dict(), f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
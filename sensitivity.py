@@ -0,0 +1,100 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from agile_consultant import METHODOLOGIES
+
+SINGLE_ANSWER_QUESTIONS = ("team_size", "experience_level", "project_complexity")
+MULTI_ANSWER_QUESTIONS = ("challenges", "goals")
+DEFAULT_ANSWERS = {"team_size": "6-12 members", "experience_level": "Intermediate", "project_complexity": "Moderate"}
+CLOSEST_NON_FLIPS = 3
+
+
+def _answers(context: Dict, question_id: str) -> List[str]:
+    answer = context.get(question_id, [])
+    return [a for a in answer if isinstance(a, str)] if isinstance(answer, list) else []
+
+
+def analyze_sensitivity(consultant, context: Dict) -> Dict:
+    """Score every single-answer change to a context in one batch and report which ones change the winner.
+
+    Perturbations toggle each challenge and goal and swap team size, experience level and
+    project complexity for each other option. Every answer is a feature column whose weights
+    are the consultant's scoring weights, so the whole batch is one matrix product.
+    """
+    options = {q["id"]: q.get("options", []) for q in consultant.collect_project_context()}
+    base = {q: context.get(q, DEFAULT_ANSWERS[q]) for q in SINGLE_ANSWER_QUESTIONS}
+    base.update({q: _answers(context, q) for q in MULTI_ANSWER_QUESTIONS})
+
+    # Feature columns: every option (and given answer) of every scored question
+    features: List[Tuple[str, str]] = []
+    for question_id in SINGLE_ANSWER_QUESTIONS + MULTI_ANSWER_QUESTIONS:
+        given = base[question_id] if question_id in MULTI_ANSWER_QUESTIONS else [base[question_id]]
+        for answer in list(options.get(question_id, [])) + [a for a in given if a not in options.get(question_id, [])]:
+            features.append((question_id, answer))
+    column = {feature: i for i, feature in enumerate(features)}
+    weights = np.zeros((len(features), len(METHODOLOGIES)))
+    scoring_weights, challenge_methodologies = consultant.scoring_weights, consultant.indexes["challenge_methodologies"]
+    for i, (question_id, answer) in enumerate(features):
+        for methodology, weight in scoring_weights.answer_weights(question_id, answer, challenge_methodologies).items():
+            if methodology in METHODOLOGIES:
+                weights[i, METHODOLOGIES.index(methodology)] = weight
+
+    base_row = np.zeros(len(features))
+    for question_id in SINGLE_ANSWER_QUESTIONS:
+        base_row[column[(question_id, base[question_id])]] += 1
+    for question_id in MULTI_ANSWER_QUESTIONS:
+        for answer in base[question_id]:
+            base_row[column[(question_id, answer)]] += 1
+
+    rows, changes = [base_row], [None]
+    for question_id in SINGLE_ANSWER_QUESTIONS:
+        for answer in options.get(question_id, []):
+            if answer != base[question_id]:
+                row = base_row.copy()
+                row[column[(question_id, base[question_id])]] -= 1
+                row[column[(question_id, answer)]] += 1
+                rows.append(row)
+                changes.append({'question': question_id, 'change': 'set', 'from': base[question_id], 'answer': answer})
+    for question_id in MULTI_ANSWER_QUESTIONS:
+        for answer in dict.fromkeys(list(options.get(question_id, [])) + base[question_id]):
+            row = base_row.copy()
+            present = answer in base[question_id]
+            row[column[(question_id, answer)]] = 0 if present else 1
+            rows.append(row)
+            changes.append({'question': question_id, 'change': 'remove' if present else 'add', 'answer': answer})
+
+    scores = np.stack(rows) @ weights
+    winners = scores.argmax(axis=1)  # First maximum, matching the consultant's tie-break order
+    ranked = np.sort(scores, axis=1)
+    margins = ranked[:, -1] - ranked[:, -2]
+
+    def outcome(i):
+        return {
+            'methodology': METHODOLOGIES[winners[i]].upper(),
+            'margin': int(margins[i]),
+            'scores': {m: int(scores[i, j]) for j, m in enumerate(METHODOLOGIES)}
+        }
+
+    flips, holds = [], []
+    for i in range(1, len(rows)):
+        (flips if winners[i] != winners[0] else holds).append(dict(changes[i], **outcome(i)))
+    flips.sort(key=lambda f: -f['margin'])
+    holds.sort(key=lambda h: h['margin'])
+    return dict(outcome(0), perturbations=len(rows) - 1, flips=flips, closest=holds[:CLOSEST_NON_FLIPS])
+
+
+def describe_sensitivity(result: Dict) -> str:
+    """Summarize a sensitivity analysis in one sentence for the chat view."""
+    if result['margin']:
+        message = f"{result['methodology']} leads by {result['margin']} points."
+    else:
+        message = f"{result['methodology']} is tied for the top score and wins the tie-break."
+    if not result['flips']:
+        return message + f" None of the {result['perturbations']} single-answer changes would change the recommendation."
+    changes = []
+    for flip in result['flips'][:3]:
+        verb = {'add': 'adding', 'remove': 'removing', 'set': 'choosing'}[flip['change']]
+        changes.append(f"{verb} '{flip['answer']}' ({flip['methodology']})")
+    return message + f" {len(result['flips'])} of {result['perturbations']} single-answer changes would change it, e.g. " + \
+        "; ".join(changes) + "."
@@ -0,0 +1,309 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class SessionBackend:
+    """Interface for session storage backends; sessions are JSON-serializable dicts keyed by session id.
+
+    Conversation turns (role/content dicts) are kept apart from the session record, numbered
+    from 0 per session, so requests append and page them without rewriting the whole history.
+    """
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def put(self, session_id: str, data: Dict) -> None:
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        """Remove sessions idle for longer than the TTL and return how many were removed."""
+        raise NotImplementedError
+
+    def append_turns(self, session_id: str, turns: List[Dict], replace: bool = False) -> int:
+        """Append turns to a session's history (replacing it if `replace`) and return the new length."""
+        raise NotImplementedError
+
+    def turns(self, session_id: str, before: Optional[int] = None,
+              limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """Return up to `limit` turns preceding position `before` (default: the end), oldest first, and the total."""
+        raise NotImplementedError
+
+
+class MemoryLRUBackend(SessionBackend):
+    """In-process LRU of hot sessions with idle TTL."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # session_id -> (data, expires_at)
+        self._turns = {}  # session_id -> list of turns, for sessions in _entries
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[session_id]
+                self._turns.pop(session_id, None)
+                return None
+            self._entries[session_id] = (entry[0], now + self.ttl)
+            self._entries.move_to_end(session_id)
+            return entry[0]
+
+    def put(self, session_id: str, data: Dict) -> None:
+        with self._lock:
+            self._entries[session_id] = (data, time.monotonic() + self.ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._turns.pop(evicted, None)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+            self._turns.pop(session_id, None)
+
+    def purge_expired(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            expired = [sid for sid, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for sid in expired:
+                del self._entries[sid]
+                self._turns.pop(sid, None)
+        return len(expired)
+
+    def append_turns(self, session_id: str, turns: List[Dict], replace: bool = False) -> int:
+        with self._lock:
+            if session_id not in self._entries:
+                return 0
+            history = [] if replace else self._turns.get(session_id, [])
+            history.extend(turns)
+            self._turns[session_id] = history
+            return len(history)
+
+    def turns(self, session_id: str, before: Optional[int] = None,
+              limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        with self._lock:
+            history = self._turns.get(session_id, [])
+            total = len(history)
+            end = total if before is None else max(0, min(before, total))
+            start = 0 if limit is None else max(0, end - limit)
+            return history[start:end], total
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend(SessionBackend):
+    """Durable session tier in a local SQLite database running in WAL mode."""
+
+    def __init__(self, path: str, ttl: float = 86400.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_turns ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+        )
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires_at > ?", (session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id: str, data: Dict) -> None:
+        encoded = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (id, data, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+                (session_id, encoded, time.time() + self.ttl)
+            )
+
+    def touch(self, session_id: str) -> None:
+        """Extend a session's TTL without rewriting its data."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sessions SET expires_at = ? WHERE id = ?", (time.time() + self.ttl, session_id)
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM session_turns WHERE session_id = ?", (session_id,))
+                self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "DELETE FROM session_turns WHERE session_id IN (SELECT id FROM sessions WHERE expires_at <= ?)",
+                    (now,)
+                )
+                removed = self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return removed
+
+    def _turn_count(self, session_id: str) -> int:
+        row = self._conn.execute(
+            "SELECT MAX(seq) FROM session_turns WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def append_turns(self, session_id: str, turns: List[Dict], replace: bool = False) -> int:
+        """Insert only the new turns, numbered on from the stored ones, in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if replace:
+                    self._conn.execute("DELETE FROM session_turns WHERE session_id = ?", (session_id,))
+                start = self._turn_count(session_id)
+                self._conn.executemany(
+                    "INSERT INTO session_turns (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                    [(session_id, start + i, turn['role'], turn['content']) for i, turn in enumerate(turns)]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return start + len(turns)
+
+    def turns(self, session_id: str, before: Optional[int] = None,
+              limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """Seek backwards from `before` on the (session_id, seq) key, so a page costs the same at any history length."""
+        with self._lock:
+            total = self._turn_count(session_id)
+            end = total if before is None else max(0, min(before, total))
+            rows = self._conn.execute(
+                "SELECT role, content FROM session_turns WHERE session_id = ? AND seq < ? "
+                "ORDER BY seq DESC LIMIT ?",
+                (session_id, end, -1 if limit is None else limit)
+            ).fetchall()
+        return [{'role': role, 'content': content} for role, content in reversed(rows)], total
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TieredSessionStore(SessionBackend):
+    """Read-through/write-through session store: a memory LRU in front of an optional durable backend.
+
+    Hot sessions are served from memory. The durable tier's TTL is only refreshed once
+    half of it has elapsed, so reads do not turn into database writes. Conversation turns
+    live in the durable tier when there is one, otherwise alongside the hot sessions.
+    """
+
+    def __init__(self, hot: MemoryLRUBackend, durable: Optional[SessionBackend] = None,
+                 purge_interval: float = 300.0):
+        self.hot = hot
+        self.durable = durable
+        self.turn_store = durable if durable is not None else hot
+        self.purge_interval = purge_interval
+        self._durable_touched = {}  # session_id -> monotonic time of last durable write/touch
+        self._next_purge = time.monotonic() + purge_interval
+        self._lock = threading.Lock()  # Guards _durable_touched and _next_purge across request threads
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        data = self.hot.get(session_id)
+        if data is not None:
+            self._maybe_touch(session_id)
+            return data
+        if self.durable is None:
+            return None
+        data = self.durable.get(session_id)
+        if data is not None:
+            self.hot.put(session_id, data)
+            self._mark_touched(session_id)
+        return data
+
+    def put(self, session_id: str, data: Dict) -> None:
+        """Store the session record; it holds only small fields, as turns go through append_turns()."""
+        self.hot.put(session_id, data)
+        if self.durable is not None:
+            self.durable.put(session_id, data)
+            self._mark_touched(session_id)
+        self._maybe_purge()
+
+    def delete(self, session_id: str) -> None:
+        self.hot.delete(session_id)
+        with self._lock:
+            self._durable_touched.pop(session_id, None)
+        if self.durable is not None:
+            self.durable.delete(session_id)
+
+    def purge_expired(self) -> int:
+        removed = self.hot.purge_expired()
+        if self.durable is not None:
+            removed += self.durable.purge_expired()
+            cutoff = time.monotonic() - self.durable.ttl
+            with self._lock:
+                self._durable_touched = {sid: t for sid, t in self._durable_touched.items() if t > cutoff}
+        return removed
+
+    def append_turns(self, session_id: str, turns: List[Dict], replace: bool = False) -> int:
+        return self.turn_store.append_turns(session_id, turns, replace=replace)
+
+    def turns(self, session_id: str, before: Optional[int] = None,
+              limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        return self.turn_store.turns(session_id, before=before, limit=limit)
+
+    def _mark_touched(self, session_id: str) -> None:
+        with self._lock:
+            self._durable_touched[session_id] = time.monotonic()
+
+    def _maybe_touch(self, session_id: str) -> None:
+        if self.durable is None or not hasattr(self.durable, 'touch'):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._durable_touched.get(session_id, 0.0) <= self.durable.ttl / 2:
+                return
+            self._durable_touched[session_id] = now
+        self.durable.touch(session_id)
+
+    def _maybe_purge(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_purge:
+                return
+            self._next_purge = now + self.purge_interval
+        self.purge_expired()
+
+
+def create_session_store(db_path: Optional[str] = None, ttl: float = 86400.0,
+                         max_hot_sessions: int = 10000) -> TieredSessionStore:
+    """Build the default store: a memory LRU, backed by SQLite when db_path is given."""
+    durable = SQLiteBackend(db_path, ttl=ttl) if db_path else None
+    return TieredSessionStore(MemoryLRUBackend(max_entries=max_hot_sessions, ttl=ttl), durable)
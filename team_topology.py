@@ -0,0 +1,328 @@
+import heapq
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from assessment_schema import AssessmentSchema
+
+MAX_PEOPLE = 50000
+MAX_COLLABORATIONS = 2000000
+REFINEMENT_PASSES = 4
+TOP_SKILLS = 5
+# Assessment answers that describe the whole organization and carry over to every squad (see plan_squads)
+ORG_CONTEXT_QUESTIONS = ("industry", "current_methodology", "experience_level", "project_complexity", "challenges", "goals")
+
+
+def team_size_ranges(knowledge_base: Dict) -> List[Tuple[int, int, str]]:
+    """Return the bounded team-size ranges in the knowledge base as (low, high, label), e.g. (6, 12, "6-12 members")."""
+    ranges = []
+    for entry in knowledge_base["team_sizes"].values():
+        match = re.match(r"\s*(\d+)\s*-\s*(\d+)", entry.get("range", ""))
+        if match:
+            ranges.append((int(match.group(1)), int(match.group(2)), entry["range"]))
+    return sorted(ranges)
+
+
+def squad_size_bounds(knowledge_base: Dict) -> Tuple[int, int]:
+    """The largest bounded team size the knowledge base treats as a single team; larger orgs split into squads."""
+    ranges = team_size_ranges(knowledge_base)
+    if not ranges:
+        raise ValueError("The knowledge base defines no bounded team sizes.")
+    low, high, _ = ranges[-1]
+    return low, high
+
+
+def partition_people(n: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray,
+                     low: int, high: int, skills: Optional[List[List[str]]] = None) -> np.ndarray:
+    """Split n people into squads of low..high members that keep as much collaboration weight inside as possible.
+
+    Heavy edges are merged greedily first (union-find, never past `high`), undersized groups
+    are merged into their best-connected neighbour or packed together, sizes are repaired,
+    and a few local-move passes then move people to the squad they collaborate with most.
+    Packing deals groups largest first to the emptiest squad, with groups of the same skills
+    next to each other, so people with the same skills are spread across squads rather than
+    stacked in one. Runs in roughly O(E log E + n log n + passes * E). Returns a squad index
+    per person.
+    """
+    if n <= high:
+        return np.zeros(n, dtype=np.int64)
+    order = np.argsort(-weights, kind="stable")
+
+    # Greedy heavy-edge merging with union-find
+    parent = list(range(n))
+    size = [1] * n
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in zip(sources[order].tolist(), targets[order].tolist()):
+        ra, rb = find(a), find(b)
+        if ra != rb and size[ra] + size[rb] <= high:
+            if size[ra] < size[rb]:
+                ra, rb = rb, ra
+            parent[rb] = ra
+            size[ra] += size[rb]
+    roots = np.fromiter((find(x) for x in range(n)), dtype=np.int64, count=n)
+    _, squad = np.unique(roots, return_inverse=True)
+
+    # Undirected adjacency in CSR form, for connection weights between people and squads
+    both_from = np.concatenate([sources, targets])
+    both_to = np.concatenate([targets, sources])
+    both_weights = np.concatenate([weights, weights])
+    by_person = np.argsort(both_from, kind="stable")
+    neighbours, neighbour_weights = both_to[by_person].tolist(), both_weights[by_person].tolist()
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(both_from, minlength=n))]).tolist()
+
+    members = {}
+    for person, s in enumerate(squad.tolist()):
+        members.setdefault(s, []).append(person)
+    squad = squad.tolist()
+
+    def links(person):
+        """Collaboration weight from person to each squad it touches."""
+        weight_to = {}
+        for i in range(offsets[person], offsets[person + 1]):
+            s = squad[neighbours[i]]
+            weight_to[s] = weight_to.get(s, 0.0) + neighbour_weights[i]
+        return weight_to
+
+    def move(person, target):
+        members[squad[person]].remove(person)
+        if not members[squad[person]]:
+            del members[squad[person]]
+        members.setdefault(target, []).append(person)
+        squad[person] = target
+
+    # Merge undersized groups into the squad they are best connected to, where it fits
+    for s in sorted((s for s in members if len(members[s]) < low), key=lambda s: len(members[s])):
+        if s not in members or len(members[s]) >= low:
+            continue
+        weight_to = {}
+        for person in members[s]:
+            for t, weight in links(person).items():
+                if t != s:
+                    weight_to[t] = weight_to.get(t, 0.0) + weight
+        fits = [t for t in weight_to if len(members[t]) + len(members[s]) <= high]
+        if fits:
+            target = max(fits, key=lambda t: (weight_to[t], -t))
+            for person in list(members[s]):
+                move(person, target)
+
+    # Pack what is still undersized into squads of roughly equal size: largest groups first, each
+    # to the emptiest squad that fits. Groups with the same skills are dealt one after another and
+    # so land in different squads.
+    def skill_signature(s):
+        return tuple(sorted({skill for person in members[s] for skill in (skills[person] if skills else ())}))
+
+    small = sorted((s for s in members if len(members[s]) < low),
+                   key=lambda s: (-len(members[s]), skill_signature(s), s))
+    total = sum(len(members[s]) for s in small)
+    bins = []  # Heap of (members, squad)
+    for s in small:
+        size = len(members[s])
+        if len(bins) < -(-total // high) or bins[0][0] + size > high:
+            heapq.heappush(bins, (size, s))
+            continue
+        fill, target = heapq.heappop(bins)
+        for person in list(members[s]):
+            move(person, target)
+        heapq.heappush(bins, (fill + size, target))
+
+    # Repair: fill squads still below `low` from the largest squads, moving their least attached people.
+    # Both heaps hold (size, squad) snapshots and skip entries whose size has since changed.
+    short = [(len(people), s) for s, people in members.items() if len(people) < low]
+    donors = [(-len(people), s) for s, people in members.items() if len(people) > low]
+    heapq.heapify(short)
+    heapq.heapify(donors)
+    while short:
+        size, s = heapq.heappop(short)
+        if s not in members or len(members[s]) != size or size >= low:
+            continue
+        donor = None
+        while donors:
+            donor_size, donor = -donors[0][0], donors[0][1]
+            if donor != s and donor in members and len(members[donor]) == donor_size > low:
+                break
+            heapq.heappop(donors)
+            donor = None
+        if donor is None:
+            # Sizes cannot all be met (e.g. custom bounds); fold into the smallest other squad
+            others = [t for t in members if t != s]
+            if not others:
+                break
+            target = min(others, key=lambda t: (len(members[t]), t))
+            for person in list(members[s]):
+                move(person, target)
+            if len(members[target]) < low:
+                heapq.heappush(short, (len(members[target]), target))
+            elif len(members[target]) > low:
+                heapq.heappush(donors, (-len(members[target]), target))
+            continue
+        heapq.heappop(donors)
+        person = max(members[donor], key=lambda p: (links(p).get(s, 0.0) - links(p).get(donor, 0.0), -p))
+        move(person, s)
+        if len(members[donor]) > low:
+            heapq.heappush(donors, (-len(members[donor]), donor))
+        if len(members[s]) < low:
+            heapq.heappush(short, (len(members[s]), s))
+        elif len(members[s]) > low:
+            heapq.heappush(donors, (-len(members[s]), s))
+
+    # Local refinement: move people to the neighbouring squad they collaborate with most
+    for _ in range(REFINEMENT_PASSES):
+        moved = 0
+        for person in range(n):
+            own = squad[person]
+            if len(members[own]) <= low:
+                continue
+            weight_to = links(person)
+            best, gain = None, 0.0
+            for t, weight in weight_to.items():
+                if t != own and len(members[t]) < high and weight - weight_to.get(own, 0.0) > gain:
+                    best, gain = t, weight - weight_to.get(own, 0.0)
+            if best is not None:
+                move(person, best)
+                moved += 1
+        if not moved:
+            break
+
+    _, squad = np.unique(np.asarray(squad), return_inverse=True)
+    return squad
+
+
+def plan_squads(request: Dict, consultant, org_context: Optional[Dict] = None,
+                schema: Optional[AssessmentSchema] = None) -> Dict:
+    """Split a large organization into squads and recommend a methodology for each.
+
+    `request` holds `people` (a list of {"id", "skills"}), `collaborations` (a list of
+    [person, person, weight] with weight optional), an optional `squad_size` [low, high]
+    within the knowledge base's bounds, and an optional `context` of assessment answers
+    shared by every squad. Each squad's methodology comes from the consultant's normal
+    recommendation scoring, with its own team size.
+
+    The context is shared on purpose: the assessment answers (industry, experience,
+    complexity, challenges, goals) are given once for the organization, and people carry
+    only ids and skills, which no assessment question scores. Squads therefore differ only
+    in size until they run their own assessments. With a `schema`, a non-empty `context`
+    is checked like an assessment submission.
+    """
+    if not isinstance(request, dict):
+        raise ValueError("Team topology request must be a JSON object.")
+    people = request.get('people')
+    if not isinstance(people, list) or not people or len(people) > MAX_PEOPLE:
+        raise ValueError(f"'people' must be a list of 1 to {MAX_PEOPLE} people.")
+    ids, skills = [], []
+    for person in people:
+        if isinstance(person, dict):
+            person_id, person_skills = person.get('id'), person.get('skills', [])
+        else:
+            person_id, person_skills = person, []
+        if not isinstance(person_id, (str, int)) or isinstance(person_id, bool):
+            raise ValueError("Each person needs a string or integer 'id'.")
+        if not isinstance(person_skills, list) or not all(isinstance(skill, str) for skill in person_skills):
+            raise ValueError(f"Skills for {person_id} must be a list of strings.")
+        ids.append(str(person_id))
+        skills.append(person_skills)
+    index = {person_id: i for i, person_id in enumerate(ids)}
+    if len(index) != len(ids):
+        raise ValueError("Person ids must be unique.")
+
+    collaborations = request.get('collaborations', [])
+    if not isinstance(collaborations, list) or len(collaborations) > MAX_COLLABORATIONS:
+        raise ValueError(f"'collaborations' must be a list of at most {MAX_COLLABORATIONS} [person, person, weight] entries.")
+    sources, targets, weights = [], [], []
+    for edge in collaborations:
+        if not isinstance(edge, list) or len(edge) not in (2, 3):
+            raise ValueError("Each collaboration must be [person, person] or [person, person, weight].")
+        a, b = index.get(str(edge[0])), index.get(str(edge[1]))
+        if a is None or b is None:
+            raise ValueError(f"Collaboration {edge[:2]} names an unknown person.")
+        weight = edge[2] if len(edge) == 3 else 1
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not 0 <= weight < float('inf'):
+            raise ValueError("Collaboration weights must be non-negative numbers.")
+        if a != b:
+            sources.append(min(a, b))
+            targets.append(max(a, b))
+            weights.append(float(weight))
+    # Merge repeated pairs by summing their weights
+    sources, targets, weights = (np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64),
+                                 np.asarray(weights, dtype=np.float64))
+    pairs, pair_index = np.unique(sources * len(ids) + targets, return_inverse=True)
+    weights = np.bincount(pair_index, weights=weights, minlength=pairs.size)
+    sources, targets = pairs // len(ids), pairs % len(ids)
+
+    knowledge_base = consultant.knowledge_base
+    low, high = squad_size_bounds(knowledge_base)
+    if 'squad_size' in request:
+        bounds = request['squad_size']
+        if (not isinstance(bounds, list) or len(bounds) != 2
+                or not all(isinstance(v, int) and not isinstance(v, bool) for v in bounds)
+                or not 1 <= bounds[0] <= bounds[1] <= high):
+            raise ValueError(f"'squad_size' must be [low, high] with 1 <= low <= high <= {high}.")
+        low, high = bounds
+    context = dict(org_context or {})
+    extra = request.get('context', {})
+    if not isinstance(extra, dict):
+        raise ValueError("'context' must be an object of assessment answers.")
+    error = schema.validate(extra) if schema is not None and extra else None
+    if error:
+        raise ValueError(f"'context': {error}")
+    context.update(extra)
+    shared_context = {key: context[key] for key in ORG_CONTEXT_QUESTIONS if key in context}
+
+    squad = partition_people(len(ids), sources, targets, weights, low, high, skills)
+    squad_count = int(squad.max()) + 1
+    sizes = np.bincount(squad, minlength=squad_count)
+    internal = squad[sources] == squad[targets]
+    internal_weight = np.bincount(squad[sources[internal]], weights=weights[internal], minlength=squad_count)
+    total_weight = float(weights.sum())
+
+    ranges = team_size_ranges(knowledge_base)
+    methodologies = {}  # Team-size answer -> recommendation, shared by every squad of that size band
+    members = [[] for _ in range(squad_count)]
+    for person, s in enumerate(squad.tolist()):
+        members[s].append(person)
+    squads = []
+    for s in np.argsort(-sizes, kind="stable").tolist():
+        size = int(sizes[s])
+        team_size = next((label for lo, hi, label in ranges if lo <= size <= hi), ranges[-1][2])
+        if team_size not in methodologies:
+            view = consultant.with_context(dict(shared_context, team_size=team_size))
+            methodologies[team_size] = view.get_methodology_recommendation()
+        recommendation = methodologies[team_size]
+        squad_skills = Counter(skill for person in members[s] for skill in skills[person])
+        squads.append({
+            'squad': len(squads) + 1,
+            'size': size,
+            'team_size': team_size,
+            'members': [ids[person] for person in members[s]],
+            'top_skills': [skill for skill, _ in squad_skills.most_common(TOP_SKILLS)],
+            'internal_collaboration': round(float(internal_weight[s]), 3),
+            'methodology': recommendation['name'],
+            'why_recommended': recommendation['why_recommended']
+        })
+
+    large = knowledge_base["team_sizes"].get("large", {})
+    return {
+        'people': len(ids),
+        'squad_size': [low, high],
+        'squads': squads,
+        'cohesion': round(float(internal_weight.sum()) / total_weight, 4) if total_weight else None,
+        'methodologies': dict(Counter(squad['methodology'] for squad in squads).most_common()),
+        'coordination': large.get("recommendations", [])
+    }
+
+
+def describe_topology(result: Dict) -> str:
+    """Summarize a squad plan in one sentence for the chat view."""
+    sizes = [squad['size'] for squad in result['squads']]
+    message = (f"Split {result['people']} people into {len(sizes)} squads of {min(sizes)}-{max(sizes)} members")
+    if result['cohesion'] is not None:
+        message += f", keeping {result['cohesion']:.0%} of collaboration within squads"
+    methodologies = ", ".join(f"{name} for {count}" for name, count in result['methodologies'].items())
+    return message + f". Suggested methodologies: {methodologies}."
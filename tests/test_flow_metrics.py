@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from flow_metrics import FlowMetricsIngestor
+
+STATES = ("todo", "in progress", "review", "done")
+
+
+def transition_log(items: int = 300, seed: int = 7):
+    """Interleaved, time-ordered transitions; some items are reopened after done and some never finish."""
+    rng = random.Random(seed)
+    events = []
+    for n in range(items):
+        item_type = "bug" if n % 5 == 0 else "story"
+        t = rng.uniform(0, 30) * 86400
+        for _ in range(rng.choice((1, 1, 2, 3))):  # Cycles per item; a second cycle is a reopen
+            for state in STATES[:rng.randint(1, len(STATES))] if rng.random() < 0.2 else STATES:
+                events.append({"item_id": f"I-{n}", "state": state, "timestamp": t, "type": item_type})
+                t += rng.uniform(0.1, 5) * 86400
+    events.sort(key=lambda row: row["timestamp"])
+    return events
+
+
+def summarize(rows, chunk_size):
+    ingestor = FlowMetricsIngestor(chunk_size=chunk_size)
+    ingestor.ingest_rows(rows)
+    return ingestor.summary()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 1000])
+def test_summary_does_not_depend_on_chunk_size(chunk_size):
+    rows = transition_log()
+    assert summarize(rows, chunk_size) == summarize(rows, len(rows))
+
+
+def test_reopened_item_starts_a_new_cycle():
+    day = 86400
+    rows = [
+        {"item_id": "A", "state": "in progress", "timestamp": 0},
+        {"item_id": "A", "state": "done", "timestamp": 2 * day},
+        {"item_id": "A", "state": "in progress", "timestamp": 10 * day},
+        {"item_id": "A", "state": "done", "timestamp": 14 * day},
+    ]
+    for chunk_size in (1, 2, 3, 4):
+        summary = summarize(rows, chunk_size)
+        assert summary["items_completed"] == 2
+        assert summary["open_items"] == 0
+        assert summary["cycle_time_days"]["mean"] == 3.0
+
+
+def test_consecutive_done_states_complete_an_item_once():
+    day = 86400
+    rows = [
+        {"item_id": "A", "state": "in progress", "timestamp": 0},
+        {"item_id": "A", "state": "resolved", "timestamp": 4 * day},
+        {"item_id": "A", "state": "closed", "timestamp": 6 * day},
+        {"item_id": "B", "state": "in progress", "timestamp": 1 * day},
+        {"item_id": "B", "state": "done", "timestamp": 3 * day},
+        {"item_id": "B", "state": "closed", "timestamp": 5 * day},
+        {"item_id": "B", "state": "review", "timestamp": 7 * day},
+        {"item_id": "B", "state": "done", "timestamp": 10 * day},
+    ]
+    rows.sort(key=lambda row: row["timestamp"])
+    for chunk_size in range(1, len(rows) + 1):
+        summary = summarize(rows, chunk_size)
+        assert summary["items_completed"] == 3
+        assert summary["open_items"] == 0
+        assert summary["cycle_time_days"]["mean"] == 3.0
+        assert summary["throughput_per_week"]["mean"] == 1.5
@@ -0,0 +1,98 @@
+import itertools
+import time
+from typing import Dict, List
+
+from agile_consultant import AgileProjectConsultant
+from flow_metrics import FlowMetricsIngestor
+
+# One query per branch of process_free_text_query, plus one per challenge synonym group and methodology
+WARMUP_QUERIES = [
+    "How do I set up a Kanban board?",
+    "How do we adopt test-driven development?",
+    "How should we start pair programming?",
+    "We see resistance to change",
+    "Team engagement is low",
+    "We have poor communication",
+    "Our estimation is off",
+    "How do we stop scope creep?",
+    "We have quality problems and bugs",
+    "We keep missing deadlines",
+    "Stakeholder management is hard",
+    "How do we track defect rate?",
+    "What is our cycle time?",
+    "How do we measure team happiness?",
+    "Tell me about scrum",
+    "Tell me about kanban",
+    "Tell me about xp",
+    "Tell me about lean",
+    "Which agile methodology fits us?",
+    "Something the consultant does not recognise",
+]
+
+
+def synthetic_contexts(consultant: AgileProjectConsultant) -> List[Dict]:
+    """Build assessments that together reach every branch of the recommendation logic."""
+    questions = {q["id"]: q for q in consultant.collect_project_context()}
+    team_sizes = questions["team_size"]["options"]
+    methodologies = questions["current_methodology"]["options"]
+    experience_levels = questions["experience_level"]["options"]
+    complexities = questions["project_complexity"]["options"]
+    challenges = questions["challenges"]["options"]
+    goals = questions["goals"]["options"]
+    # Practice rules match on snake_case challenge keys, so include those forms as well
+    challenge_keys = [c.lower().replace(" ", "_") for c in challenges]
+    contexts = []
+    for i, (team_size, methodology) in enumerate(itertools.product(team_sizes, methodologies)):
+        contexts.append({
+            "team_size": team_size,
+            "industry": "IT",
+            "current_methodology": methodology,
+            "experience_level": experience_levels[i % len(experience_levels)],
+            "project_complexity": complexities[i % len(complexities)],
+            "challenges": challenges + challenge_keys,
+            "goals": goals,
+        })
+    # A team with an ingested work-item log, so flow-metric queries answer from its own numbers
+    flow = FlowMetricsIngestor()
+    flow.ingest_rows({"item_id": "W-1", "state": state, "timestamp": day * 86400.0}
+                     for day, state in enumerate(("todo", "in progress", "done")))
+    contexts.append(dict(contexts[0], flow_metrics=flow.summary()))
+    contexts.append({})
+    return contexts
+
+
+def warm_up_consultant(consultant: AgileProjectConsultant) -> int:
+    """Load the knowledge base and indexes, then run synthetic traffic through every branch.
+
+    Work runs on with_context() views, so the shared consultant's context and history are untouched.
+    Returns the number of synthetic calls made; any exception propagates so the caller stays unready.
+    """
+    consultant.indexes  # Loads the knowledge base too
+    calls = 0
+    for context in synthetic_contexts(consultant):
+        view = consultant.with_context(context)
+        view.generate_full_recommendations()
+        calls += 1
+        for query in WARMUP_QUERIES:
+            view.process_free_text_query(query)
+            calls += 1
+    return calls
+
+
+class Readiness:
+    """Tracks whether warm-up has finished; load balancers should only route to ready workers."""
+
+    def __init__(self):
+        self.ready = False
+        self.error = None
+        self.started_at = time.time()
+        self.warmup_seconds = None
+        self.warmup_calls = 0
+
+    def status(self) -> Dict:
+        return {
+            'ready': self.ready,
+            'error': self.error,
+            'warmup_seconds': self.warmup_seconds,
+            'warmup_calls': self.warmup_calls
+        }
@@ -0,0 +1,312 @@
+import hashlib
+import heapq
+import itertools
+import json
+import random
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from worker_pool import LazyProcessPool
+
+MAX_STAGES = 12
+MAX_CONFIGURATIONS = 20000
+MAX_WIP_LIMIT = 100
+MAX_SIMULATED_DAYS = 3650
+MIN_SERVICE_SAMPLES = 5
+MAX_SIMULATED_EVENTS = 20000000  # Estimated arrivals and stage completions across a whole sweep
+SWEEP_TIMEOUT_SECONDS = 30.0
+DEADLINE_CHECK_EVENTS = 4096  # Events between wall-clock checks
+INLINE_CONFIGURATIONS = 16  # Sweeps this small run in the request thread; the pool start-up isn't worth it
+CYCLE_TIME_PERCENTILES = (50, 85, 95)
+
+
+def simulate_board(stages: List[Dict], wip_limits: Sequence[int], days: float, warmup_days: float,
+                   arrival_rate: Optional[float], seed: int, deadline: Optional[float] = None) -> Dict:
+    """Run one discrete-event simulation of a Kanban board and return its flow statistics.
+
+    Items move through `stages` in order. A stage holds at most its WIP limit of items, whether
+    waiting for one of its `workers`, being worked on, or finished and waiting to be pulled by the
+    next stage. Work enters the first stage as Poisson arrivals at `arrival_rate` items per day, or
+    from an endless backlog when no rate is given. Statistics cover items finished after warm-up.
+    Raises TimeoutError once the wall clock (time.time()) passes `deadline`.
+    """
+    rng = random.Random(seed)
+    last = len(stages) - 1
+    workers = [stage['workers'] for stage in stages]
+    services = [stage['service_times'] for stage in stages]
+    in_stage = [0] * len(stages)
+    busy = [0] * len(stages)
+    waiting = [deque() for _ in stages]
+    finished = [deque() for _ in stages]
+    queued = 0  # Arrived items not yet admitted to the first stage
+    started_at = {}
+    cycle_times = []
+    events = []  # Heap of (time, sequence, kind, stage, item)
+    sequence = itertools.count()
+    next_item = itertools.count()
+    wip_area = 0.0  # Integral of items on the board over time, after warm-up
+    board_wip = 0
+    clock = 0.0
+
+    def start_work(s, now):
+        while busy[s] < workers[s] and waiting[s]:
+            item = waiting[s].popleft()
+            busy[s] += 1
+            heapq.heappush(events, (now + rng.choice(services[s]), next(sequence), 'finish', s, item))
+
+    def enter(item, s, now):
+        in_stage[s] += 1
+        waiting[s].append(item)
+        start_work(s, now)
+
+    def pull(now):
+        """Move finished items downstream wherever there is room, then admit new work to the first stage."""
+        nonlocal board_wip, queued
+        moved = True
+        while moved:
+            moved = False
+            for s in range(last, -1, -1):
+                while finished[s] and (s == last or in_stage[s + 1] < wip_limits[s + 1]):
+                    item = finished[s].popleft()
+                    in_stage[s] -= 1
+                    moved = True
+                    if s == last:
+                        board_wip -= 1
+                        if now >= warmup_days:
+                            cycle_times.append(now - started_at.pop(item))
+                        else:
+                            started_at.pop(item)
+                    else:
+                        enter(item, s + 1, now)
+            while in_stage[0] < wip_limits[0] and (queued or arrival_rate is None):
+                if queued:
+                    queued -= 1
+                item = next(next_item)
+                started_at[item] = now
+                board_wip += 1
+                enter(item, 0, now)
+                moved = True
+
+    if arrival_rate is not None:
+        heapq.heappush(events, (rng.expovariate(arrival_rate), next(sequence), 'arrive', 0, None))
+    pull(0.0)
+    processed = 0
+    while events:
+        now, _, kind, s, item = heapq.heappop(events)
+        if now > days:
+            break
+        processed += 1
+        if deadline is not None and not processed % DEADLINE_CHECK_EVENTS and time.time() > deadline:
+            raise TimeoutError("WIP simulation ran past its time limit")
+        if now > warmup_days:
+            wip_area += board_wip * (now - max(clock, warmup_days))
+        clock = now
+        if kind == 'arrive':
+            queued += 1
+            heapq.heappush(events, (now + rng.expovariate(arrival_rate), next(sequence), 'arrive', 0, None))
+        else:
+            busy[s] -= 1
+            finished[s].append(item)
+            start_work(s, now)
+        pull(now)
+    wip_area += board_wip * (days - max(clock, warmup_days))
+
+    measured_days = days - warmup_days
+    result = {
+        'throughput_per_day': round(len(cycle_times) / measured_days, 3),
+        'average_wip': round(wip_area / measured_days, 2),
+        'items_completed': len(cycle_times),
+        'cycle_time_days': None
+    }
+    if cycle_times:
+        ordered = np.sort(cycle_times)
+        result['cycle_time_days'] = {'mean': round(float(ordered.mean()), 2)}
+        for p in CYCLE_TIME_PERCENTILES:
+            index = min(ordered.size - 1, max(0, int(np.ceil(p / 100 * ordered.size)) - 1))
+            result['cycle_time_days'][f'p{p}'] = round(float(ordered[index]), 2)
+    return result
+
+
+def _simulate_batch(spec: Dict, batch: List) -> List[Dict]:
+    """Worker entry point: simulate (index, wip limits) pairs with seeds derived from the spec and index."""
+    results = []
+    for index, limits in batch:
+        result = simulate_board(spec['stages'], limits, spec['days'], spec['warmup_days'],
+                                spec['arrival_rate'], spec['seed'] + index, spec.get('deadline'))
+        result['wip_limits'] = {stage['name']: limit for stage, limit in zip(spec['stages'], limits)}
+        results.append(result)
+    return results
+
+
+class WipSimulator:
+    """Sweeps candidate WIP limits for a board through the discrete-event simulation.
+
+    Sweeps larger than INLINE_CONFIGURATIONS are split across a process pool created on first
+    use. Every configuration is seeded from the request, so answers are reproducible. Requests
+    estimated at more than MAX_SIMULATED_EVENTS are refused, and a sweep still running after
+    `timeout` seconds is abandoned.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: float = SWEEP_TIMEOUT_SECONDS):
+        self.pool = LazyProcessPool(max_workers, preload=['wip_simulator'])
+        self.timeout = timeout
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def simulate(self, request: Dict, dwell_times=None) -> Dict:
+        """Validate a simulation request and return results ranked best first.
+
+        `dwell_times(stage_name)` supplies observed service times for stages given without
+        `service_times`, e.g. CumulativeFlow.dwell_times for the session's board.
+        """
+        spec, configurations = self._normalize(request, dwell_times)
+        spec['deadline'] = time.time() + self.timeout
+        batches = list(enumerate(configurations))
+        try:
+            if len(batches) <= INLINE_CONFIGURATIONS:
+                results = _simulate_batch(spec, batches)
+            else:
+                size = max(1, -(-len(batches) // (self.pool.workers * 4)))
+                chunks = [batches[i:i + size] for i in range(0, len(batches), size)]
+                results = [r for chunk in self.pool.executor().map(_simulate_batch, itertools.repeat(spec), chunks)
+                           for r in chunk]
+        except TimeoutError:
+            raise ValueError(f"The simulation did not finish within {self.timeout:g} seconds; "
+                             "simulate fewer configurations or days.") from None
+
+        def cycle_p85(result):
+            return result['cycle_time_days']['p85'] if result['cycle_time_days'] else float('inf')
+
+        results.sort(key=lambda r: (-r['throughput_per_day'], cycle_p85(r)))
+        # Recommend the configuration with the shortest P85 cycle time among those within 5% of peak throughput
+        peak = results[0]['throughput_per_day']
+        recommended = min((r for r in results if r['throughput_per_day'] >= 0.95 * peak),
+                          key=lambda r: (cycle_p85(r), sum(r['wip_limits'].values())))
+        return {
+            'stages': [{'name': s['name'], 'workers': s['workers'], 'service_samples': len(s['service_times'])}
+                       for s in spec['stages']],
+            'days': spec['days'],
+            'warmup_days': spec['warmup_days'],
+            'arrival_rate': spec['arrival_rate'],
+            'configurations': len(results),
+            'recommended': recommended,
+            'results': results[:spec['top']]
+        }
+
+    def _normalize(self, request: Dict, dwell_times):
+        if not isinstance(request, dict):
+            raise ValueError("Simulation request must be a JSON object.")
+        raw_stages = request.get('stages')
+        if not isinstance(raw_stages, list) or not raw_stages or len(raw_stages) > MAX_STAGES:
+            raise ValueError(f"'stages' must be a list of 1 to {MAX_STAGES} stages.")
+        stages = []
+        for raw in raw_stages:
+            if not isinstance(raw, dict) or not isinstance(raw.get('name'), str) or not raw['name'].strip():
+                raise ValueError("Each stage needs a 'name'.")
+            name = raw['name'].strip()
+            workers = _whole_number(raw.get('workers', 1), f"{name}: 'workers'", MAX_WIP_LIMIT)
+            if 'service_times' in raw:
+                samples = raw['service_times']
+                if (not isinstance(samples, list) or not samples
+                        or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in samples)):
+                    raise ValueError(f"{name}: 'service_times' must be a non-empty list of days.")
+                samples = np.asarray(samples, dtype=np.float64)
+            elif dwell_times is not None:
+                samples = dwell_times(name)
+                if samples.size < MIN_SERVICE_SAMPLES:
+                    raise ValueError(f"{name}: not enough observed time-in-state data; give 'service_times'.")
+            else:
+                raise ValueError(f"{name}: give 'service_times' or ingest a work-item log first.")
+            if not np.all(np.isfinite(samples)) or np.any(samples < 0) or samples.sum() <= 0:
+                raise ValueError(f"{name}: service times must be non-negative, with at least one above zero.")
+            stages.append({'name': name, 'workers': workers, 'service_times': [round(v, 6) for v in samples.tolist()]})
+        names = [stage['name'] for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique.")
+
+        if 'wip_limits' in request:
+            candidates = request['wip_limits']
+            if not isinstance(candidates, list) or not candidates:
+                raise ValueError("'wip_limits' must be a non-empty list of configurations.")
+            configurations = []
+            for candidate in candidates:
+                if isinstance(candidate, dict):
+                    candidate = [candidate.get(name) for name in names]
+                if not isinstance(candidate, list) or len(candidate) != len(stages):
+                    raise ValueError("Each WIP configuration needs one limit per stage.")
+                configurations.append([_whole_number(v, "WIP limit", MAX_WIP_LIMIT) for v in candidate])
+        elif 'wip_ranges' in request:
+            ranges = request['wip_ranges']
+            if not isinstance(ranges, dict) or set(ranges) != set(names):
+                raise ValueError("'wip_ranges' must give a [low, high] range for every stage.")
+            axes = []
+            for name in names:
+                bounds = ranges[name]
+                if not isinstance(bounds, list) or len(bounds) != 2:
+                    raise ValueError(f"{name}: WIP range must be [low, high].")
+                low, high = (_whole_number(v, f"{name}: WIP range", MAX_WIP_LIMIT) for v in bounds)
+                if high < low:
+                    raise ValueError(f"{name}: WIP range must be [low, high].")
+                axes.append(range(low, high + 1))
+            if np.prod([len(axis) for axis in axes], dtype=np.float64) > MAX_CONFIGURATIONS:
+                raise ValueError(f"At most {MAX_CONFIGURATIONS} WIP configurations can be simulated at once.")
+            configurations = [list(c) for c in itertools.product(*axes)]
+        else:
+            raise ValueError("Provide 'wip_limits' (a list of configurations) or 'wip_ranges' (per-stage [low, high]).")
+        if len(configurations) > MAX_CONFIGURATIONS:
+            raise ValueError(f"At most {MAX_CONFIGURATIONS} WIP configurations can be simulated at once.")
+
+        days = _whole_number(request.get('days', 180), "'days'", MAX_SIMULATED_DAYS)
+        warmup_days = request.get('warmup_days', min(30, days // 4))
+        if isinstance(warmup_days, bool) or not isinstance(warmup_days, (int, float)) or not 0 <= warmup_days < days:
+            raise ValueError("'warmup_days' must be at least 0 and less than 'days'.")
+        arrival_rate = request.get('arrival_rate')
+        if arrival_rate is not None and (isinstance(arrival_rate, bool) or not isinstance(arrival_rate, (int, float))
+                                         or not 0 < arrival_rate <= 1000):
+            raise ValueError("'arrival_rate' must be a positive number of items per day.")
+        top = _whole_number(request.get('top', 20), "'top'", MAX_CONFIGURATIONS)
+        spec = {'stages': stages, 'days': days, 'warmup_days': warmup_days, 'arrival_rate': arrival_rate, 'top': top}
+        if _expected_events(spec, configurations) > MAX_SIMULATED_EVENTS:
+            raise ValueError(f"This simulation would process more than {MAX_SIMULATED_EVENTS} events; "
+                             "simulate fewer configurations or days, or a lower 'arrival_rate'.")
+        digest = hashlib.sha256(json.dumps([spec, configurations], sort_keys=True).encode('utf-8')).hexdigest()
+        spec['seed'] = int(digest[:12], 16)
+        return spec, configurations
+
+
+def _expected_events(spec: Dict, configurations: List[List[int]]) -> float:
+    """Estimated events in a sweep: every arrival, plus one completion per item per stage.
+
+    Items flow no faster than the slowest stage can serve them, with at most min(workers, WIP limit)
+    items in service there at once.
+    """
+    limits = np.asarray(configurations, dtype=np.float64)
+    workers = np.array([stage['workers'] for stage in spec['stages']], dtype=np.float64)
+    mean_service = np.array([np.mean(stage['service_times']) for stage in spec['stages']])
+    with np.errstate(divide='ignore'):
+        rates = (np.minimum(limits, workers) / mean_service).min(axis=1)
+    arrivals = spec['arrival_rate'] or 0.0
+    if spec['arrival_rate'] is not None:
+        rates = np.minimum(rates, arrivals)
+    return float(spec['days'] * (arrivals * len(configurations) + rates.sum() * len(spec['stages'])))
+
+
+def _whole_number(value, name: str, maximum: int) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value) or not 1 <= value <= maximum:
+        raise ValueError(f"{name} must be a whole number from 1 to {maximum}.")
+    return int(value)
+
+
+def describe_simulation(result: Dict) -> str:
+    """Summarize the recommended WIP limits in one sentence for the chat view."""
+    best = result['recommended']
+    limits = ", ".join(f"{name} {limit}" for name, limit in best['wip_limits'].items())
+    message = (f"Across {result['configurations']} simulated WIP configurations, the suggested limits are {limits}: "
+               f"about {best['throughput_per_day']} items per day")
+    if best['cycle_time_days']:
+        message += f" with a P85 cycle time of {best['cycle_time_days']['p85']} days"
+    return message + "."
@@ -0,0 +1,43 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+
+class LazyProcessPool:
+    """A process pool started on first use and shared by every request until closed.
+
+    Workers come from a fork server where available, otherwise they are spawned; either way they
+    start from a fresh interpreter rather than a copy of the server with its locks and threads.
+    Task functions and their arguments are pickled by reference, so every module a worker
+    imports must be free of start-up side effects. `preload` modules are imported once in the
+    fork server (by whichever pool starts it), so new workers start with them already loaded.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, preload: Sequence[str] = ()):
+        self.max_workers = max_workers
+        self.preload = list(preload)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self) -> int:
+        return self.max_workers or os.cpu_count() or 1
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                if 'forkserver' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('forkserver')
+                    context.set_forkserver_preload(self.preload)
+                else:
+                    context = multiprocessing.get_context('spawn')
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None